@@ -1,17 +1,24 @@
 """Museum Attendance Common Package - Shared database, logging, and repository components."""
 
 from .utils import get_logger, setup_logging
-from .config import Settings, get_db_session, close_db
+from .config import Settings, get_db_session, get_read_session, close_db, get_async_db_session, close_async_db
 from .exceptions import MuseumDataFetcherError, DatabaseError
-from .enumeration import ImportStatus
+from .enumeration import ImportStatus, PageType, CrawlTaskStatus, PersistenceMode, DatabaseDriver
 
 __all__ = [
     "get_logger",
     "setup_logging",
     "Settings",
     "get_db_session",
+    "get_read_session",
     "close_db",
+    "get_async_db_session",
+    "close_async_db",
     "MuseumDataFetcherError",
     "DatabaseError",
     "ImportStatus",
+    "PageType",
+    "CrawlTaskStatus",
+    "PersistenceMode",
+    "DatabaseDriver",
 ]
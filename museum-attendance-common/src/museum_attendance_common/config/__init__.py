@@ -1,8 +1,12 @@
-from .database import get_db_session, close_db
+from .database import get_db_session, get_read_session, close_db
+from .async_database import get_async_db_session, close_async_db
 from .settings import Settings
 
 __all__ = [
     "get_db_session",
+    "get_read_session",
     "close_db",
+    "get_async_db_session",
+    "close_async_db",
     "Settings"
 ]
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""Async database configuration and session management, the asyncio counterpart of database.py."""
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.exc import SQLAlchemyError, OperationalError
+
+from museum_attendance_common.config.settings import Settings
+from museum_attendance_common.utils.logging import get_logger
+from museum_attendance_common.exceptions import DatabaseError
+
+logger = get_logger(__name__)
+settings = Settings()
+
+# Global async engine instance (created once, reused)
+_async_engine: AsyncEngine | None = None
+_AsyncSessionLocal: async_sessionmaker[AsyncSession] | None = None
+
+
+async def get_async_engine() -> AsyncEngine:
+    """Get or create the async SQLAlchemy engine, with the pool settings of the sync engine.
+
+    The engine runs on asyncpg, installed with the `async` extra of the package.
+
+    Returns:
+        AsyncEngine: Configured async SQLAlchemy engine instance
+
+    Raises:
+        DatabaseError: If engine creation fails
+    """
+    global _async_engine
+
+    if _async_engine is None:
+        try:
+            logger.info(f"Creating async database engine: {settings.db_host}:{settings.db_port}/{settings.db_name}")
+
+            start_time = time.time()
+            engine = create_async_engine(
+                settings.async_database_url,
+                pool_size=settings.db_pool_size,
+                max_overflow=settings.db_max_overflow,
+                pool_timeout=settings.db_pool_timeout,
+                pool_recycle=settings.db_pool_recycle,
+                pool_pre_ping=True,
+                echo=False,
+            )
+
+            # Test the connection
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            _async_engine = engine
+
+            elapsed_time = time.time() - start_time
+            logger.info(f"Async database engine created in {elapsed_time:.2f}s")
+
+        except OperationalError as e:
+            logger.error(f"Database connection failed: {str(e)}")
+            raise DatabaseError(
+                f"Cannot connect to database at {settings.db_host}:{settings.db_port}/{settings.db_name}",
+                details={"error": str(e)}
+            ) from e
+
+        except ModuleNotFoundError as e:
+            logger.error(f"Async database driver is missing: {str(e)}")
+            raise DatabaseError(
+                "The async engine needs asyncpg, install museum-attendance-common[async]",
+                details={"error": str(e)}
+            ) from e
+
+        except Exception as e:
+            logger.error(f"Failed to create async database engine: {str(e)}")
+            raise DatabaseError(
+                f"Failed to create async database engine: {str(e)}",
+                details={"error": str(e)}
+            ) from e
+
+    return _async_engine
+
+
+async def get_async_session_maker() -> async_sessionmaker[AsyncSession]:
+    """Get or create the async session maker.
+
+    Returns:
+        async_sessionmaker: Configured async session factory
+    """
+    global _AsyncSessionLocal
+
+    if _AsyncSessionLocal is None:
+        engine = await get_async_engine()
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+
+    return _AsyncSessionLocal
+
+
+@asynccontextmanager
+async def get_async_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """Get an async database session with automatic transaction management.
+
+    Relationships are not lazy loaded under asyncio, queries must load what they need.
+
+    Yields:
+        AsyncSession: Async database session
+
+    Raises:
+        DatabaseError: If database operations fail
+    """
+    AsyncSessionLocal = await get_async_session_maker()
+    session = AsyncSessionLocal()
+    start_time = time.time()
+
+    try:
+        yield session
+        await session.commit()
+
+        elapsed_time = time.time() - start_time
+        logger.debug(f"Transaction committed in {elapsed_time:.2f}s")
+
+    except SQLAlchemyError as e:
+        await session.rollback()
+        elapsed_time = time.time() - start_time
+        error_msg = str(e.orig) if hasattr(e, "orig") else str(e)
+        logger.error(f"Database error after {elapsed_time:.2f}s: {error_msg}")
+        raise DatabaseError(
+            f"Database operation failed: {error_msg}",
+            operation="commit",
+            details={"error": error_msg, "elapsed_time": elapsed_time}
+        ) from e
+
+    except Exception as e:
+        await session.rollback()
+        elapsed_time = time.time() - start_time
+        logger.error(f"Unexpected error after {elapsed_time:.2f}s: {str(e)}")
+        raise DatabaseError(
+            f"Unexpected database error: {str(e)}",
+            operation="commit",
+            details={"error": str(e), "elapsed_time": elapsed_time}
+        ) from e
+
+    finally:
+        await session.close()
+
+
+async def close_async_db() -> None:
+    """Close async database connections and dispose of the async engine."""
+    global _async_engine, _AsyncSessionLocal
+
+    if _async_engine is not None:
+        try:
+            logger.info("Closing async database connections...")
+            await _async_engine.dispose()
+            _async_engine = None
+            _AsyncSessionLocal = None
+            logger.info("Async database connections closed")
+        except Exception as e:
+            logger.error(f"Error closing async database: {str(e)}")
+    else:
+        logger.debug("No async database engine to close")
@@ -1,14 +1,15 @@
 """Database configuration and session management."""
 from contextlib import contextmanager
-from typing import Generator
+from typing import Any, Generator
 import time
 
-from sqlalchemy import create_engine, Engine, text
+from sqlalchemy import create_engine, event, Engine, URL, text
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 from sqlalchemy.exc import SQLAlchemyError, OperationalError
 
 from museum_attendance_common.config.settings import Settings
+from museum_attendance_common.enumeration import DatabaseDriver
 from museum_attendance_common.utils.logging import get_logger
 from museum_attendance_common.exceptions import DatabaseError
 
@@ -18,6 +19,8 @@ settings = Settings()
 # Global engine instance (created once, reused)
 _engine: Engine | None = None
 _SessionLocal: sessionmaker | None = None
+_read_engine: Engine | None = None
+_ReadSessionLocal: sessionmaker | None = None
 
 
 def get_engine() -> Engine:
@@ -36,20 +39,7 @@ def get_engine() -> Engine:
             logger.info(f"Creating database engine: {settings.db_host}:{settings.db_port}/{settings.db_name}")
             
             start_time = time.time()
-            _engine = create_engine(
-                settings.database_url,
-                poolclass=QueuePool,
-                pool_size=settings.db_pool_size,
-                max_overflow=settings.db_max_overflow,
-                pool_timeout=settings.db_pool_timeout,
-                pool_recycle=settings.db_pool_recycle,
-                pool_pre_ping=True,
-                echo=False,
-            )
-
-            # Test the connection
-            with _engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
+            _engine = _create_engine(settings.database_url)
 
             elapsed_time = time.time() - start_time
             logger.info(f"Database engine created in {elapsed_time:.2f}s")
@@ -71,6 +61,90 @@ def get_engine() -> Engine:
     return _engine
 
 
+def get_read_engine() -> Engine:
+    """Get or create the engine of the read-only sessions.
+
+    It connects to the read replica when db_read_host is set and shares the primary engine otherwise,
+    in both cases its transactions are READ ONLY.
+
+    Raises:
+        DatabaseError: If engine creation fails
+    """
+    global _read_engine
+
+    if _read_engine is None:
+        read_database_url = settings.read_database_url
+        if read_database_url is None:
+            _read_engine = get_engine().execution_options(postgresql_readonly=True)
+            return _read_engine
+
+        try:
+            logger.info(f"Creating read replica engine: {read_database_url.host}:{read_database_url.port}/{settings.db_name}")
+
+            start_time = time.time()
+            _read_engine = _create_engine(read_database_url).execution_options(postgresql_readonly=True)
+
+            elapsed_time = time.time() - start_time
+            logger.info(f"Read replica engine created in {elapsed_time:.2f}s")
+
+        except OperationalError as e:
+            logger.error(f"Read replica connection failed: {str(e)}")
+            raise DatabaseError(
+                f"Cannot connect to read replica at {read_database_url.host}:{read_database_url.port}/{settings.db_name}",
+                details={"error": str(e)}
+            ) from e
+
+        except Exception as e:
+            logger.error(f"Failed to create read replica engine: {str(e)}")
+            raise DatabaseError(
+                f"Failed to create read replica engine: {str(e)}",
+                details={"error": str(e)}
+            ) from e
+
+    return _read_engine
+
+
+def _create_engine(url: URL) -> Engine:
+    """Engine with the pool and driver settings, once a connection to the database succeeded."""
+    connect_args: dict[str, Any] = {}
+    if settings.db_driver == DatabaseDriver.PSYCOPG:
+        connect_args["prepare_threshold"] = settings.db_prepare_threshold
+    engine = create_engine(
+        url,
+        poolclass=QueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=True,
+        echo=False,
+        connect_args=connect_args,
+    )
+    if settings.db_driver == DatabaseDriver.PSYCOPG and settings.db_prepare_threshold is not None:
+        enable_prepared_statements(engine)
+
+    # Test the connection
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return engine
+
+
+def enable_prepared_statements(engine: Engine) -> None:
+    """Prepares the statements marked with the `prepare` execution option from their first execution.
+
+    Only for psycopg engines, other statements are prepared after db_prepare_threshold executions.
+    """
+    event.listen(engine, "do_execute", _execute_prepared)
+
+
+def _execute_prepared(cursor: Any, statement: str, parameters: Any, context: Any) -> bool | None:
+    """do_execute hook, returns True once it executed the statement and None to let the dialect do it."""
+    if not context.execution_options.get("prepare"):
+        return None
+    cursor.execute(statement, parameters, prepare=True)
+    return True
+
+
 def get_session_maker() -> sessionmaker:
     """Get or create the session maker.
 
@@ -139,9 +213,59 @@ def get_db_session() -> Generator[Session, None, None]:
         session.close()
 
 
+@contextmanager
+def get_read_session() -> Generator[Session, None, None]:
+    """Get a session for queries only, on the read replica when one is configured.
+
+    Analytical scans run there without competing with the imports on the primary. The replica may lag
+    behind the primary, so what a job writes is read back through get_db_session. Nothing is committed,
+    the transaction is rolled back when the session closes.
+
+    Yields:
+        Session: Read-only database session
+
+    Raises:
+        DatabaseError: If database operations fail
+    """
+    global _ReadSessionLocal
+
+    if _ReadSessionLocal is None:
+        _ReadSessionLocal = sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            bind=get_read_engine(),
+            expire_on_commit=False,
+        )
+    session = _ReadSessionLocal()
+
+    try:
+        yield session
+
+    except SQLAlchemyError as e:
+        error_msg = str(e.orig) if hasattr(e, "orig") else str(e)
+        logger.error(f"Database read error: {error_msg}")
+        raise DatabaseError(
+            f"Database read failed: {error_msg}",
+            operation="read",
+            details={"error": error_msg}
+        ) from e
+
+    finally:
+        session.close()
+
+
 def close_db() -> None:
-    """Close database connections and dispose of the engine."""
-    global _engine, _SessionLocal
+    """Close database connections and dispose of the engines."""
+    global _engine, _SessionLocal, _read_engine, _ReadSessionLocal
+
+    # The read engine is the primary engine with other options when no replica is configured
+    if _read_engine is not None and settings.read_database_url is not None:
+        try:
+            _read_engine.dispose()
+        except Exception as e:
+            logger.error(f"Error closing read replica: {str(e)}")
+    _read_engine = None
+    _ReadSessionLocal = None
 
     if _engine is not None:
         try:
@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
 from sqlalchemy.engine import URL
+from museum_attendance_common.enumeration import DatabaseDriver, PersistenceMode
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
@@ -10,6 +11,15 @@ class Settings(BaseSettings):
     db_host: str = "localhost"
     db_port: int = 5432
     db_name: str = "museum_attendance"
+
+    # read replica serving get_read_session, same user, password and database (unset or empty reads from the primary)
+    db_read_host: str | None = None
+    db_read_port: int | None = None       # db_port by default
+
+    # PSYCOPG (psycopg 3, installed with the psycopg extra) prepares statements on the server and pipelines executemany
+    db_driver: DatabaseDriver = DatabaseDriver.PSYCOPG2
+    # with psycopg, executions of a statement on a connection before it is prepared (None never prepares)
+    db_prepare_threshold: int | None = 5
     
     # Database connection pool settings
     db_pool_size: int = 1           # Only 1 connection needed
@@ -19,12 +29,48 @@ class Settings(BaseSettings):
 
     keep_html_files: bool = False
 
+    # free the HTML and parsed tree of each page as soon as its data is extracted, for very large crawls
+    low_memory_mode: bool = False
+
+    # wikipedia pages listing the museums to import (JSON list when set from the environment)
+    master_page_titles: list[str] = ["List_of_most_visited_museums"]
+
     # rate limiting for wikipedia API
     rate_limit_calls: int = 2
     rate_limit_period: int = 1
 
     # multithreading settings
     max_workers: int = 5
+
+    # adaptive concurrency of the crawl (max_workers is the starting point)
+    concurrency_floor: int = 1
+    concurrency_ceiling: int = 10
+    concurrency_target_latency: float = 2.0
+
+    # time budget of an import run in seconds, the pages complete by then are persisted (0 disables it)
+    run_deadline_seconds: int = 0
+
+    # streaming settings (collected museums waiting to be persisted)
+    collection_queue_size: int = 10
+
+    # museums upserted per statement (and committed together with their checkpoints)
+    persist_batch_size: int = 50
+
+    # countries and cities written per flush (1 flushes each of them on its own)
+    persist_flush_size: int = 50
+
+    # BATCH mode sessions persisting the museums of a batch in parallel, partitioned by museum name (1 persists them serially)
+    persist_partitions: int = 1
+
+    # BATCH commits each batch as it arrives, COPY stages the whole import with COPY and merges it in one transaction
+    persistence_mode: PersistenceMode = PersistenceMode.BATCH
+
+    # distributed crawl settings (fetcher replicas sharing the crawl_task queue of an import job)
+    crawl_claim_batch_size: int = 5
+    crawl_task_lease_seconds: int = 300
+    crawl_task_max_attempts: int = 3
+    crawl_poll_interval: float = 1.0
+    crawl_worker_wait_timeout: int = 60
     
     # wikipedia API credentials
     wikipedia_auth_url: str = "https://en.wikipedia.org/w/rest.php/oauth2/access_token"
@@ -41,10 +87,22 @@ class Settings(BaseSettings):
     def database_url(self) -> URL:
         """Build database URL with properly encoded credentials."""
         return URL.create(
-            drivername="postgresql+psycopg2",
+            drivername="postgresql+psycopg" if self.db_driver == DatabaseDriver.PSYCOPG else "postgresql+psycopg2",
             username=self.db_user,
             password=self.db_password,
             host=self.db_host,
             port=self.db_port,
             database=self.db_name
-        )
\ No newline at end of file
+        )
+
+    @property
+    def async_database_url(self) -> URL:
+        """Build the database URL of the async engine, which runs on asyncpg."""
+        return self.database_url.set(drivername="postgresql+asyncpg")
+
+    @property
+    def read_database_url(self) -> URL | None:
+        """Build the URL of the read replica, None when no replica is configured."""
+        if not self.db_read_host:
+            return None
+        return self.database_url.set(host=self.db_read_host, port=self.db_read_port or self.db_port)
@@ -1,5 +1,13 @@
 from .import_status import ImportStatus
+from .page_type import PageType
+from .crawl_task_status import CrawlTaskStatus
+from .persistence_mode import PersistenceMode
+from .database_driver import DatabaseDriver
 
 __all__ = [
     "ImportStatus",
+    "PageType",
+    "CrawlTaskStatus",
+    "PersistenceMode",
+    "DatabaseDriver",
 ]
@@ -0,0 +1,7 @@
+from enum import Enum
+
+class CrawlTaskStatus(Enum):
+    PENDING = "PENDING"
+    CLAIMED = "CLAIMED"
+    DONE = "DONE"
+    FAILED = "FAILED"
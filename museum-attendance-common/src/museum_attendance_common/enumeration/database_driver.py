@@ -0,0 +1,5 @@
+from enum import Enum
+
+class DatabaseDriver(Enum):
+    PSYCOPG2 = "PSYCOPG2"
+    PSYCOPG = "PSYCOPG"
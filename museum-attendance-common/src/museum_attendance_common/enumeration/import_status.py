@@ -4,3 +4,4 @@ class ImportStatus(Enum):
     IN_PROGRESS = "IN_PROGRESS"
     FAILED = "FAILED"
     SUCCESS = "SUCCESS"
+    PARTIAL = "PARTIAL"
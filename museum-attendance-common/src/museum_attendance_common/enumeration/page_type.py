@@ -0,0 +1,6 @@
+from enum import Enum
+
+class PageType(Enum):
+    LIST = "LIST"
+    MUSEUM = "MUSEUM"
+    CITY = "CITY"
@@ -0,0 +1,5 @@
+from enum import Enum
+
+class PersistenceMode(Enum):
+    BATCH = "BATCH"
+    COPY = "COPY"
@@ -3,6 +3,9 @@ from .city import City
 from .museum import Museum
 from .museum_attributes import MuseumAttributes
 from .import_log import ImportLog
+from .import_checkpoint import ImportCheckpoint
+from .crawl_task import CrawlTask
+from .museum_visitor_history import MuseumVisitorHistory
 
 
-__all__ = ["Country", "City", "Museum", "MuseumAttributes", "ImportLog"]
\ No newline at end of file
+__all__ = ["Country", "City", "Museum", "MuseumAttributes", "ImportLog", "ImportCheckpoint", "CrawlTask", "MuseumVisitorHistory"]
@@ -0,0 +1,30 @@
+from .base import Base
+from sqlalchemy import Integer, String, DateTime, ForeignKey, Text, UniqueConstraint, Index, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional, Any
+from datetime import datetime
+
+class CrawlTask(Base):
+    __tablename__ = "crawl_task"
+    __table_args__ = (
+        UniqueConstraint("import_log_id", "page_type", "page_key"),
+        Index("idx_crawl_task_import_log_status", "import_log_id", "status"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    import_log_id: Mapped[int] = mapped_column(ForeignKey("import_log.id", ondelete="CASCADE"), nullable=False)
+    page_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    page_key: Mapped[str] = mapped_column(Text, nullable=False)
+    payload: Mapped[Optional[Any]] = mapped_column(JSONB, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, server_default="PENDING")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    claimed_by: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    result: Mapped[Optional[Any]] = mapped_column(JSONB, nullable=True)
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self) -> str:
+        return f"<CrawlTask(id={self.id}, import_log_id={self.import_log_id}, page_type='{self.page_type}', page_key='{self.page_key}', status='{self.status}')>"
@@ -0,0 +1,20 @@
+from .base import Base
+from sqlalchemy import Integer, String, DateTime, ForeignKey, Text, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional, Any
+from datetime import datetime
+
+class ImportCheckpoint(Base):
+    __tablename__ = "import_checkpoint"
+    __table_args__ = (UniqueConstraint("import_log_id", "page_type", "page_key"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    import_log_id: Mapped[int] = mapped_column(ForeignKey("import_log.id", ondelete="CASCADE"), nullable=False)
+    page_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    page_key: Mapped[str] = mapped_column(Text, nullable=False)
+    payload: Mapped[Optional[Any]] = mapped_column(JSONB, nullable=True)
+    completed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self) -> str:
+        return f"<ImportCheckpoint(id={self.id}, import_log_id={self.import_log_id}, page_type='{self.page_type}', page_key='{self.page_key}')>"
@@ -1,9 +1,10 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 from .base import Base
-from sqlalchemy import ForeignKey, Integer, String, DateTime, func
+from sqlalchemy import ForeignKey, Integer, String, DateTime, Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from typing import Optional, List
+from typing import Optional, List, Any
 from datetime import datetime
 
 if TYPE_CHECKING:
@@ -12,6 +13,10 @@ if TYPE_CHECKING:
 
 class Museum(Base):
     __tablename__ = "museum"
+    __table_args__ = (
+        Index("idx_museum_city_id", "city_id"),
+        Index("idx_museum_attributes_gin", "attributes", postgresql_using="gin"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(150), nullable=False, unique=True)
@@ -20,6 +25,8 @@ class Museum(Base):
     museum_attributes: Mapped[List["MuseumAttributes"]] = relationship("MuseumAttributes", back_populates="museum")
     city: Mapped["City"] = relationship("City", back_populates="museums")
     number_of_visitors: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # The museum_attributes rows as one object, kept in sync by the repositories for GIN-indexed filters
+    attributes: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False, server_default=text("'{}'"))
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
     
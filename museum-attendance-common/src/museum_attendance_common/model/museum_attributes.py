@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 from .base import Base
-from sqlalchemy import ForeignKey, Integer, String, DateTime, func
+from sqlalchemy import ForeignKey, Integer, String, DateTime, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Optional
 from datetime import datetime
@@ -11,6 +11,7 @@ if TYPE_CHECKING:
 
 class MuseumAttributes(Base):
     __tablename__ = "museum_attributes"
+    __table_args__ = (UniqueConstraint("museum_id", "attribute_key"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     museum_id: Mapped[int] = mapped_column(ForeignKey("museum.id"), nullable=False)
@@ -0,0 +1,20 @@
+from .base import Base
+from sqlalchemy import Integer, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+class MuseumVisitorHistory(Base):
+    """Visitor count of a museum as recorded by an import job, partitioned by year of recorded_at."""
+    __tablename__ = "museum_visitor_history"
+    __table_args__ = (
+        Index("idx_museum_visitor_history_recorded_at", "recorded_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (recorded_at)"},
+    )
+
+    museum_id: Mapped[int] = mapped_column(ForeignKey("museum.id"), primary_key=True)
+    recorded_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    import_log_id: Mapped[int] = mapped_column(ForeignKey("import_log.id", ondelete="CASCADE"), primary_key=True)
+    number_of_visitors: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<MuseumVisitorHistory(museum_id={self.museum_id}, recorded_at={self.recorded_at}, number_of_visitors={self.number_of_visitors})>"
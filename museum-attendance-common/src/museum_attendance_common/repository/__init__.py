@@ -3,5 +3,16 @@ from .city_repository import CityRepository
 from .museum_repository import MuseumRepository
 from .museum_attributes_repository import MuseumAttributesRepository
 from .import_log_repository import ImportLogRepository
+from .import_checkpoint_repository import ImportCheckpointRepository
+from .crawl_task_repository import CrawlTaskRepository
+from .staging_repository import StagingRepository
+from .museum_visitor_history_repository import MuseumVisitorHistoryRepository
+from .museum_city_population_repository import MuseumCityPopulationRepository
+from .async_country_repository import AsyncCountryRepository
+from .async_city_repository import AsyncCityRepository
+from .async_museum_repository import AsyncMuseumRepository
+from .async_museum_attributes_repository import AsyncMuseumAttributesRepository
+from .async_import_log_repository import AsyncImportLogRepository
 
-__all__ = ["CountryRepository", "CityRepository", "MuseumRepository", "MuseumAttributesRepository", "ImportLogRepository"]
\ No newline at end of file
+__all__ = ["CountryRepository", "CityRepository", "MuseumRepository", "MuseumAttributesRepository", "ImportLogRepository", "ImportCheckpointRepository", "CrawlTaskRepository", "StagingRepository", "MuseumVisitorHistoryRepository", "MuseumCityPopulationRepository",
+           "AsyncCountryRepository", "AsyncCityRepository", "AsyncMuseumRepository", "AsyncMuseumAttributesRepository", "AsyncImportLogRepository"]
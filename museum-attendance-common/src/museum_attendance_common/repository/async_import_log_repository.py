@@ -0,0 +1,84 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from museum_attendance_common.model import ImportLog
+from museum_attendance_common.enumeration import ImportStatus
+from datetime import datetime, timezone
+from typing import Any
+from museum_attendance_common.utils import get_logger
+from museum_attendance_common.exceptions import DatabaseError
+from .statements import select_latest_resumable_import_log, lock_import_log
+
+logger = get_logger(__name__)
+
+class AsyncImportLogRepository:
+    """ImportLogRepository on an AsyncSession, with the same semantics."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def start_job(self, status: ImportStatus, result: dict[str, Any] | None = None) -> ImportLog:
+        try:
+            import_log = ImportLog(
+                status=status.value,
+                result=result
+            )
+            self.session.add(import_log)
+            await self.session.flush()
+            logger.info(f"Started import job with status: {status.value}")
+            return import_log
+        except SQLAlchemyError as e:
+            logger.error(f"Error starting import job: {str(e)}")
+            raise DatabaseError(f"Failed to start import job: {str(e)}", entity_type="ImportLog", operation="start_job") from e
+
+    async def end_job_with_failure(self, import_log: ImportLog, result: dict[str, Any] | None = None) -> ImportLog:
+        return await self.__end_job(import_log, ImportStatus.FAILED, result, "end_job_with_failure")
+
+    async def end_job_with_success(self, import_log: ImportLog, result: dict[str, Any] | None = None) -> ImportLog:
+        return await self.__end_job(import_log, ImportStatus.SUCCESS, result, "end_job_with_success")
+
+    async def end_job_with_partial_success(self, import_log: ImportLog, result: dict[str, Any] | None = None) -> ImportLog:
+        """Ends an import job that ran out of time after persisting part of the data."""
+        return await self.__end_job(import_log, ImportStatus.PARTIAL, result, "end_job_with_partial_success")
+
+    async def get_latest_resumable(self) -> ImportLog | None:
+        """Returns the most recent import job that did not complete all its pages."""
+        try:
+            import_log: ImportLog | None = await self.session.scalar(select_latest_resumable_import_log())
+            return import_log
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying resumable import job: {str(e)}")
+            raise DatabaseError(f"Failed to query resumable import job: {str(e)}", entity_type="ImportLog", operation="get_latest_resumable") from e
+
+    async def resume_job(self, import_log: ImportLog, result: dict[str, Any] | None = None) -> ImportLog:
+        try:
+            import_log.status = ImportStatus.IN_PROGRESS.value
+            import_log.result = result
+            import_log.completed_at = None
+            await self.session.flush()
+            logger.info(f"Resumed import job {import_log.id}")
+            return import_log
+        except SQLAlchemyError as e:
+            logger.error(f"Error resuming import job: {str(e)}")
+            raise DatabaseError(f"Failed to resume import job: {str(e)}", entity_type="ImportLog", operation="resume_job") from e
+
+    async def lock(self, import_log: ImportLog) -> ImportLog:
+        """Locks the import job row until the end of the transaction and reloads its status."""
+        try:
+            locked = await self.session.execute(lock_import_log(import_log.id))
+            locked_import_log: ImportLog = locked.scalar_one()
+            return locked_import_log
+        except SQLAlchemyError as e:
+            logger.error(f"Error locking import job {import_log.id}: {str(e)}")
+            raise DatabaseError(f"Failed to lock import job: {str(e)}", entity_type="ImportLog", entity_id=str(import_log.id), operation="lock") from e
+
+    async def __end_job(self, import_log: ImportLog, status: ImportStatus, result: dict[str, Any] | None, operation: str) -> ImportLog:
+        try:
+            import_log.status = status.value
+            import_log.result = result
+            import_log.completed_at = datetime.now(timezone.utc)
+            await self.session.flush()
+            logger.info(f"Import job {import_log.id} ended with status: {status.value}")
+            return import_log
+        except SQLAlchemyError as e:
+            logger.error(f"Error ending import job with status {status.value}: {str(e)}")
+            raise DatabaseError(f"Failed to end import job: {str(e)}", entity_type="ImportLog", operation=operation) from e
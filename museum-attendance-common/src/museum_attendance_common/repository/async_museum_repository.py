@@ -0,0 +1,121 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from museum_attendance_common.model import Museum, City
+from museum_attendance_common.utils import get_logger, measured
+from typing import Any, AsyncIterator, Tuple
+from museum_attendance_common.exceptions import DatabaseError
+from .statements import select_museum_by_name, select_museums_by_names, upsert_museums, select_museums, stream_museums, select_museums_by_attributes, select_museums_by_attribute_key
+
+logger = get_logger(__name__)
+
+class AsyncMuseumRepository:
+    """MuseumRepository on an AsyncSession, with the same semantics."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_by_name(self, name: str) -> Museum | None:
+        try:
+            museum: Museum | None = await self.session.scalar(select_museum_by_name(name))
+            return museum
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying museum '{name}': {str(e)}")
+            raise DatabaseError(f"Failed to query museum: {str(e)}", entity_type="Museum", entity_id=name) from e
+
+    @measured("repository.museum.persist")
+    async def persist(self, name: str, number_of_visitors: int, reference_url: str, city: City) -> Tuple[Museum, bool, bool]:
+        try:
+            museum = await self.get_by_name(name)
+            if museum:
+                if museum.number_of_visitors == number_of_visitors:
+                    logger.debug(f"Museum '{name}' is unchanged")
+                    return museum, False, False
+                museum.number_of_visitors = number_of_visitors
+                await self.session.flush()
+                logger.debug(f"Updated museum: {name}")
+                return museum, False, True
+
+            museum = Museum(name=name, number_of_visitors=number_of_visitors, reference_url=reference_url, city_id=city.id)
+            self.session.add(museum)
+            await self.session.flush()
+            logger.debug(f"Created museum: {name}")
+            return museum, True, False
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error persisting museum '{name}': {str(e)}")
+            raise DatabaseError(f"Failed to persist museum: {str(e)}", entity_type="Museum", entity_id=name, operation="persist") from e
+
+    @measured("repository.museum.persist_many")
+    async def persist_many(self, museums: list[dict[str, Any]]) -> list[Tuple[Museum, bool, bool]]:
+        """Upserts a batch of museums with a single INSERT ... ON CONFLICT (name) DO UPDATE.
+
+        Args:
+            museums: Museums as the keyword arguments of `persist` (name, number_of_visitors, reference_url, city)
+
+        Returns:
+            list: (museum, inserted, updated) per distinct name, in the order of the batch, as
+            returned by `MuseumRepository.persist_many`
+        """
+        # A name can only be upserted once per statement, the last occurrence in the batch wins
+        rows = {
+            museum["name"]: {
+                "name": museum["name"],
+                "number_of_visitors": museum["number_of_visitors"],
+                "reference_url": museum["reference_url"],
+                "city_id": museum["city"].id,
+            }
+            for museum in museums
+        }
+        if not rows:
+            return []
+
+        try:
+            result = await self.session.execute(upsert_museums(list(rows.values())))
+            persisted = {museum.name: (museum, bool(inserted), not inserted) for museum, inserted in result.all()}
+            # Unchanged museums are skipped by the WHERE clause and not returned, they are loaded instead
+            unchanged_names = [name for name in rows if name not in persisted]
+            if unchanged_names:
+                for museum in await self.session.scalars(select_museums_by_names(unchanged_names)):
+                    persisted[museum.name] = (museum, False, False)
+            logger.debug(f"Upserted {len(persisted) - len(unchanged_names)} museums, {len(unchanged_names)} unchanged")
+            return [persisted[name] for name in rows]
+        except SQLAlchemyError as e:
+            logger.error(f"Error persisting {len(rows)} museums: {str(e)}")
+            raise DatabaseError(f"Failed to persist museums: {str(e)}", entity_type="Museum", operation="persist_many") from e
+
+    async def get_museums(self, include_attributes: bool = False) -> list[Museum]:
+        """Loads all museums with their city, relationships are never lazy loaded under asyncio."""
+        try:
+            museums = await self.session.scalars(select_museums(include_attributes))
+            # Joined collections repeat the museum row, unique() folds them back
+            return list(museums.unique())
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying museums: {str(e)}")
+            raise DatabaseError(f"Failed to query museums: {str(e)}", entity_type="Museum") from e
+
+    async def stream_museums(self, include_attributes: bool = False, batch_size: int = 1000) -> AsyncIterator[Museum]:
+        """Yields all museums with their city from a server-side cursor, as `MuseumRepository.stream_museums`."""
+        try:
+            async for museum in await self.session.stream_scalars(stream_museums(include_attributes, batch_size)):
+                yield museum
+        except SQLAlchemyError as e:
+            logger.error(f"Error streaming museums: {str(e)}")
+            raise DatabaseError(f"Failed to stream museums: {str(e)}", entity_type="Museum", operation="stream_museums") from e
+
+    async def get_by_attributes(self, attributes: dict[str, str]) -> list[Museum]:
+        """Museums having all the given attribute values, one containment (@>) query on the GIN index of museum.attributes."""
+        try:
+            museums = await self.session.scalars(select_museums_by_attributes(attributes))
+            return list(museums)
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying museums with attributes {attributes}: {str(e)}")
+            raise DatabaseError(f"Failed to query museums by attributes: {str(e)}", entity_type="Museum", operation="get_by_attributes") from e
+
+    async def get_by_attribute_key(self, attribute_key: str) -> list[Museum]:
+        """Museums having the attribute whatever its value, one key (?) query on the GIN index of museum.attributes."""
+        try:
+            museums = await self.session.scalars(select_museums_by_attribute_key(attribute_key))
+            return list(museums)
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying museums with attribute '{attribute_key}': {str(e)}")
+            raise DatabaseError(f"Failed to query museums by attribute key: {str(e)}", entity_type="Museum", entity_id=attribute_key, operation="get_by_attribute_key") from e
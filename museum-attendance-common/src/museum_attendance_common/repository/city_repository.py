@@ -1,37 +1,77 @@
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from museum_attendance_common.model import City, Country
-from museum_attendance_common.utils import get_logger
-from typing import Tuple
+from museum_attendance_common.utils import get_logger, measured
+from typing import Iterable, Tuple
 from museum_attendance_common.exceptions import DatabaseError
+from .rollback_caches import clear_on_rollback
+from .statements import select_city_by_name, select_cities_by_names
 
 logger = get_logger(__name__)
 
 class CityRepository:
     def __init__(self, session: Session) -> None:
         self.session = session
+        # Cities resolved during this run by name, None when the city is known not to exist
+        self.__cache: dict[str, City | None] = {}
+        # A rollback discards the cities inserted since the last commit, they are resolved again afterwards
+        clear_on_rollback(session, self)
+
+    def clear_cache(self) -> None:
+        """Forgets the resolved cities, they are queried again."""
+        self.__cache.clear()
 
     def get_by_name(self, name: str) -> City | None:
         try:
-            return self.session.query(City).filter(City.name == name).first()
+            return self.session.scalar(select_city_by_name(name))
         except SQLAlchemyError as e:
             logger.error(f"Error querying city '{name}': {str(e)}")
             raise DatabaseError(f"Failed to query city: {str(e)}", entity_type="City", entity_id=name) from e
 
-    def persist(self, name: str, population: int | None, reference_url: str | None, country: Country) -> Tuple[City, bool, bool]:
-        """Persists a city in the database."""
+    def get_by_names(self, names: Iterable[str]) -> list[City]:
+        try:
+            return list(self.session.scalars(select_cities_by_names(names)))
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying cities: {str(e)}")
+            raise DatabaseError(f"Failed to query cities: {str(e)}", entity_type="City") from e
+
+    def preload(self, names: Iterable[str]) -> None:
+        """Resolves the cities not cached yet with a single IN query, `persist` then works from memory."""
+        missing_names = {name for name in names if name not in self.__cache}
+        if not missing_names:
+            return
+        cities = {city.name: city for city in self.get_by_names(missing_names)}
+        for name in missing_names:
+            self.__cache[name] = cities.get(name)
+        logger.debug(f"Preloaded {len(cities)} of {len(missing_names)} cities")
+
+    @measured("repository.city.persist")
+    def persist(self, name: str, population: int | None, reference_url: str | None, country: Country, flush: bool = True) -> Tuple[City, bool, bool]:
+        """Persists a city in the database.
+
+        With flush=False the changes stay pending until the session is flushed. The country may be
+        pending as well, the city is linked to it and gets its id in the same flush.
+        """
         try:
-            city = self.get_by_name(name)
+            city = self.__cache[name] if name in self.__cache else self.get_by_name(name)
+            self.__cache[name] = city
             if city:
+                # Unchanged cities are left alone, so they produce no UPDATE and keep their updated_at
+                if city.population == population and city.reference_url == reference_url:
+                    logger.debug(f"City '{name}' is unchanged")
+                    return city, False, False
                 city.population = population
                 city.reference_url = reference_url
-                self.session.flush()
+                if flush:
+                    self.session.flush()
                 logger.debug(f"Updated city: {name}")
                 return city, False, True
             
-            city = City(name=name, population=population, reference_url=reference_url, country_id=country.id)
+            city = City(name=name, population=population, reference_url=reference_url, country_id=country.id, country=country)
             self.session.add(city)
-            self.session.flush()
+            if flush:
+                self.session.flush()
+            self.__cache[name] = city
             logger.debug(f"Created city: {name}")
             return city, True, False
             
@@ -1,33 +1,68 @@
 from museum_attendance_common.model import Country
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from museum_attendance_common.utils import get_logger
-from typing import Tuple
+from museum_attendance_common.utils import get_logger, measured
+from typing import Iterable, Tuple
 from museum_attendance_common.exceptions import DatabaseError
+from .rollback_caches import clear_on_rollback
+from .statements import select_country_by_name, select_countries_by_names
 
 logger = get_logger(__name__)
 
 class CountryRepository:
     def __init__(self, session: Session):
         self.session = session
+        # Countries resolved during this run by name, None when the country is known not to exist
+        self.__cache: dict[str, Country | None] = {}
+        # A rollback discards the countries inserted since the last commit, they are resolved again afterwards
+        clear_on_rollback(session, self)
+
+    def clear_cache(self) -> None:
+        """Forgets the resolved countries, they are queried again."""
+        self.__cache.clear()
 
     def get_by_name(self, name: str) -> Country | None:
         try:
-            return self.session.query(Country).filter(Country.name == name).first()
+            return self.session.scalar(select_country_by_name(name))
         except SQLAlchemyError as e:
             logger.error(f"Error querying country '{name}': {str(e)}")
             raise DatabaseError(f"Failed to query country: {str(e)}", entity_type="Country", entity_id=name) from e
 
-    def add(self, name: str) -> Tuple[Country, bool, bool]:
+    def get_by_names(self, names: Iterable[str]) -> list[Country]:
+        try:
+            return list(self.session.scalars(select_countries_by_names(names)))
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying countries: {str(e)}")
+            raise DatabaseError(f"Failed to query countries: {str(e)}", entity_type="Country") from e
+
+    def preload(self, names: Iterable[str]) -> None:
+        """Resolves the countries not cached yet with a single IN query, `add` then works from memory."""
+        missing_names = {name for name in names if name not in self.__cache}
+        if not missing_names:
+            return
+        countries = {country.name: country for country in self.get_by_names(missing_names)}
+        for name in missing_names:
+            self.__cache[name] = countries.get(name)
+        logger.debug(f"Preloaded {len(countries)} of {len(missing_names)} countries")
+
+    @measured("repository.country.add")
+    def add(self, name: str, flush: bool = True) -> Tuple[Country, bool, bool]:
+        """Adds a country unless it exists.
+
+        With flush=False the new country stays pending until the session is flushed, it then gets its id.
+        """
         try:
-            country = self.get_by_name(name)
+            country = self.__cache[name] if name in self.__cache else self.get_by_name(name)
+            self.__cache[name] = country
             if country:
                 logger.debug(f"Country '{name}' already exists")
                 return country, False, False
             
             country = Country(name=name)
             self.session.add(country)
-            self.session.flush()
+            if flush:
+                self.session.flush()
+            self.__cache[name] = country
             logger.debug(f"Created country: {name}")
             return country, True, False
             
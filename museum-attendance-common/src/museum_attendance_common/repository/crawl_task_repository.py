@@ -0,0 +1,213 @@
+from datetime import timedelta
+from sqlalchemy import ColumnElement, and_, case, func, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from museum_attendance_common.model import CrawlTask, ImportLog
+from museum_attendance_common.enumeration import CrawlTaskStatus, ImportStatus, PageType
+from museum_attendance_common.utils import get_logger
+from typing import Any, cast
+from museum_attendance_common.exceptions import DatabaseError
+
+logger = get_logger(__name__)
+
+UNFINISHED_STATUSES = [CrawlTaskStatus.PENDING.value, CrawlTaskStatus.CLAIMED.value]
+
+class CrawlTaskRepository:
+    """Work queue of the pages to crawl for an import job, shared by all fetcher replicas."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def enqueue(self, import_log: ImportLog, page_type: PageType, page_key: str, payload: Any = None) -> bool:
+        """Adds a page to the queue unless it is already queued, returns whether it was added.
+
+        Several replicas may discover the same page at the same time, the unique constraint
+        decides which one queues it.
+        """
+        try:
+            statement = (
+                insert(CrawlTask)
+                .values(import_log_id=import_log.id, page_type=page_type.value, page_key=page_key, payload=payload, status=CrawlTaskStatus.PENDING.value)
+                .on_conflict_do_nothing(index_elements=["import_log_id", "page_type", "page_key"])
+                .returning(CrawlTask.id)
+            )
+            enqueued = self.session.execute(statement).scalar_one_or_none() is not None
+            logger.debug(f"{'Queued' if enqueued else 'Already queued'} crawl task {page_type.value} '{page_key}' for import job {import_log.id}")
+            return enqueued
+        except SQLAlchemyError as e:
+            logger.error(f"Error queuing crawl task {page_type.value} '{page_key}': {str(e)}")
+            raise DatabaseError(f"Failed to queue crawl task: {str(e)}", entity_type="CrawlTask", entity_id=page_key, operation="enqueue") from e
+
+    def claim(self, import_log: ImportLog, worker_id: str, limit: int, lease_seconds: int, max_attempts: int) -> list[CrawlTask]:
+        """Claims up to `limit` pending tasks for a worker.
+
+        Rows locked by another replica are skipped instead of waited on, so concurrent workers
+        never claim the same task. Tasks claimed by a worker that did not complete them within
+        the lease are claimed again, unless they used all their attempts: a page killing or hanging
+        every worker claiming it never reaches fail, so it is marked FAILED here.
+        """
+        try:
+            lease_expired = and_(
+                CrawlTask.status == CrawlTaskStatus.CLAIMED.value,
+                CrawlTask.claimed_at < func.now() - timedelta(seconds=lease_seconds)
+            )
+            abandoned = cast(CursorResult, self.session.execute(
+                update(CrawlTask)
+                .where(CrawlTask.import_log_id == import_log.id, lease_expired, CrawlTask.attempts >= max_attempts)
+                .values(status=CrawlTaskStatus.FAILED.value, error_message=f"Lease expired after {max_attempts} attempts", claimed_by=None)
+                .execution_options(synchronize_session=False)
+            )).rowcount
+            if abandoned:
+                logger.warning(f"Marked {abandoned} crawl tasks of import job {import_log.id} FAILED, their lease expired on the last attempt")
+            tasks = (
+                self.session.query(CrawlTask)
+                .filter(
+                    CrawlTask.import_log_id == import_log.id,
+                    or_(
+                        CrawlTask.status == CrawlTaskStatus.PENDING.value,
+                        and_(lease_expired, CrawlTask.attempts < max_attempts)
+                    )
+                )
+                .order_by(CrawlTask.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            for task in tasks:
+                task.status = CrawlTaskStatus.CLAIMED.value
+                task.claimed_by = worker_id
+                task.claimed_at = func.now()
+                task.attempts += 1
+            self.session.flush()
+            if tasks:
+                logger.debug(f"Worker {worker_id} claimed {len(tasks)} crawl tasks of import job {import_log.id}")
+            return tasks
+        except SQLAlchemyError as e:
+            logger.error(f"Error claiming crawl tasks for import job {import_log.id}: {str(e)}")
+            raise DatabaseError(f"Failed to claim crawl tasks: {str(e)}", entity_type="CrawlTask", entity_id=str(import_log.id), operation="claim") from e
+
+    def complete(self, task: CrawlTask, worker_id: str, lease_seconds: int, result: Any = None) -> bool:
+        """Stores the result of a task while the worker still holds its lease, returns whether it was stored.
+
+        Once the lease expired, another worker may have claimed the task again: the UPDATE then matches
+        no row and the result of that worker is not overwritten.
+        """
+        try:
+            completed = self.session.execute(
+                update(CrawlTask)
+                .where(CrawlTask.id == task.id, self.__held_by(worker_id, lease_seconds))
+                .values(status=CrawlTaskStatus.DONE.value, result=result, error_message=None, completed_at=func.now())
+                .returning(CrawlTask.id)
+                .execution_options(synchronize_session="fetch")
+            ).scalar_one_or_none() is not None
+            logger.debug(f"{'Completed' if completed else 'Lost the lease of'} crawl task {task.page_type} '{task.page_key}'")
+            return completed
+        except SQLAlchemyError as e:
+            logger.error(f"Error completing crawl task {task.page_type} '{task.page_key}': {str(e)}")
+            raise DatabaseError(f"Failed to complete crawl task: {str(e)}", entity_type="CrawlTask", entity_id=task.page_key, operation="complete") from e
+
+    def fail(self, task: CrawlTask, worker_id: str, lease_seconds: int, error_message: str, max_attempts: int) -> bool:
+        """Puts a failed task back in the queue, or marks it FAILED once it used all its attempts.
+
+        As complete, nothing is written once the worker lost the lease of the task, returns whether it was.
+        """
+        try:
+            failed = self.session.execute(
+                update(CrawlTask)
+                .where(CrawlTask.id == task.id, self.__held_by(worker_id, lease_seconds))
+                .values(
+                    status=case((CrawlTask.attempts >= max_attempts, CrawlTaskStatus.FAILED.value), else_=CrawlTaskStatus.PENDING.value),
+                    error_message=error_message,
+                    claimed_by=None,
+                )
+                .returning(CrawlTask.id)
+                .execution_options(synchronize_session="fetch")
+            ).scalar_one_or_none() is not None
+            logger.debug(f"Crawl task {task.page_type} '{task.page_key}' failed (attempt {task.attempts}/{max_attempts}): {error_message}")
+            return failed
+        except SQLAlchemyError as e:
+            logger.error(f"Error failing crawl task {task.page_type} '{task.page_key}': {str(e)}")
+            raise DatabaseError(f"Failed to fail crawl task: {str(e)}", entity_type="CrawlTask", entity_id=task.page_key, operation="fail") from e
+
+    @staticmethod
+    def __held_by(worker_id: str, lease_seconds: int) -> ColumnElement[bool]:
+        """Condition of a task claimed by the worker within the lease, the complement of what claim takes back."""
+        return and_(
+            CrawlTask.status == CrawlTaskStatus.CLAIMED.value,
+            CrawlTask.claimed_by == worker_id,
+            CrawlTask.claimed_at >= func.now() - timedelta(seconds=lease_seconds),
+        )
+
+    def get_completed(self, import_log: ImportLog, page_type: PageType) -> list[CrawlTask]:
+        try:
+            return (
+                self.session.query(CrawlTask)
+                .filter(
+                    CrawlTask.import_log_id == import_log.id,
+                    CrawlTask.page_type == page_type.value,
+                    CrawlTask.status == CrawlTaskStatus.DONE.value
+                )
+                .order_by(CrawlTask.id)
+                .all()
+            )
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying completed {page_type.value} crawl tasks for import job {import_log.id}: {str(e)}")
+            raise DatabaseError(f"Failed to query completed crawl tasks: {str(e)}", entity_type="CrawlTask", entity_id=str(import_log.id)) from e
+
+    def count_unfinished(self, import_log: ImportLog) -> int:
+        try:
+            return (
+                self.session.query(func.count(CrawlTask.id))
+                .filter(CrawlTask.import_log_id == import_log.id, CrawlTask.status.in_(UNFINISHED_STATUSES))
+                .scalar()
+            ) or 0
+        except SQLAlchemyError as e:
+            logger.error(f"Error counting unfinished crawl tasks for import job {import_log.id}: {str(e)}")
+            raise DatabaseError(f"Failed to count crawl tasks: {str(e)}", entity_type="CrawlTask", entity_id=str(import_log.id)) from e
+
+    def count_by_status(self, import_log: ImportLog) -> dict[str, int]:
+        try:
+            rows = (
+                self.session.query(CrawlTask.status, func.count(CrawlTask.id))
+                .filter(CrawlTask.import_log_id == import_log.id)
+                .group_by(CrawlTask.status)
+                .all()
+            )
+            return {status: count for status, count in rows}
+        except SQLAlchemyError as e:
+            logger.error(f"Error counting crawl tasks for import job {import_log.id}: {str(e)}")
+            raise DatabaseError(f"Failed to count crawl tasks: {str(e)}", entity_type="CrawlTask", entity_id=str(import_log.id)) from e
+
+    def count_by_worker(self, import_log: ImportLog) -> dict[str, int]:
+        """Returns how many tasks of the import job each worker completed."""
+        try:
+            rows = (
+                self.session.query(CrawlTask.claimed_by, func.count(CrawlTask.id))
+                .filter(CrawlTask.import_log_id == import_log.id, CrawlTask.status == CrawlTaskStatus.DONE.value)
+                .group_by(CrawlTask.claimed_by)
+                .all()
+            )
+            return {worker_id: count for worker_id, count in rows}
+        except SQLAlchemyError as e:
+            logger.error(f"Error counting crawl tasks per worker for import job {import_log.id}: {str(e)}")
+            raise DatabaseError(f"Failed to count crawl tasks: {str(e)}", entity_type="CrawlTask", entity_id=str(import_log.id)) from e
+
+    def get_active_import_log(self) -> ImportLog | None:
+        """Returns the most recent IN_PROGRESS import job that still has tasks to crawl."""
+        try:
+            unfinished_tasks = (
+                self.session.query(CrawlTask.id)
+                .filter(CrawlTask.import_log_id == ImportLog.id, CrawlTask.status.in_(UNFINISHED_STATUSES))
+                .exists()
+            )
+            return (
+                self.session.query(ImportLog)
+                .filter(ImportLog.status == ImportStatus.IN_PROGRESS.value, unfinished_tasks)
+                .order_by(ImportLog.triggered_at.desc(), ImportLog.id.desc())
+                .first()
+            )
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying active distributed import job: {str(e)}")
+            raise DatabaseError(f"Failed to query active import job: {str(e)}", entity_type="ImportLog", operation="get_active_import_log") from e
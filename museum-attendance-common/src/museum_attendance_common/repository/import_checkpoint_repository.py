@@ -0,0 +1,55 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from museum_attendance_common.model import ImportCheckpoint, ImportLog
+from museum_attendance_common.enumeration import PageType
+from museum_attendance_common.utils import get_logger
+from typing import Any, Tuple
+from museum_attendance_common.exceptions import DatabaseError
+
+logger = get_logger(__name__)
+
+class ImportCheckpointRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_by_import_log(self, import_log: ImportLog) -> list[ImportCheckpoint]:
+        try:
+            return self.session.query(ImportCheckpoint).filter(ImportCheckpoint.import_log_id == import_log.id).all()
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying checkpoints for import job {import_log.id}: {str(e)}")
+            raise DatabaseError(f"Failed to query import checkpoints: {str(e)}", entity_type="ImportCheckpoint", entity_id=str(import_log.id)) from e
+
+    def get_by_key(self, import_log: ImportLog, page_type: PageType, page_key: str) -> ImportCheckpoint | None:
+        try:
+            return (
+                self.session.query(ImportCheckpoint)
+                .filter(
+                    ImportCheckpoint.import_log_id == import_log.id,
+                    ImportCheckpoint.page_type == page_type.value,
+                    ImportCheckpoint.page_key == page_key
+                )
+                .first()
+            )
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying checkpoint {page_type.value} '{page_key}' for import job {import_log.id}: {str(e)}")
+            raise DatabaseError(f"Failed to query import checkpoint: {str(e)}", entity_type="ImportCheckpoint", entity_id=page_key) from e
+
+    def mark_completed(self, import_log: ImportLog, page_type: PageType, page_key: str, payload: Any = None) -> Tuple[ImportCheckpoint, bool, bool]:
+        """Records that a page of the import job has been completed."""
+        try:
+            checkpoint = self.get_by_key(import_log, page_type, page_key)
+            if checkpoint:
+                checkpoint.payload = payload
+                self.session.flush()
+                logger.debug(f"Updated checkpoint {page_type.value} '{page_key}' for import job {import_log.id}")
+                return checkpoint, False, True
+
+            checkpoint = ImportCheckpoint(import_log_id=import_log.id, page_type=page_type.value, page_key=page_key, payload=payload)
+            self.session.add(checkpoint)
+            self.session.flush()
+            logger.debug(f"Created checkpoint {page_type.value} '{page_key}' for import job {import_log.id}")
+            return checkpoint, True, False
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error persisting checkpoint {page_type.value} '{page_key}': {str(e)}")
+            raise DatabaseError(f"Failed to persist import checkpoint: {str(e)}", entity_type="ImportCheckpoint", entity_id=page_key, operation="mark_completed") from e
@@ -3,8 +3,10 @@ from sqlalchemy.exc import SQLAlchemyError
 from museum_attendance_common.model import ImportLog
 from museum_attendance_common.enumeration import ImportStatus
 from datetime import datetime, timezone
+from typing import Any
 from museum_attendance_common.utils import get_logger
 from museum_attendance_common.exceptions import DatabaseError
+from .statements import select_latest_resumable_import_log, lock_import_log
 
 logger = get_logger(__name__)
 
@@ -12,7 +14,7 @@ class ImportLogRepository:
     def __init__(self, session: Session):
         self.session = session
 
-    def start_job(self, status: ImportStatus, result: dict[str, int | str] | None = None) -> ImportLog:
+    def start_job(self, status: ImportStatus, result: dict[str, Any] | None = None) -> ImportLog:
         try:
             import_log = ImportLog(
                 status=status.value,
@@ -26,7 +28,7 @@ class ImportLogRepository:
             logger.error(f"Error starting import job: {str(e)}")
             raise DatabaseError(f"Failed to start import job: {str(e)}", entity_type="ImportLog", operation="start_job") from e
     
-    def end_job_with_failure(self, import_log: ImportLog, result: dict[str, int | str] | None = None) -> ImportLog:
+    def end_job_with_failure(self, import_log: ImportLog, result: dict[str, Any] | None = None) -> ImportLog:
         try:
             import_log.status = ImportStatus.FAILED.value
             import_log.result = result
@@ -38,7 +40,7 @@ class ImportLogRepository:
             logger.error(f"Error ending import job with failure: {str(e)}")
             raise DatabaseError(f"Failed to end import job: {str(e)}", entity_type="ImportLog", operation="end_job_with_failure") from e
     
-    def end_job_with_success(self, import_log: ImportLog, result: dict[str, int | str] | None = None) -> ImportLog:
+    def end_job_with_success(self, import_log: ImportLog, result: dict[str, Any] | None = None) -> ImportLog:
         try:
             import_log.status = ImportStatus.SUCCESS.value
             import_log.result = result
@@ -48,4 +50,49 @@ class ImportLogRepository:
             return import_log
         except SQLAlchemyError as e:
             logger.error(f"Error ending import job with success: {str(e)}")
-            raise DatabaseError(f"Failed to end import job: {str(e)}", entity_type="ImportLog", operation="end_job_with_success") from e
\ No newline at end of file
+            raise DatabaseError(f"Failed to end import job: {str(e)}", entity_type="ImportLog", operation="end_job_with_success") from e
+
+    def end_job_with_partial_success(self, import_log: ImportLog, result: dict[str, Any] | None = None) -> ImportLog:
+        """Ends an import job that ran out of time after persisting part of the data."""
+        try:
+            import_log.status = ImportStatus.PARTIAL.value
+            import_log.result = result
+            import_log.completed_at = datetime.now(timezone.utc)
+            self.session.flush()
+            logger.info(f"Import job {import_log.id} ended with partial success")
+            return import_log
+        except SQLAlchemyError as e:
+            logger.error(f"Error ending import job with partial success: {str(e)}")
+            raise DatabaseError(f"Failed to end import job: {str(e)}", entity_type="ImportLog", operation="end_job_with_partial_success") from e
+
+    def get_latest_resumable(self) -> ImportLog | None:
+        """Returns the most recent import job that did not complete all its pages."""
+        try:
+            return self.session.scalar(select_latest_resumable_import_log())
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying resumable import job: {str(e)}")
+            raise DatabaseError(f"Failed to query resumable import job: {str(e)}", entity_type="ImportLog", operation="get_latest_resumable") from e
+
+    def resume_job(self, import_log: ImportLog, result: dict[str, Any] | None = None) -> ImportLog:
+        try:
+            import_log.status = ImportStatus.IN_PROGRESS.value
+            import_log.result = result
+            import_log.completed_at = None
+            self.session.flush()
+            logger.info(f"Resumed import job {import_log.id}")
+            return import_log
+        except SQLAlchemyError as e:
+            logger.error(f"Error resuming import job: {str(e)}")
+            raise DatabaseError(f"Failed to resume import job: {str(e)}", entity_type="ImportLog", operation="resume_job") from e
+
+    def lock(self, import_log: ImportLog) -> ImportLog:
+        """Locks the import job row until the end of the transaction and reloads its status.
+
+        Used by the fetcher replicas so only one of them completes a distributed import job. The
+        lock does not block the foreign keys of rows still referencing the job.
+        """
+        try:
+            return self.session.execute(lock_import_log(import_log.id)).scalar_one()
+        except SQLAlchemyError as e:
+            logger.error(f"Error locking import job {import_log.id}: {str(e)}")
+            raise DatabaseError(f"Failed to lock import job: {str(e)}", entity_type="ImportLog", entity_id=str(import_log.id), operation="lock") from e
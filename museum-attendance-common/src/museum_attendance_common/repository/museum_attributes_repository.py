@@ -1,9 +1,12 @@
+from sqlalchemy.engine import CursorResult
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.exc import SQLAlchemyError
 from museum_attendance_common.model import MuseumAttributes, Museum
-from typing import Tuple
-from museum_attendance_common.utils import get_logger
+from typing import Any, Tuple, cast
+from museum_attendance_common.utils import get_logger, measured
 from museum_attendance_common.exceptions import DatabaseError
+from .statements import select_museum_attribute, delete_stale_museum_attributes, upsert_museum_attributes, sync_museum_attributes, set_museum_attribute
 
 logger = get_logger(__name__)
 
@@ -13,24 +16,22 @@ class MuseumAttributesRepository:
 
     def get_by_museum_and_key(self, museum: Museum, attribute_key: str) -> MuseumAttributes | None:
         try:
-            return (
-                self.session.query(MuseumAttributes)
-                .filter(
-                    MuseumAttributes.museum_id == museum.id,
-                    MuseumAttributes.attribute_key == attribute_key
-                )
-                .first()
-            )
+            return self.session.scalar(select_museum_attribute(museum.id, attribute_key))
         except SQLAlchemyError as e:
             logger.error(f"Error querying museum attribute '{attribute_key}' for museum {museum.id}: {str(e)}")
             raise DatabaseError(f"Failed to query museum attribute: {str(e)}", entity_type="MuseumAttributes") from e
 
+    @measured("repository.museum_attributes.persist")
     def persist(self, museum: Museum, attribute_key: str, attribute_value: str) -> Tuple[MuseumAttributes, bool, bool]:
         try:
             museum_attribute = self.get_by_museum_and_key(museum, attribute_key)
+            if museum_attribute and museum_attribute.attribute_value == attribute_value:
+                logger.debug(f"Attribute '{attribute_key}' of museum {museum.id} is unchanged")
+                return museum_attribute, False, False
             if museum_attribute:
                 museum_attribute.attribute_value = attribute_value
                 self.session.flush()
+                self.__set_museum_attribute(museum, attribute_key, attribute_value)
                 logger.debug(f"Updated attribute '{attribute_key}' for museum {museum.id}")
                 return museum_attribute, False, True
             
@@ -41,9 +42,62 @@ class MuseumAttributesRepository:
             )
             self.session.add(museum_attribute)
             self.session.flush()
+            self.__set_museum_attribute(museum, attribute_key, attribute_value)
             logger.debug(f"Created attribute '{attribute_key}' for museum {museum.id}")
             return museum_attribute, True, False
             
         except SQLAlchemyError as e:
             logger.error(f"Error persisting museum attribute '{attribute_key}': {str(e)}")
-            raise DatabaseError(f"Failed to persist museum attribute: {str(e)}", entity_type="MuseumAttributes", operation="persist") from e
\ No newline at end of file
+            raise DatabaseError(f"Failed to persist museum attribute: {str(e)}", entity_type="MuseumAttributes", operation="persist") from e
+
+    @measured("repository.museum_attributes.persist_many")
+    def persist_many(self, attributes: list[Tuple[Museum, dict[str, str]]]) -> Tuple[int, int, int]:
+        """Replaces the attributes of a batch of museums with two set-based statements.
+
+        Attributes of these museums missing from their new set are deleted, then all attributes are
+        upserted with a single INSERT ... ON CONFLICT (museum_id, attribute_key) DO UPDATE. Both run
+        in the current transaction, so readers never see a museum with half of its attributes.
+
+        Args:
+            attributes: Each museum with its complete set of attributes
+
+        Returns:
+            Tuple[int, int, int]: Inserted, updated and deleted attribute counts, unchanged attributes are not counted
+        """
+        # A museum listed twice in the batch keeps its last set of attributes
+        attributes_by_museum = {museum.id: museum_attributes for museum, museum_attributes in attributes}
+        if not attributes_by_museum:
+            return 0, 0, 0
+        rows = [
+            {"museum_id": museum_id, "attribute_key": attribute_key, "attribute_value": attribute_value}
+            for museum_id, museum_attributes in attributes_by_museum.items()
+            for attribute_key, attribute_value in museum_attributes.items()
+        ]
+
+        try:
+            deleted = cast(CursorResult[Any], self.session.execute(delete_stale_museum_attributes(list(attributes_by_museum), rows)))
+            deleted_count = deleted.rowcount
+
+            inserted_count = 0
+            updated_count = 0
+            if rows:
+                for inserted in self.session.execute(upsert_museum_attributes(rows)).scalars():
+                    if inserted:
+                        inserted_count += 1
+                    else:
+                        updated_count += 1
+
+            self.session.execute(sync_museum_attributes(list(attributes_by_museum)))
+            for museum, _ in attributes:
+                set_committed_value(museum, "attributes", dict(attributes_by_museum[museum.id]))
+
+            logger.debug(f"Attributes of {len(attributes_by_museum)} museums persisted: {inserted_count} inserted, {updated_count} updated, {deleted_count} deleted")
+            return inserted_count, updated_count, deleted_count
+        except SQLAlchemyError as e:
+            logger.error(f"Error persisting attributes of {len(attributes_by_museum)} museums: {str(e)}")
+            raise DatabaseError(f"Failed to persist museum attributes: {str(e)}", entity_type="MuseumAttributes", operation="persist_many") from e
+
+    def __set_museum_attribute(self, museum: Museum, attribute_key: str, attribute_value: str) -> None:
+        """Sets one key of museum.attributes in the database and on the loaded museum."""
+        attributes = self.session.execute(set_museum_attribute(museum.id, attribute_key, attribute_value)).scalar_one()
+        set_committed_value(museum, "attributes", attributes)
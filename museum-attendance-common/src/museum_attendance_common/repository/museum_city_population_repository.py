@@ -0,0 +1,120 @@
+from sqlalchemy import Integer, String, column, select, table, text
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from museum_attendance_common.utils import get_logger, measured
+from typing import TYPE_CHECKING, Any, Sequence, Tuple
+from museum_attendance_common.exceptions import DatabaseError
+
+if TYPE_CHECKING:
+    import numpy
+    import pyarrow
+
+logger = get_logger(__name__)
+
+# Materialized view created by the V0_7 migration, it is not part of the ORM metadata so create_all never makes it a table
+museum_city_population = table(
+    "museum_city_population",
+    column("museum_id", Integer),
+    column("museum_name", String),
+    column("visitor_count", Integer),
+    column("city_name", String),
+    column("city_population", Integer),
+    column("country_name", String),
+)
+
+# Every column of the view but museum_id, in the order get_all returns them
+COLUMNS = ("museum_name", "visitor_count", "city_name", "city_population", "country_name")
+
+class MuseumCityPopulationRepository:
+    """Reads the museum_city_population materialized view, museums with a visitor count and the population of their city."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    @measured("repository.museum_city_population.refresh")
+    def refresh(self, concurrently: bool = True) -> None:
+        """Recomputes the view from the current museums, cities and countries.
+
+        Args:
+            concurrently: Keep the view readable during the refresh, the view must have been populated before
+        """
+        try:
+            self.session.execute(text(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}museum_city_population"))
+            logger.debug("Refreshed museum_city_population")
+        except SQLAlchemyError as e:
+            logger.error(f"Error refreshing museum_city_population: {str(e)}")
+            raise DatabaseError(f"Failed to refresh museum city population: {str(e)}", entity_type="MuseumCityPopulation", operation="refresh") from e
+
+    def get_all(self) -> list[Tuple[str, int, str, int, str]]:
+        """Returns (museum name, visitor count, city name, city population, country name) rows, no column is null."""
+        try:
+            rows = self.session.execute(
+                select(
+                    museum_city_population.c.museum_name,
+                    museum_city_population.c.visitor_count,
+                    museum_city_population.c.city_name,
+                    museum_city_population.c.city_population,
+                    museum_city_population.c.country_name,
+                ).order_by(museum_city_population.c.museum_id)
+            )
+            return [(museum_name, visitor_count, city_name, city_population, country_name) for museum_name, visitor_count, city_name, city_population, country_name in rows]
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying museum_city_population: {str(e)}")
+            raise DatabaseError(f"Failed to query museum city population: {str(e)}", entity_type="MuseumCityPopulation") from e
+
+    def get_columns(self, columns: Sequence[str] = COLUMNS) -> list[Tuple[Any, ...]]:
+        """Returns rows holding only the given columns of the view, in that order, ordered by museum.
+
+        Only the selected columns are transferred and the rows are plain tuples, no ORM object is built.
+
+        Raises:
+            ValueError: A column is not one of COLUMNS
+        """
+        unknown = [name for name in columns if name not in COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown museum_city_population columns: {', '.join(unknown)}")
+        try:
+            rows = self.session.execute(
+                select(*(museum_city_population.c[name] for name in columns)).order_by(museum_city_population.c.museum_id)
+            )
+            return [tuple(row) for row in rows]
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying museum_city_population: {str(e)}")
+            raise DatabaseError(f"Failed to query museum city population: {str(e)}", entity_type="MuseumCityPopulation", operation="get_columns") from e
+
+    def get_arrays(self, columns: Sequence[str] = COLUMNS) -> dict[str, "numpy.ndarray"]:
+        """Returns one NumPy array per column, int64 for the counts and object for the names.
+
+        Needs numpy, installed with the analytics extra. The result builds a DataFrame as is.
+        """
+        try:
+            import numpy
+        except ModuleNotFoundError as e:
+            raise ModuleNotFoundError("get_arrays needs numpy, install museum-attendance-common[analytics]") from e
+
+        values = self.__transpose(columns)
+        return {
+            name: numpy.array(column, dtype=object if isinstance(museum_city_population.c[name].type, String) else numpy.int64)
+            for name, column in zip(columns, values)
+        }
+
+    def get_arrow(self, columns: Sequence[str] = COLUMNS) -> "pyarrow.Table":
+        """Returns the columns as an Arrow table, int64 for the counts and string for the names.
+
+        Needs pyarrow, installed with the analytics extra.
+        """
+        try:
+            import pyarrow
+        except ModuleNotFoundError as e:
+            raise ModuleNotFoundError("get_arrow needs pyarrow, install museum-attendance-common[analytics]") from e
+
+        values = self.__transpose(columns)
+        return pyarrow.table({
+            name: pyarrow.array(column, type=pyarrow.string() if isinstance(museum_city_population.c[name].type, String) else pyarrow.int64())
+            for name, column in zip(columns, values)
+        })
+
+    def __transpose(self, columns: Sequence[str]) -> list[Tuple[Any, ...]]:
+        """Values of each of the given columns, in the order of the rows."""
+        rows = self.get_columns(columns)
+        return list(zip(*rows)) if rows else [() for _ in columns]
@@ -1,9 +1,10 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from museum_attendance_common.model import Museum, City
-from museum_attendance_common.utils import get_logger
-from typing import Tuple
+from museum_attendance_common.utils import get_logger, measured
+from typing import Any, Iterator, Tuple
 from museum_attendance_common.exceptions import DatabaseError
+from .statements import select_museum_by_name, select_museums_by_names, upsert_museums, select_museums, stream_museums, select_museums_by_attributes, select_museums_by_attribute_key
 
 logger = get_logger(__name__)
 
@@ -13,15 +14,19 @@ class MuseumRepository:
 
     def get_by_name(self, name: str) -> Museum | None:
         try:
-            return self.session.query(Museum).filter(Museum.name == name).first()
+            return self.session.scalar(select_museum_by_name(name))
         except SQLAlchemyError as e:
             logger.error(f"Error querying museum '{name}': {str(e)}")
             raise DatabaseError(f"Failed to query museum: {str(e)}", entity_type="Museum", entity_id=name) from e
 
+    @measured("repository.museum.persist")
     def persist(self, name: str, number_of_visitors: int, reference_url: str, city: City) -> Tuple[Museum, bool, bool]:
         try:
             museum = self.get_by_name(name)
             if museum:
+                if museum.number_of_visitors == number_of_visitors:
+                    logger.debug(f"Museum '{name}' is unchanged")
+                    return museum, False, False
                 museum.number_of_visitors = number_of_visitors
                 self.session.flush()
                 logger.debug(f"Updated museum: {name}")
@@ -37,12 +42,78 @@ class MuseumRepository:
             logger.error(f"Error persisting museum '{name}': {str(e)}")
             raise DatabaseError(f"Failed to persist museum: {str(e)}", entity_type="Museum", entity_id=name, operation="persist") from e
         
+    @measured("repository.museum.persist_many")
+    def persist_many(self, museums: list[dict[str, Any]]) -> list[Tuple[Museum, bool, bool]]:
+        """Upserts a batch of museums with a single INSERT ... ON CONFLICT (name) DO UPDATE.
+
+        Args:
+            museums: Museums as the keyword arguments of `persist` (name, number_of_visitors, reference_url, city)
+
+        Returns:
+            list: (museum, inserted, updated) per distinct name, in the order of the batch. As with
+            `persist`, an existing museum only gets its number of visitors updated, and only when it
+            changed: unchanged museums are not written and are reported as neither inserted nor updated.
+        """
+        # A name can only be upserted once per statement, the last occurrence in the batch wins
+        rows = {
+            museum["name"]: {
+                "name": museum["name"],
+                "number_of_visitors": museum["number_of_visitors"],
+                "reference_url": museum["reference_url"],
+                "city_id": museum["city"].id,
+            }
+            for museum in museums
+        }
+        if not rows:
+            return []
+
+        try:
+            result = self.session.execute(upsert_museums(list(rows.values())))
+            persisted = {museum.name: (museum, bool(inserted), not inserted) for museum, inserted in result.all()}
+            # Unchanged museums are skipped by the WHERE clause and not returned, they are loaded instead
+            unchanged_names = [name for name in rows if name not in persisted]
+            if unchanged_names:
+                for museum in self.session.scalars(select_museums_by_names(unchanged_names)):
+                    persisted[museum.name] = (museum, False, False)
+            logger.debug(f"Upserted {len(persisted) - len(unchanged_names)} museums, {len(unchanged_names)} unchanged")
+            return [persisted[name] for name in rows]
+        except SQLAlchemyError as e:
+            logger.error(f"Error persisting {len(rows)} museums: {str(e)}")
+            raise DatabaseError(f"Failed to persist museums: {str(e)}", entity_type="Museum", operation="persist_many") from e
+
     def get_museums(self, include_attributes: bool = False) -> list[Museum]:
         try:
-            query = self.session.query(Museum).options(joinedload(Museum.city))
-            if include_attributes:
-                query = query.options(joinedload(Museum.museum_attributes))
-            return query.all()
+            # Joined attributes repeat the museum row, unique() folds them back
+            return list(self.session.scalars(select_museums(include_attributes)).unique())
         except SQLAlchemyError as e:
             logger.error(f"Error querying museums: {str(e)}")
-            raise DatabaseError(f"Failed to query museums: {str(e)}", entity_type="Museum") from e
\ No newline at end of file
+            raise DatabaseError(f"Failed to query museums: {str(e)}", entity_type="Museum") from e
+
+    def stream_museums(self, include_attributes: bool = False, batch_size: int = 1000) -> Iterator[Museum]:
+        """Yields all museums with their city, fetched batch_size rows at a time from a server-side cursor.
+
+        Unlike get_museums, memory is bounded by a batch: the attributes of each batch are loaded by one
+        more SELECT ... WHERE museum_id IN (...) (selectinload) instead of repeating the museum row for
+        each of its attributes. The session must stay open, and not be committed, until the iteration ends.
+        """
+        try:
+            yield from self.session.scalars(stream_museums(include_attributes, batch_size))
+        except SQLAlchemyError as e:
+            logger.error(f"Error streaming museums: {str(e)}")
+            raise DatabaseError(f"Failed to stream museums: {str(e)}", entity_type="Museum", operation="stream_museums") from e
+
+    def get_by_attributes(self, attributes: dict[str, str]) -> list[Museum]:
+        """Museums having all the given attribute values, one containment (@>) query on the GIN index of museum.attributes."""
+        try:
+            return list(self.session.scalars(select_museums_by_attributes(attributes)))
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying museums with attributes {attributes}: {str(e)}")
+            raise DatabaseError(f"Failed to query museums by attributes: {str(e)}", entity_type="Museum", operation="get_by_attributes") from e
+
+    def get_by_attribute_key(self, attribute_key: str) -> list[Museum]:
+        """Museums having the attribute whatever its value, one key (?) query on the GIN index of museum.attributes."""
+        try:
+            return list(self.session.scalars(select_museums_by_attribute_key(attribute_key)))
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying museums with attribute '{attribute_key}': {str(e)}")
+            raise DatabaseError(f"Failed to query museums by attribute key: {str(e)}", entity_type="Museum", entity_id=attribute_key, operation="get_by_attribute_key") from e
@@ -0,0 +1,109 @@
+from sqlalchemy import ColumnElement, column, literal, select, table, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from museum_attendance_common.model import ImportLog, Museum, MuseumVisitorHistory
+from museum_attendance_common.utils import get_logger, measured
+from typing import Sequence, Tuple, cast
+from datetime import datetime
+from museum_attendance_common.exceptions import DatabaseError
+
+logger = get_logger(__name__)
+
+class MuseumVisitorHistoryRepository:
+    def __init__(self, session: Session):
+        self.session = session
+        self.__partitions: set[int] = set()
+
+    def create_partition(self, year: int) -> None:
+        """Creates the partition holding the visitor counts recorded in the given year, if it does not exist yet."""
+        if year in self.__partitions:
+            return
+        try:
+            self.session.execute(text(
+                f"CREATE TABLE IF NOT EXISTS museum_visitor_history_{year:d} PARTITION OF museum_visitor_history "
+                f"FOR VALUES FROM ('{year:d}-01-01') TO ('{year + 1:d}-01-01')"
+            ))
+            self.__partitions.add(year)
+        except SQLAlchemyError as e:
+            logger.error(f"Error creating the visitor history partition of {year}: {str(e)}")
+            raise DatabaseError(f"Failed to create visitor history partition: {str(e)}", entity_type="MuseumVisitorHistory", entity_id=str(year), operation="create_partition") from e
+
+    @measured("repository.museum_visitor_history.persist_many")
+    def persist_many(self, import_log: ImportLog, museum_names: Sequence[str]) -> int:
+        """Records the current visitor counts of the museums for the import job with a single INSERT ... SELECT.
+
+        The counts are recorded at the time the import job was triggered, so all the rows of an import
+        land in one partition and recording a museum again for the same import job does nothing.
+        Museums without a visitor count are left out.
+
+        Returns:
+            int: Number of visitor counts recorded
+        """
+        names = list(dict.fromkeys(museum_names))
+        if not names:
+            return 0
+        return self.__record(import_log, Museum.name.in_(names), f"{len(names)} museums", "persist_many")
+
+    @measured("repository.museum_visitor_history.persist_staged")
+    def persist_staged(self, import_log: ImportLog) -> int:
+        """Records the current visitor counts of the museums staged by StagingRepository, as persist_many.
+
+        The museums are selected from the staging table in the database, so the import does not have to
+        be held in memory until it is merged. Must run after the merge, in the same transaction.
+
+        Returns:
+            int: Number of visitor counts recorded
+        """
+        staging_museum = table("staging_museum", column("name"))
+        return self.__record(import_log, Museum.name.in_(select(staging_museum.c.name)), "the staged museums", "persist_staged")
+
+    def __record(self, import_log: ImportLog, museum_filter: ColumnElement[bool], description: str, operation: str) -> int:
+        try:
+            recorded_at = import_log.triggered_at
+            self.create_partition(recorded_at.year)
+            museums = select(
+                Museum.id, literal(import_log.id), Museum.number_of_visitors, literal(recorded_at)
+            ).where(museum_filter, Museum.number_of_visitors.is_not(None))
+            result = cast(CursorResult, self.session.execute(
+                insert(MuseumVisitorHistory)
+                .from_select(["museum_id", "import_log_id", "number_of_visitors", "recorded_at"], museums)
+                .on_conflict_do_nothing()
+            ))
+            logger.debug(f"Recorded the visitor counts of {result.rowcount} museums for import job {import_log.id}")
+            return result.rowcount
+        except SQLAlchemyError as e:
+            logger.error(f"Error recording the visitor counts of {description}: {str(e)}")
+            raise DatabaseError(f"Failed to persist visitor history: {str(e)}", entity_type="MuseumVisitorHistory", entity_id=str(import_log.id), operation=operation) from e
+
+    def get_visitors_over_time(self, museum_names: Sequence[str] | None = None, start: datetime | None = None, end: datetime | None = None) -> list[Tuple[str, datetime, int]]:
+        """Visitor counts of the museums over time, ordered by museum and time.
+
+        Bounding the time range only scans the partitions of its years, where the BRIN index on
+        recorded_at skips the blocks outside of it.
+
+        Args:
+            museum_names: Museums to return, all of them by default
+            start: Earliest time recorded, inclusive
+            end: Latest time recorded, exclusive
+
+        Returns:
+            list: (museum name, recorded at, number of visitors) rows
+        """
+        try:
+            query = (
+                select(Museum.name, MuseumVisitorHistory.recorded_at, MuseumVisitorHistory.number_of_visitors)
+                .join(Museum, Museum.id == MuseumVisitorHistory.museum_id)
+                .order_by(Museum.name, MuseumVisitorHistory.recorded_at)
+            )
+            if museum_names is not None:
+                query = query.where(Museum.name.in_(list(museum_names)))
+            if start is not None:
+                query = query.where(MuseumVisitorHistory.recorded_at >= start)
+            if end is not None:
+                query = query.where(MuseumVisitorHistory.recorded_at < end)
+            return [(name, recorded_at, number_of_visitors) for name, recorded_at, number_of_visitors in self.session.execute(query)]
+        except SQLAlchemyError as e:
+            logger.error(f"Error querying the visitor history: {str(e)}")
+            raise DatabaseError(f"Failed to query visitor history: {str(e)}", entity_type="MuseumVisitorHistory") from e
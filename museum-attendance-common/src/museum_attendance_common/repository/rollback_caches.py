@@ -0,0 +1,30 @@
+"""Caches of the repositories cleared when their session rolls back, shared by the sync and the async repositories."""
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction
+from typing import Protocol
+from weakref import WeakSet
+
+# Key in session.info of the repositories caching entities of the session
+ROLLBACK_CACHES_KEY = "rollback_caches"
+
+
+class CachingRepository(Protocol):
+    def clear_cache(self) -> None: ...
+
+
+def clear_on_rollback(session: Session, repository: CachingRepository) -> None:
+    """Clears the cache of the repository whenever the session rolls back.
+
+    A session gets a single listener however many repositories are created on it, and the repositories
+    are held weakly, so the ones created per partition or per task do not pile up for the session lifetime.
+    """
+    repositories: WeakSet[CachingRepository] | None = session.info.get(ROLLBACK_CACHES_KEY)
+    if repositories is None:
+        repositories = session.info[ROLLBACK_CACHES_KEY] = WeakSet()
+        event.listen(session, "after_soft_rollback", _clear_caches)
+    repositories.add(repository)
+
+
+def _clear_caches(session: Session, previous_transaction: SessionTransaction) -> None:
+    for repository in list(session.info.get(ROLLBACK_CACHES_KEY, ())):
+        repository.clear_cache()
@@ -0,0 +1,225 @@
+import io
+from sqlalchemy import text
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from museum_attendance_common.utils import get_logger, measured
+from typing import Any, Iterable, Sequence, cast
+from museum_attendance_common.exceptions import DatabaseError
+from .statements import sync_museum_attributes
+
+logger = get_logger(__name__)
+
+# Temporary tables live until the end of the transaction, the ordinal keeps the order rows were copied in
+CREATE_STAGING_TABLES = [
+    """
+    CREATE TEMPORARY TABLE staging_city (
+        ordinal BIGSERIAL,
+        name VARCHAR(100) NOT NULL,
+        population INT,
+        reference_url TEXT,
+        country_name VARCHAR(100) NOT NULL
+    ) ON COMMIT DROP
+    """,
+    """
+    CREATE TEMPORARY TABLE staging_museum (
+        ordinal BIGSERIAL,
+        name VARCHAR(150) NOT NULL,
+        number_of_visitors INT,
+        reference_url TEXT,
+        city_name VARCHAR(100) NOT NULL,
+        attributes_fetched BOOLEAN NOT NULL
+    ) ON COMMIT DROP
+    """,
+    """
+    CREATE TEMPORARY TABLE staging_museum_attributes (
+        ordinal BIGSERIAL,
+        museum_name VARCHAR(150) NOT NULL,
+        attribute_key VARCHAR(100) NOT NULL,
+        attribute_value TEXT
+    ) ON COMMIT DROP
+    """,
+]
+
+MERGE_COUNTRIES = """
+    INSERT INTO country (name)
+    SELECT DISTINCT country_name FROM staging_city
+    ON CONFLICT (name) DO NOTHING
+"""
+
+# The last staged row of an entity wins, as when the rows are persisted one after the other.
+# Rows whose values did not change are not written, so only real changes are counted as updates.
+# xmax is only set on a row version written by an update, so it tells inserts from updates.
+MERGE_CITIES = """
+    WITH upserted AS (
+        INSERT INTO city (name, population, reference_url, country_id)
+        SELECT DISTINCT ON (staging_city.name) staging_city.name, staging_city.population, staging_city.reference_url, country.id
+        FROM staging_city
+        JOIN country ON country.name = staging_city.country_name
+        ORDER BY staging_city.name, staging_city.ordinal DESC
+        ON CONFLICT (name) DO UPDATE
+        SET population = EXCLUDED.population, reference_url = EXCLUDED.reference_url, updated_at = now()
+        WHERE (city.population, city.reference_url) IS DISTINCT FROM (EXCLUDED.population, EXCLUDED.reference_url)
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted
+"""
+
+MERGE_MUSEUMS = """
+    WITH upserted AS (
+        INSERT INTO museum (name, number_of_visitors, reference_url, city_id)
+        SELECT DISTINCT ON (staging_museum.name) staging_museum.name, staging_museum.number_of_visitors, staging_museum.reference_url, city.id
+        FROM staging_museum
+        JOIN city ON city.name = staging_museum.city_name
+        ORDER BY staging_museum.name, staging_museum.ordinal DESC
+        ON CONFLICT (name) DO UPDATE
+        SET number_of_visitors = EXCLUDED.number_of_visitors, updated_at = now()
+        WHERE museum.number_of_visitors IS DISTINCT FROM EXCLUDED.number_of_visitors
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted
+"""
+
+# Only museums whose page was fetched lose the attributes that are gone from it
+DELETE_STALE_ATTRIBUTES = """
+    DELETE FROM museum_attributes
+    USING museum
+    WHERE museum_attributes.museum_id = museum.id
+    AND museum.name IN (SELECT name FROM staging_museum WHERE attributes_fetched)
+    AND NOT EXISTS (
+        SELECT 1 FROM staging_museum_attributes
+        WHERE staging_museum_attributes.museum_name = museum.name
+        AND staging_museum_attributes.attribute_key = museum_attributes.attribute_key
+    )
+"""
+
+MERGE_ATTRIBUTES = """
+    WITH upserted AS (
+        INSERT INTO museum_attributes (museum_id, attribute_key, attribute_value)
+        SELECT DISTINCT ON (museum.id, staging_museum_attributes.attribute_key) museum.id, staging_museum_attributes.attribute_key, staging_museum_attributes.attribute_value
+        FROM staging_museum_attributes
+        JOIN museum ON museum.name = staging_museum_attributes.museum_name
+        ORDER BY museum.id, staging_museum_attributes.attribute_key, staging_museum_attributes.ordinal DESC
+        ON CONFLICT (museum_id, attribute_key) DO UPDATE
+        SET attribute_value = EXCLUDED.attribute_value, updated_at = now()
+        WHERE museum_attributes.attribute_value IS DISTINCT FROM EXCLUDED.attribute_value
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted
+"""
+
+# Museums whose page was fetched, their museum.attributes is rebuilt from the merged attribute rows
+SELECT_FETCHED_MUSEUM_IDS = """
+    SELECT museum.id FROM museum JOIN staging_museum ON staging_museum.name = museum.name
+    WHERE staging_museum.attributes_fetched
+"""
+
+
+class StagingRepository:
+    """Loads a whole import into temporary staging tables with COPY and merges it with set-based statements.
+
+    Nothing is committed here: the staging tables are dropped at the end of the transaction, which
+    also completes the import job, so an import is either fully merged or not at all.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def create_tables(self) -> None:
+        try:
+            for statement in CREATE_STAGING_TABLES:
+                self.session.execute(text(statement))
+            logger.debug("Created staging tables")
+        except SQLAlchemyError as e:
+            logger.error(f"Error creating staging tables: {str(e)}")
+            raise DatabaseError(f"Failed to create staging tables: {str(e)}", entity_type="Staging", operation="create_tables") from e
+
+    def copy_cities(self, cities: Iterable[tuple[str, int | None, str | None, str]]) -> int:
+        """Stages (name, population, reference_url, country_name) rows."""
+        return self.__copy("staging_city", ["name", "population", "reference_url", "country_name"], cities)
+
+    def copy_museums(self, museums: Iterable[tuple[str, int | None, str | None, str, bool]]) -> int:
+        """Stages (name, number_of_visitors, reference_url, city_name, attributes_fetched) rows."""
+        return self.__copy("staging_museum", ["name", "number_of_visitors", "reference_url", "city_name", "attributes_fetched"], museums)
+
+    def copy_attributes(self, attributes: Iterable[tuple[str, str, str | None]]) -> int:
+        """Stages (museum_name, attribute_key, attribute_value) rows."""
+        return self.__copy("staging_museum_attributes", ["museum_name", "attribute_key", "attribute_value"], attributes)
+
+    @measured("repository.staging.merge")
+    def merge(self) -> dict[str, int]:
+        """Merges the staged rows into country, city, museum and museum_attributes, then syncs museum.attributes.
+
+        Returns:
+            dict[str, int]: Inserted, updated and deleted counts per entity, as stored in the import_log result
+        """
+        try:
+            # Temporary tables are not analyzed automatically, the planner needs their size for the joins
+            self.session.execute(text("ANALYZE staging_city, staging_museum, staging_museum_attributes"))
+            inserted_countries = cast(CursorResult[Any], self.session.execute(text(MERGE_COUNTRIES))).rowcount
+            inserted_cities, updated_cities = self.session.execute(text(MERGE_CITIES)).one()
+            inserted_museums, updated_museums = self.session.execute(text(MERGE_MUSEUMS)).one()
+            deleted_attributes = cast(CursorResult[Any], self.session.execute(text(DELETE_STALE_ATTRIBUTES))).rowcount
+            inserted_attributes, updated_attributes = self.session.execute(text(MERGE_ATTRIBUTES)).one()
+            fetched_museum_ids = list(self.session.execute(text(SELECT_FETCHED_MUSEUM_IDS)).scalars())
+            self.session.execute(sync_museum_attributes(fetched_museum_ids))
+            logger.debug(f"Merged staging tables: {inserted_museums} museums inserted, {updated_museums} updated")
+            return {
+                "inserted_countries": inserted_countries,
+                "updated_countries": 0,
+                "inserted_cities": inserted_cities,
+                "updated_cities": updated_cities,
+                "inserted_museums": inserted_museums,
+                "updated_museums": updated_museums,
+                "inserted_attributes": inserted_attributes,
+                "updated_attributes": updated_attributes,
+                "deleted_attributes": deleted_attributes,
+            }
+        except SQLAlchemyError as e:
+            logger.error(f"Error merging staging tables: {str(e)}")
+            raise DatabaseError(f"Failed to merge staging tables: {str(e)}", entity_type="Staging", operation="merge") from e
+
+    @measured("repository.staging.copy")
+    def __copy(self, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        buffer = io.StringIO()
+        row_count = 0
+        for row in rows:
+            buffer.write("\t".join(_copy_value(value) for value in row))
+            buffer.write("\n")
+            row_count += 1
+        if not row_count:
+            return 0
+        buffer.seek(0)
+
+        try:
+            statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+            cursor = self.session.connection().connection.cursor()
+            try:
+                if hasattr(cursor, "copy_expert"):
+                    cursor.copy_expert(statement, buffer)
+                else:
+                    # psycopg 3 streams COPY data through a copy object instead
+                    with cursor.copy(statement) as copy:
+                        copy.write(buffer.getvalue())
+            finally:
+                cursor.close()
+            logger.debug(f"Copied {row_count} rows into {table}")
+            return row_count
+        except Exception as e:
+            logger.error(f"Error copying rows into {table}: {str(e)}")
+            raise DatabaseError(f"Failed to copy rows into {table}: {str(e)}", entity_type="Staging", entity_id=table, operation="copy") from e
+
+
+def _copy_value(value: Any) -> str:
+    """Encodes a value in the text format of COPY."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
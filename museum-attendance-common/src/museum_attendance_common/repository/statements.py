@@ -0,0 +1,182 @@
+"""Statements of the repositories, built here once and executed by both the sync and the async repositories."""
+from sqlalchemy import Boolean, Delete, Integer, Select, String, any_, bindparam, delete, func, literal_column, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.sql.dml import ReturningInsert, ReturningUpdate
+from sqlalchemy.sql.elements import TextClause
+from museum_attendance_common.enumeration import ImportStatus
+from museum_attendance_common.model import City, Country, ImportLog, Museum, MuseumAttributes
+from typing import Any, Iterable, Tuple
+
+# museum.attributes is rebuilt from the attribute rows of the museums, and only written when it changed
+SYNC_MUSEUM_ATTRIBUTES = """
+    UPDATE museum SET attributes = synced.attributes, updated_at = now()
+    FROM (
+        SELECT museum.id, coalesce(
+            jsonb_object_agg(museum_attributes.attribute_key, museum_attributes.attribute_value) FILTER (WHERE museum_attributes.id IS NOT NULL),
+            '{}'
+        ) AS attributes
+        FROM museum
+        LEFT JOIN museum_attributes ON museum_attributes.museum_id = museum.id
+        WHERE museum.id = ANY(:museum_ids)
+        GROUP BY museum.id
+    ) AS synced
+    WHERE museum.id = synced.id AND museum.attributes IS DISTINCT FROM synced.attributes
+"""
+
+
+def select_country_by_name(name: str) -> Select[Tuple[Country]]:
+    return select(Country).where(Country.name == name).limit(1).execution_options(prepare=True)
+
+
+def select_countries_by_names(names: Iterable[str]) -> Select[Tuple[Country]]:
+    return select(Country).where(Country.name.in_(list(names)))
+
+
+def select_city_by_name(name: str) -> Select[Tuple[City]]:
+    return select(City).where(City.name == name).limit(1).execution_options(prepare=True)
+
+
+def select_cities_by_names(names: Iterable[str]) -> Select[Tuple[City]]:
+    return select(City).where(City.name.in_(list(names)))
+
+
+def select_museum_by_name(name: str) -> Select[Tuple[Museum]]:
+    return select(Museum).where(Museum.name == name).limit(1).execution_options(prepare=True)
+
+
+def select_museums_by_names(names: list[str]) -> Select[Tuple[Museum]]:
+    return select(Museum).where(Museum.name == any_(bindparam("names", names, type_=ARRAY(String)))).execution_options(prepare=True)
+
+
+def upsert_museums(rows: list[dict[str, Any]]) -> ReturningInsert[Tuple[Museum, bool]]:
+    """INSERT ... ON CONFLICT (name) DO UPDATE of the rows, returning each written museum and whether it was inserted.
+
+    Existing museums only get their number of visitors updated, and only when it changed: unchanged
+    museums are neither written nor returned. One array per column, so the statement text does not
+    depend on the number of rows and is prepared once.
+    """
+    batch = func.unnest(
+        bindparam("names", [row["name"] for row in rows], type_=ARRAY(String)),
+        bindparam("numbers_of_visitors", [row["number_of_visitors"] for row in rows], type_=ARRAY(Integer)),
+        bindparam("reference_urls", [row["reference_url"] for row in rows], type_=ARRAY(String)),
+        bindparam("city_ids", [row["city_id"] for row in rows], type_=ARRAY(Integer))
+    ).table_valued("name", "number_of_visitors", "reference_url", "city_id").render_derived(name="batch")
+    values = insert(Museum).from_select(["name", "number_of_visitors", "reference_url", "city_id"], select(batch))
+    upsert = values.on_conflict_do_update(
+        index_elements=[Museum.name],
+        set_={"number_of_visitors": values.excluded.number_of_visitors, "updated_at": func.now()},
+        where=Museum.number_of_visitors.is_distinct_from(values.excluded.number_of_visitors)
+    )
+    # xmax is only set on a row version written by an update, so it tells inserts from updates
+    return (
+        upsert.returning(Museum, literal_column("xmax = 0", Boolean).label("inserted"))
+        .execution_options(populate_existing=True, prepare=True)
+    )
+
+
+def select_museums(include_attributes: bool = False) -> Select[Tuple[Museum]]:
+    """All museums with their city joined, and their attributes when asked. Joined attributes repeat the museum row."""
+    query = select(Museum).options(joinedload(Museum.city))
+    if include_attributes:
+        query = query.options(joinedload(Museum.museum_attributes))
+    return query
+
+
+def stream_museums(include_attributes: bool, batch_size: int) -> Select[Tuple[Museum]]:
+    """All museums with their city, fetched batch_size rows at a time, the attributes of a batch by one more SELECT ... IN."""
+    query = select(Museum).options(joinedload(Museum.city)).execution_options(yield_per=batch_size)
+    if include_attributes:
+        query = query.options(selectinload(Museum.museum_attributes))
+    return query
+
+
+def select_museums_by_attributes(attributes: dict[str, str]) -> Select[Tuple[Museum]]:
+    return select(Museum).options(joinedload(Museum.city)).where(Museum.attributes.contains(attributes))
+
+
+def select_museums_by_attribute_key(attribute_key: str) -> Select[Tuple[Museum]]:
+    return select(Museum).options(joinedload(Museum.city)).where(Museum.attributes.has_key(attribute_key))
+
+
+def select_museum_attribute(museum_id: int, attribute_key: str) -> Select[Tuple[MuseumAttributes]]:
+    return (
+        select(MuseumAttributes)
+        .where(MuseumAttributes.museum_id == museum_id, MuseumAttributes.attribute_key == attribute_key)
+        .limit(1)
+        .execution_options(prepare=True)
+    )
+
+
+def museum_attribute_rows(rows: list[dict[str, Any]]) -> Any:
+    """(museum_id, attribute_key, attribute_value) rows as a derived table, one array per column."""
+    return func.unnest(
+        bindparam("attribute_museum_ids", [row["museum_id"] for row in rows], type_=ARRAY(Integer)),
+        bindparam("attribute_keys", [row["attribute_key"] for row in rows], type_=ARRAY(String)),
+        bindparam("attribute_values", [row["attribute_value"] for row in rows], type_=ARRAY(String))
+    ).table_valued("museum_id", "attribute_key", "attribute_value").render_derived(name="batch")
+
+
+def delete_stale_museum_attributes(museum_ids: list[int], rows: list[dict[str, Any]]) -> Delete:
+    """DELETE of the attributes of the museums missing from their new rows.
+
+    Not prepared from its first execution: a generic plan chosen while the table is still small keeps scanning it.
+    """
+    batch = museum_attribute_rows(rows)
+    return (
+        delete(MuseumAttributes)
+        .where(
+            MuseumAttributes.museum_id == any_(bindparam("museum_ids", museum_ids, type_=ARRAY(Integer))),
+            tuple_(MuseumAttributes.museum_id, MuseumAttributes.attribute_key).not_in(select(batch.c.museum_id, batch.c.attribute_key))
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def upsert_museum_attributes(rows: list[dict[str, Any]]) -> ReturningInsert[Tuple[bool]]:
+    """INSERT ... ON CONFLICT (museum_id, attribute_key) DO UPDATE of the rows, returning whether each written row was inserted."""
+    values = insert(MuseumAttributes).from_select(["museum_id", "attribute_key", "attribute_value"], select(museum_attribute_rows(rows)))
+    upsert = values.on_conflict_do_update(
+        index_elements=[MuseumAttributes.museum_id, MuseumAttributes.attribute_key],
+        set_={"attribute_value": values.excluded.attribute_value, "updated_at": func.now()},
+        # Unchanged attributes are not written (no dead tuple, same updated_at) nor returned
+        where=MuseumAttributes.attribute_value.is_distinct_from(values.excluded.attribute_value)
+    )
+    # xmax is only set on a row version written by an update, so it tells inserts from updates
+    return upsert.returning(literal_column("xmax = 0", Boolean)).execution_options(prepare=True)
+
+
+def sync_museum_attributes(museum_ids: list[int]) -> TextClause:
+    """SYNC_MUSEUM_ATTRIBUTES for the given museums, run by every repository writing attribute rows."""
+    return text(SYNC_MUSEUM_ATTRIBUTES).bindparams(bindparam("museum_ids", museum_ids, type_=ARRAY(Integer))).execution_options(prepare=True)
+
+
+def set_museum_attribute(museum_id: int, attribute_key: str, attribute_value: str) -> ReturningUpdate[Tuple[dict[str, Any]]]:
+    """Sets one key of museum.attributes, returning the new attributes."""
+    return (
+        update(Museum)
+        .where(Museum.id == museum_id)
+        .values(attributes=Museum.attributes.op("||")(func.jsonb_build_object(attribute_key, attribute_value)))
+        .returning(Museum.attributes)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def select_latest_resumable_import_log() -> Select[Tuple[ImportLog]]:
+    """The most recent import job that did not complete all its pages."""
+    return (
+        select(ImportLog)
+        .where(ImportLog.status.in_([ImportStatus.IN_PROGRESS.value, ImportStatus.FAILED.value, ImportStatus.PARTIAL.value]))
+        .order_by(ImportLog.triggered_at.desc(), ImportLog.id.desc())
+        .limit(1)
+    )
+
+
+def lock_import_log(import_log_id: int) -> Select[Tuple[ImportLog]]:
+    """The import job row locked until the end of the transaction (without blocking the foreign keys referencing it), reloaded."""
+    return (
+        select(ImportLog)
+        .where(ImportLog.id == import_log_id)
+        .with_for_update(key_share=True)
+        .execution_options(populate_existing=True)
+    )
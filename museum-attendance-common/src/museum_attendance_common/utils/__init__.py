@@ -1,6 +1,11 @@
 from .logging import get_logger, setup_logging
+from .stage_metrics import StageMetrics, StageSample, stage_metrics, measured
 
 __all__ = [
     "get_logger",
     "setup_logging",
-]
\ No newline at end of file
+    "StageMetrics",
+    "StageSample",
+    "stage_metrics",
+    "measured",
+]
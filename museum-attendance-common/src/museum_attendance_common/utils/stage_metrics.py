@@ -0,0 +1,106 @@
+"""Per-stage timing of an import run."""
+import inspect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Iterator, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class StageSample:
+    """A single measurement, the size can be set inside the measured block once it is known."""
+    size: int = 0
+
+
+class StageMetrics:
+    """Thread-safe collection of latency samples and byte counts per named stage."""
+
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__durations: dict[str, list[float]] = {}
+        self.__bytes: dict[str, int] = {}
+
+    def record(self, stage: str, seconds: float, size: int = 0) -> None:
+        with self.__lock:
+            self.__durations.setdefault(stage, []).append(seconds)
+            self.__bytes[stage] = self.__bytes.get(stage, 0) + size
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[StageSample]:
+        """Record the duration of the block, including when it raises.
+
+        Args:
+            stage: Name of the stage, e.g. "fetch.city_page"
+
+        Yields:
+            StageSample: Sample whose size (in bytes) is recorded with the duration
+        """
+        sample = StageSample()
+        start_time = time.perf_counter()
+        try:
+            yield sample
+        finally:
+            self.record(stage, time.perf_counter() - start_time, sample.size)
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__durations.clear()
+            self.__bytes.clear()
+
+    def report(self) -> dict[str, dict[str, Any]]:
+        """Aggregate the samples of each stage, durations are in seconds.
+
+        Returns:
+            dict: count, total, p50, p95, max and bytes per stage, ready to be stored as JSON
+        """
+        with self.__lock:
+            durations = {stage: sorted(samples) for stage, samples in self.__durations.items()}
+            sizes = dict(self.__bytes)
+
+        return {
+            stage: {
+                "count": len(samples),
+                "total": round(sum(samples), 6),
+                "p50": round(_percentile(samples, 50), 6),
+                "p95": round(_percentile(samples, 95), 6),
+                "max": round(samples[-1], 6),
+                "bytes": sizes.get(stage, 0),
+            }
+            for stage, samples in sorted(durations.items())
+        }
+
+
+def _percentile(sorted_samples: list[float], percentile: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    rank = max(math.ceil(percentile / 100 * len(sorted_samples)), 1)
+    return sorted_samples[rank - 1]
+
+
+# Process-wide registry, reset at the start of each import run
+stage_metrics = StageMetrics()
+
+
+def measured(stage: str) -> Callable[[F], F]:
+    """Decorator recording every call of the function as a sample of the stage.
+
+    Coroutine functions are measured until they complete, not until they return their coroutine.
+    """
+    def decorator(function: F) -> F:
+        if inspect.iscoroutinefunction(function):
+            @wraps(function)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with stage_metrics.measure(stage):
+                    return await function(*args, **kwargs)
+            return async_wrapper  # type: ignore[return-value]
+
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with stage_metrics.measure(stage):
+                return function(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
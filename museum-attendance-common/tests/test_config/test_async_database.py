@@ -0,0 +1,121 @@
+"""Tests for async database configuration."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+import museum_attendance_common.config.async_database as async_db_module
+from museum_attendance_common.config.async_database import get_async_engine, get_async_db_session, close_async_db
+from museum_attendance_common.exceptions import DatabaseError
+
+
+@pytest.fixture(autouse=True)
+def reset_async_engine():
+    """Start and end each test without a global async engine."""
+    async_db_module._async_engine = None
+    async_db_module._AsyncSessionLocal = None
+    yield
+    async_db_module._async_engine = None
+    async_db_module._AsyncSessionLocal = None
+
+
+def make_async_engine():
+    """Create a mock async engine whose connection check succeeds."""
+    engine = Mock()
+    connection = AsyncMock()
+    engine.connect.return_value = MagicMock(__aenter__=AsyncMock(return_value=connection), __aexit__=AsyncMock(return_value=False))
+    engine.dispose = AsyncMock()
+    return engine
+
+
+class TestGetAsyncEngine:
+    """Tests for get_async_engine function."""
+
+    @patch('museum_attendance_common.config.async_database.create_async_engine')
+    def test_get_async_engine_returns_cached_instance(self, mock_create_async_engine):
+        """Test that the async engine is created on asyncpg once and then reused."""
+        mock_create_async_engine.return_value = make_async_engine()
+
+        async def get_twice():
+            return await get_async_engine(), await get_async_engine()
+
+        first, second = asyncio.run(get_twice())
+
+        assert first is second
+        mock_create_async_engine.assert_called_once()
+        assert mock_create_async_engine.call_args.args[0].drivername == "postgresql+asyncpg"
+
+    @patch('museum_attendance_common.config.async_database.create_async_engine')
+    def test_get_async_engine_handles_connection_error(self, mock_create_async_engine):
+        """Test that a failed connection check raises DatabaseError and caches nothing."""
+        engine = make_async_engine()
+        engine.connect.return_value.__aenter__.side_effect = OperationalError("SELECT 1", {}, Exception("Connection refused"))
+        mock_create_async_engine.return_value = engine
+
+        with pytest.raises(DatabaseError, match="Cannot connect to database"):
+            asyncio.run(get_async_engine())
+        assert async_db_module._async_engine is None
+
+    @patch('museum_attendance_common.config.async_database.create_async_engine')
+    def test_get_async_engine_without_driver(self, mock_create_async_engine):
+        """Test that a missing asyncpg points at the async extra."""
+        mock_create_async_engine.side_effect = ModuleNotFoundError("No module named 'asyncpg'")
+
+        with pytest.raises(DatabaseError, match=r"museum-attendance-common\[async\]"):
+            asyncio.run(get_async_engine())
+
+
+class TestGetAsyncDbSession:
+    """Tests for get_async_db_session function."""
+
+    @staticmethod
+    def use_session(session, error=None):
+        """Run a block in get_async_db_session with the given session, raising error inside it."""
+        async def run():
+            with patch('museum_attendance_common.config.async_database.get_async_session_maker', AsyncMock(return_value=Mock(return_value=session))):
+                async with get_async_db_session() as yielded_session:
+                    assert yielded_session is session
+                    if error:
+                        raise error
+        asyncio.run(run())
+
+    def test_get_async_db_session_commits(self):
+        """Test that the session is committed and closed after the block."""
+        session = Mock(spec=AsyncSession)
+
+        self.use_session(session)
+
+        session.commit.assert_awaited_once()
+        session.rollback.assert_not_called()
+        session.close.assert_awaited_once()
+
+    def test_get_async_db_session_rolls_back_on_error(self):
+        """Test that an error in the block rolls back and is raised as DatabaseError."""
+        session = Mock(spec=AsyncSession)
+
+        with pytest.raises(DatabaseError, match="Unexpected database error"):
+            self.use_session(session, ValueError("Invalid museum"))
+
+        session.commit.assert_not_called()
+        session.rollback.assert_awaited_once()
+        session.close.assert_awaited_once()
+
+
+class TestCloseAsyncDb:
+    """Tests for close_async_db function."""
+
+    def test_close_async_db_disposes_engine(self):
+        """Test that the async engine is disposed and forgotten."""
+        engine = make_async_engine()
+        async_db_module._async_engine = engine
+
+        asyncio.run(close_async_db())
+
+        engine.dispose.assert_awaited_once()
+        assert async_db_module._async_engine is None
+
+    def test_close_async_db_handles_none_engine(self):
+        """Test that closing without an engine does nothing."""
+        asyncio.run(close_async_db())
+
+        assert async_db_module._async_engine is None
@@ -2,6 +2,7 @@
 import os
 from pathlib import Path
 from museum_attendance_common.config.settings import Settings
+from museum_attendance_common.enumeration import DatabaseDriver, PersistenceMode
 
 
 class TestSettings:
@@ -24,9 +25,24 @@ class TestSettings:
         assert settings.db_pool_timeout == 30
         assert settings.db_pool_recycle == 3600
         assert settings.keep_html_files is False
+        assert settings.low_memory_mode is False
+        assert settings.master_page_titles == ["List_of_most_visited_museums"]
         assert settings.rate_limit_calls == 2
         assert settings.rate_limit_period == 1
         assert settings.max_workers == 5
+        assert settings.concurrency_floor == 1
+        assert settings.concurrency_ceiling == 10
+        assert settings.concurrency_target_latency == 2.0
+        assert settings.run_deadline_seconds == 0
+        assert settings.collection_queue_size == 10
+        assert settings.persist_batch_size == 50
+        assert settings.persist_flush_size == 50
+        assert settings.persistence_mode == PersistenceMode.BATCH
+        assert settings.crawl_claim_batch_size == 5
+        assert settings.crawl_task_lease_seconds == 300
+        assert settings.crawl_task_max_attempts == 3
+        assert settings.crawl_poll_interval == 1.0
+        assert settings.crawl_worker_wait_timeout == 60
         assert settings.log_level == "INFO"
 
     def test_settings_custom_values(self):
@@ -80,6 +96,34 @@ class TestSettings:
         assert "5432" in url
         assert "test_db" in url
 
+    def test_database_url_with_psycopg_driver(self):
+        """Test that the PSYCOPG driver selects psycopg 3."""
+        settings = Settings(db_driver="PSYCOPG")
+
+        assert settings.db_driver == DatabaseDriver.PSYCOPG
+        assert settings.database_url.drivername == "postgresql+psycopg"
+
+    def test_async_database_url_property(self):
+        """Test that async_database_url points at the same database through asyncpg."""
+        settings = Settings(db_user="test_user", db_password="test_pass", db_host="test_host", db_port=5432, db_name="test_db")
+
+        url = settings.async_database_url
+        assert url.drivername == "postgresql+asyncpg"
+        assert url.set(drivername="postgresql+psycopg2") == settings.database_url
+
+    def test_read_database_url_property(self):
+        """Test that read_database_url points at the same database on the replica host."""
+        settings = Settings(db_user="test_user", db_password="test_pass", db_host="primary", db_port=5432, db_name="test_db", db_read_host="replica")
+
+        url = settings.read_database_url
+        assert (url.host, url.port) == ("replica", 5432)
+        assert url.set(host="primary") == settings.database_url
+
+    def test_read_database_url_without_replica(self):
+        """Test that no replica is configured by default, nor by an empty host."""
+        assert Settings().read_database_url is None
+        assert Settings(db_read_host="").read_database_url is None
+
     def test_wikipedia_credentials(self):
         """Test Wikipedia API credentials."""
         settings = Settings(
@@ -98,3 +142,11 @@ class TestSettings:
         
         assert settings.wikipedia_client_id == ""
         assert settings.wikipedia_client_secret == ""
+
+    def test_master_page_titles_from_environment(self, monkeypatch):
+        """Test that several list pages can be configured as a JSON list."""
+        monkeypatch.setenv("MASTER_PAGE_TITLES", '["List_of_most_visited_museums", "List_of_most_visited_art_museums"]')
+
+        settings = Settings()
+
+        assert settings.master_page_titles == ["List_of_most_visited_museums", "List_of_most_visited_art_museums"]
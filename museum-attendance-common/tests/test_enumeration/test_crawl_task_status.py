@@ -0,0 +1,17 @@
+"""Tests for CrawlTaskStatus enumeration."""
+from museum_attendance_common.enumeration import CrawlTaskStatus
+
+
+class TestCrawlTaskStatus:
+    """Tests for CrawlTaskStatus enum."""
+
+    def test_enum_values(self):
+        """Test that enum has correct values."""
+        assert CrawlTaskStatus.PENDING.value == "PENDING"
+        assert CrawlTaskStatus.CLAIMED.value == "CLAIMED"
+        assert CrawlTaskStatus.DONE.value == "DONE"
+        assert CrawlTaskStatus.FAILED.value == "FAILED"
+
+    def test_enum_from_value(self):
+        """Test creating enum from value."""
+        assert CrawlTaskStatus("CLAIMED") == CrawlTaskStatus.CLAIMED
@@ -0,0 +1,15 @@
+"""Tests for DatabaseDriver enumeration."""
+from museum_attendance_common.enumeration import DatabaseDriver
+
+
+class TestDatabaseDriver:
+    """Tests for DatabaseDriver enum."""
+
+    def test_enum_values(self):
+        """Test that enum has correct values."""
+        assert DatabaseDriver.PSYCOPG2.value == "PSYCOPG2"
+        assert DatabaseDriver.PSYCOPG.value == "PSYCOPG"
+
+    def test_enum_from_value(self):
+        """Test creating enum from value."""
+        assert DatabaseDriver("PSYCOPG") == DatabaseDriver.PSYCOPG
@@ -10,6 +10,7 @@ class TestImportStatus:
         assert ImportStatus.IN_PROGRESS.value == "IN_PROGRESS"
         assert ImportStatus.FAILED.value == "FAILED"
         assert ImportStatus.SUCCESS.value == "SUCCESS"
+        assert ImportStatus.PARTIAL.value == "PARTIAL"
 
     def test_enum_members(self):
         """Test that enum has correct members."""
@@ -17,7 +18,8 @@ class TestImportStatus:
         assert "IN_PROGRESS" in members
         assert "FAILED" in members
         assert "SUCCESS" in members
-        assert len(members) == 3
+        assert "PARTIAL" in members
+        assert len(members) == 4
 
     def test_enum_comparison(self):
         """Test enum member comparison."""
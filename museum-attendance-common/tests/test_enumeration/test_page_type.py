@@ -0,0 +1,16 @@
+"""Tests for PageType enumeration."""
+from museum_attendance_common.enumeration import PageType
+
+
+class TestPageType:
+    """Tests for PageType enum."""
+
+    def test_enum_values(self):
+        """Test that enum has correct values."""
+        assert PageType.LIST.value == "LIST"
+        assert PageType.MUSEUM.value == "MUSEUM"
+        assert PageType.CITY.value == "CITY"
+
+    def test_enum_from_value(self):
+        """Test creating enum from value."""
+        assert PageType("CITY") == PageType.CITY
@@ -0,0 +1,15 @@
+"""Tests for PersistenceMode enumeration."""
+from museum_attendance_common.enumeration import PersistenceMode
+
+
+class TestPersistenceMode:
+    """Tests for PersistenceMode enum."""
+
+    def test_enum_values(self):
+        """Test that enum has correct values."""
+        assert PersistenceMode.BATCH.value == "BATCH"
+        assert PersistenceMode.COPY.value == "COPY"
+
+    def test_enum_from_value(self):
+        """Test creating enum from value."""
+        assert PersistenceMode("COPY") == PersistenceMode.COPY
@@ -0,0 +1,44 @@
+"""Tests for CrawlTask model."""
+from museum_attendance_common.model import CrawlTask
+from museum_attendance_common.enumeration import CrawlTaskStatus, PageType
+
+
+class TestCrawlTask:
+    """Tests for CrawlTask model."""
+
+    def test_create_crawl_task(self):
+        """Test creating a CrawlTask."""
+        task = CrawlTask(
+            import_log_id=1,
+            page_type=PageType.MUSEUM.value,
+            page_key="Louvre",
+            payload={"name": "Louvre"},
+            status=CrawlTaskStatus.PENDING.value
+        )
+
+        assert task.import_log_id == 1
+        assert task.page_type == "MUSEUM"
+        assert task.page_key == "Louvre"
+        assert task.payload == {"name": "Louvre"}
+        assert task.status == "PENDING"
+        assert task.claimed_by is None
+        assert task.result is None
+
+    def test_crawl_task_table_constraints(self):
+        """Test that a page is queued once per import job and the claim query is indexed."""
+        constraint_columns = [
+            [column.name for column in constraint.columns]
+            for constraint in CrawlTask.__table__.constraints
+            if constraint.__class__.__name__ == "UniqueConstraint"
+        ]
+        index_columns = [[column.name for column in index.columns] for index in CrawlTask.__table__.indexes]
+
+        assert ["import_log_id", "page_type", "page_key"] in constraint_columns
+        assert ["import_log_id", "status"] in index_columns
+
+    def test_crawl_task_repr(self):
+        """Test CrawlTask string representation."""
+        task = CrawlTask(import_log_id=1, page_type=PageType.CITY.value, page_key="Paris", status=CrawlTaskStatus.CLAIMED.value)
+        task.id = 4
+
+        assert repr(task) == "<CrawlTask(id=4, import_log_id=1, page_type='CITY', page_key='Paris', status='CLAIMED')>"
@@ -0,0 +1,34 @@
+"""Tests for ImportCheckpoint model."""
+from museum_attendance_common.model import ImportCheckpoint
+from museum_attendance_common.enumeration import PageType
+
+
+class TestImportCheckpoint:
+    """Tests for ImportCheckpoint model."""
+
+    def test_create_import_checkpoint(self):
+        """Test creating an ImportCheckpoint."""
+        checkpoint = ImportCheckpoint(
+            import_log_id=1,
+            page_type=PageType.CITY.value,
+            page_key="Paris",
+            payload={"name": "Paris", "country": "France", "population": 2_165_000}
+        )
+
+        assert checkpoint.import_log_id == 1
+        assert checkpoint.page_type == "CITY"
+        assert checkpoint.page_key == "Paris"
+        assert checkpoint.payload["population"] == 2_165_000
+
+    def test_import_checkpoint_payload_can_be_none(self):
+        """Test that payload can be None."""
+        checkpoint = ImportCheckpoint(import_log_id=1, page_type=PageType.MUSEUM.value, page_key="Louvre")
+
+        assert checkpoint.payload is None
+
+    def test_import_checkpoint_repr(self):
+        """Test ImportCheckpoint string representation."""
+        checkpoint = ImportCheckpoint(import_log_id=1, page_type=PageType.LIST.value, page_key="List_of_most_visited_museums")
+        checkpoint.id = 3
+
+        assert repr(checkpoint) == "<ImportCheckpoint(id=3, import_log_id=1, page_type='LIST', page_key='List_of_most_visited_museums')>"
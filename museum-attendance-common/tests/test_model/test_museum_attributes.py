@@ -58,3 +58,13 @@ class TestMuseumAttributes:
         assert "founded" in keys
         assert "area" in keys
         assert "collection_size" in keys
+
+    def test_museum_attributes_unique_per_museum_and_key(self):
+        """Test that the model declares the unique constraint the bulk upsert conflicts on."""
+        constraint_columns = [
+            [column.name for column in constraint.columns]
+            for constraint in MuseumAttributes.__table__.constraints
+            if constraint.__class__.__name__ == "UniqueConstraint"
+        ]
+
+        assert ["museum_id", "attribute_key"] in constraint_columns
@@ -0,0 +1,86 @@
+"""Tests for AsyncCityRepository."""
+import asyncio
+import pytest
+from unittest.mock import Mock
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from museum_attendance_common.repository import AsyncCityRepository
+from museum_attendance_common.model import City, Country
+from museum_attendance_common.exceptions import DatabaseError
+
+
+class TestAsyncCityRepository:
+    """Tests for AsyncCityRepository."""
+
+    @pytest.fixture
+    def mock_session(self):
+        """Create a mock async database session."""
+        session = Mock(spec=AsyncSession)
+        session.sync_session = Mock(spec=Session)
+        return session
+
+    @pytest.fixture
+    def repository(self, mock_session):
+        """Create an AsyncCityRepository with mock session."""
+        return AsyncCityRepository(mock_session)
+
+    @pytest.fixture
+    def mock_country(self):
+        """Create a Country."""
+        country = Country(name="France")
+        country.id = 1
+        return country
+
+    def test_persist_city_new(self, repository, mock_session, mock_country):
+        """Test persisting a new city."""
+        mock_session.scalar.return_value = None
+
+        city, created, updated = asyncio.run(repository.persist("Paris", 2_165_000, "Paris", mock_country))
+
+        assert (city.name, city.country_id) == ("Paris", 1)
+        assert (created, updated) == (True, False)
+        mock_session.flush.assert_awaited_once()
+
+    def test_persist_city_existing(self, repository, mock_session, mock_country):
+        """Test updating an existing city."""
+        existing_city = City(name="Paris", population=2_000_000, reference_url="Paris", country_id=1)
+        mock_session.scalar.return_value = existing_city
+
+        city, created, updated = asyncio.run(repository.persist("Paris", 2_165_000, "Paris", mock_country))
+
+        assert city is existing_city
+        assert city.population == 2_165_000
+        assert (created, updated) == (False, True)
+        mock_session.flush.assert_awaited_once()
+
+    def test_persist_city_unchanged(self, repository, mock_session, mock_country):
+        """Test that an unchanged city is neither updated nor flushed."""
+        mock_session.scalar.return_value = City(name="Paris", population=2_165_000, reference_url="Paris", country_id=1)
+
+        _, created, updated = asyncio.run(repository.persist("Paris", 2_165_000, "Paris", mock_country))
+
+        assert (created, updated) == (False, False)
+        mock_session.flush.assert_not_called()
+
+    def test_preload_skips_cached_cities(self, repository, mock_session):
+        """Test that cities already resolved during the run are not queried again."""
+        mock_session.scalars.return_value = []
+
+        async def preload_twice():
+            await repository.preload(["Paris"])
+            await repository.preload(["Paris"])
+
+        asyncio.run(preload_twice())
+
+        mock_session.scalars.assert_awaited_once()
+
+    def test_persist_database_error(self, repository, mock_session, mock_country):
+        """Test that flush errors are wrapped into DatabaseError."""
+        mock_session.scalar.return_value = None
+        mock_session.flush.side_effect = SQLAlchemyError("Connection lost")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            asyncio.run(repository.persist("Paris", 2_165_000, "Paris", mock_country))
+
+        assert exc_info.value.operation == "persist"
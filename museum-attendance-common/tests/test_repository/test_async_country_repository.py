@@ -0,0 +1,79 @@
+"""Tests for AsyncCountryRepository."""
+import asyncio
+import pytest
+from unittest.mock import Mock
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from museum_attendance_common.repository import AsyncCountryRepository
+from museum_attendance_common.model import Country
+from museum_attendance_common.exceptions import DatabaseError
+
+
+class TestAsyncCountryRepository:
+    """Tests for AsyncCountryRepository."""
+
+    @pytest.fixture
+    def mock_session(self):
+        """Create a mock async database session."""
+        session = Mock(spec=AsyncSession)
+        session.sync_session = Mock(spec=Session)
+        return session
+
+    @pytest.fixture
+    def repository(self, mock_session):
+        """Create an AsyncCountryRepository with mock session."""
+        return AsyncCountryRepository(mock_session)
+
+    def test_get_by_name_found(self, repository, mock_session):
+        """Test get_by_name when country exists."""
+        france = Country(name="France")
+        mock_session.scalar.return_value = france
+
+        assert asyncio.run(repository.get_by_name("France")) == france
+        mock_session.scalar.assert_awaited_once()
+
+    def test_add_country_new(self, repository, mock_session):
+        """Test adding a new country."""
+        mock_session.scalar.return_value = None
+
+        country, created, updated = asyncio.run(repository.add("Germany"))
+
+        assert country.name == "Germany"
+        assert (created, updated) == (True, False)
+        mock_session.add.assert_called_once_with(country)
+        mock_session.flush.assert_awaited_once()
+
+    def test_add_country_without_flush(self, repository, mock_session):
+        """Test that a country added with flush=False stays pending."""
+        mock_session.scalar.return_value = None
+
+        _, created, _ = asyncio.run(repository.add("Germany", flush=False))
+
+        assert created is True
+        mock_session.flush.assert_not_called()
+
+    def test_preload_resolves_countries_with_one_query(self, repository, mock_session):
+        """Test that preloaded countries are added from memory without querying them again."""
+        france = Country(name="France")
+        mock_session.scalars.return_value = [france]
+
+        async def preload_and_add():
+            await repository.preload(["France", "Italy"])
+            return await repository.add("France"), await repository.add("Italy")
+
+        (country, created, _), (new_country, new_created, _) = asyncio.run(preload_and_add())
+
+        assert (country, created) == (france, False)
+        assert (new_country.name, new_created) == ("Italy", True)
+        mock_session.scalars.assert_awaited_once()
+        mock_session.scalar.assert_not_called()
+
+    def test_add_database_error(self, repository, mock_session):
+        """Test that query errors are wrapped into DatabaseError."""
+        mock_session.scalar.side_effect = SQLAlchemyError("Connection lost")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            asyncio.run(repository.add("France"))
+
+        assert exc_info.value.entity_type == "Country"
@@ -0,0 +1,85 @@
+"""Tests for AsyncImportLogRepository."""
+import asyncio
+import pytest
+from unittest.mock import Mock
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from museum_attendance_common.enumeration import ImportStatus
+from museum_attendance_common.exceptions import DatabaseError
+from museum_attendance_common.model import ImportLog
+from museum_attendance_common.repository import AsyncImportLogRepository
+
+
+class TestAsyncImportLogRepository:
+    """Tests for AsyncImportLogRepository."""
+
+    @pytest.fixture
+    def mock_session(self):
+        """Create a mock async database session."""
+        return Mock(spec=AsyncSession)
+
+    @pytest.fixture
+    def repository(self, mock_session):
+        """Create an AsyncImportLogRepository with mock session."""
+        return AsyncImportLogRepository(mock_session)
+
+    def test_start_job(self, repository, mock_session):
+        """Test starting an import job."""
+        import_log = asyncio.run(repository.start_job(ImportStatus.IN_PROGRESS))
+
+        assert import_log.status == ImportStatus.IN_PROGRESS.value
+        mock_session.add.assert_called_once_with(import_log)
+        mock_session.flush.assert_awaited_once()
+
+    @pytest.mark.parametrize("method, status", [
+        ("end_job_with_success", ImportStatus.SUCCESS),
+        ("end_job_with_failure", ImportStatus.FAILED),
+        ("end_job_with_partial_success", ImportStatus.PARTIAL),
+    ])
+    def test_end_job(self, repository, mock_session, method, status):
+        """Test that ending a job sets its status, result and completion time."""
+        import_log = ImportLog(status=ImportStatus.IN_PROGRESS.value)
+
+        asyncio.run(getattr(repository, method)(import_log, result={"inserted_museums": 3}))
+
+        assert import_log.status == status.value
+        assert import_log.result == {"inserted_museums": 3}
+        assert import_log.completed_at is not None
+        mock_session.flush.assert_awaited_once()
+
+    def test_end_job_database_error(self, repository, mock_session):
+        """Test that flush errors are wrapped into DatabaseError with the operation name."""
+        mock_session.flush.side_effect = SQLAlchemyError("Connection lost")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            asyncio.run(repository.end_job_with_failure(ImportLog(status=ImportStatus.IN_PROGRESS.value)))
+
+        assert exc_info.value.operation == "end_job_with_failure"
+
+    def test_resume_job(self, repository, mock_session):
+        """Test that a resumed job is in progress again."""
+        import_log = ImportLog(status=ImportStatus.FAILED.value)
+
+        asyncio.run(repository.resume_job(import_log))
+
+        assert import_log.status == ImportStatus.IN_PROGRESS.value
+        assert import_log.completed_at is None
+
+    def test_get_latest_resumable(self, repository, mock_session):
+        """Test that the latest unfinished job is returned."""
+        import_log = ImportLog(status=ImportStatus.PARTIAL.value)
+        mock_session.scalar.return_value = import_log
+
+        assert asyncio.run(repository.get_latest_resumable()) is import_log
+
+    def test_lock(self, repository, mock_session):
+        """Test that the job row is locked without blocking foreign keys and reloaded."""
+        import_log = ImportLog(status=ImportStatus.IN_PROGRESS.value)
+        import_log.id = 7
+        mock_session.execute.return_value = Mock(**{"scalar_one.return_value": import_log})
+
+        assert asyncio.run(repository.lock(import_log)) is import_log
+        statement = mock_session.execute.call_args.args[0]
+        assert "FOR NO KEY UPDATE" in str(statement.compile(dialect=postgresql.dialect()))
+        assert statement.get_execution_options()["populate_existing"] is True
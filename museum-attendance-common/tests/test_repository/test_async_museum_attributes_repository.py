@@ -0,0 +1,82 @@
+"""Tests for AsyncMuseumAttributesRepository."""
+import asyncio
+import pytest
+from unittest.mock import Mock
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from museum_attendance_common.exceptions import DatabaseError
+from museum_attendance_common.repository import AsyncMuseumAttributesRepository
+from museum_attendance_common.model import Museum, MuseumAttributes
+
+
+class TestAsyncMuseumAttributesRepository:
+    """Tests for AsyncMuseumAttributesRepository."""
+
+    @pytest.fixture
+    def mock_session(self):
+        """Create a mock async database session."""
+        return Mock(spec=AsyncSession)
+
+    @pytest.fixture
+    def repository(self, mock_session):
+        """Create an AsyncMuseumAttributesRepository with mock session."""
+        return AsyncMuseumAttributesRepository(mock_session)
+
+    @pytest.fixture
+    def mock_museum(self):
+        """Create a Museum."""
+        museum = Museum(name="Louvre", city_id=1)
+        museum.id = 1
+        return museum
+
+    def test_persist_attribute_new(self, repository, mock_session, mock_museum):
+        """Test persisting a new attribute."""
+        mock_session.scalar.return_value = None
+        mock_session.execute.return_value = Mock(**{"scalar_one.return_value": {"established": "1793"}})
+
+        attribute, created, updated = asyncio.run(repository.persist(mock_museum, "established", "1793"))
+
+        assert (attribute.museum_id, attribute.attribute_key, attribute.attribute_value) == (1, "established", "1793")
+        assert (created, updated) == (True, False)
+        assert mock_museum.attributes == {"established": "1793"}
+        mock_session.flush.assert_awaited_once()
+
+    def test_persist_attribute_existing(self, repository, mock_session, mock_museum):
+        """Test updating an existing attribute."""
+        existing = MuseumAttributes(museum_id=1, attribute_key="established", attribute_value="1792")
+        mock_session.scalar.return_value = existing
+        mock_session.execute.return_value = Mock(**{"scalar_one.return_value": {"established": "1793"}})
+
+        attribute, created, updated = asyncio.run(repository.persist(mock_museum, "established", "1793"))
+
+        assert attribute is existing
+        assert attribute.attribute_value == "1793"
+        assert (created, updated) == (False, True)
+
+    def test_persist_many_deletes_stale_and_upserts(self, repository, mock_session, mock_museum):
+        """Test that the attributes of a batch are replaced with a delete and an upsert."""
+        mock_session.execute.return_value = Mock(rowcount=1, **{"scalars.return_value": [True, False]})
+
+        counts = asyncio.run(repository.persist_many([(mock_museum, {"established": "1793", "director": "Laurence des Cars"})]))
+
+        assert counts == (1, 1, 1)
+        delete_sql, upsert_sql, sync_sql = (str(call.args[0].compile(dialect=postgresql.dialect())) for call in mock_session.execute.call_args_list)
+        assert delete_sql.startswith("DELETE FROM museum_attributes")
+        assert "ON CONFLICT (museum_id, attribute_key) DO UPDATE" in upsert_sql
+        assert "UPDATE museum SET attributes = synced.attributes" in sync_sql
+        assert mock_museum.attributes == {"established": "1793", "director": "Laurence des Cars"}
+
+    def test_persist_many_empty_batch(self, repository, mock_session):
+        """Test that an empty batch does not reach the database."""
+        assert asyncio.run(repository.persist_many([])) == (0, 0, 0)
+        mock_session.execute.assert_not_called()
+
+    def test_persist_many_database_error(self, repository, mock_session, mock_museum):
+        """Test that statement errors are wrapped into DatabaseError."""
+        mock_session.execute.side_effect = SQLAlchemyError("Connection lost")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            asyncio.run(repository.persist_many([(mock_museum, {"established": "1793"})]))
+
+        assert exc_info.value.operation == "persist_many"
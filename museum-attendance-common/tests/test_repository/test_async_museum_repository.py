@@ -0,0 +1,130 @@
+"""Tests for AsyncMuseumRepository."""
+import asyncio
+import pytest
+from unittest.mock import Mock
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from museum_attendance_common.exceptions import DatabaseError
+from museum_attendance_common.repository import AsyncMuseumRepository
+from museum_attendance_common.model import Museum, City
+
+
+class TestAsyncMuseumRepository:
+    """Tests for AsyncMuseumRepository."""
+
+    @pytest.fixture
+    def mock_session(self):
+        """Create a mock async database session."""
+        return Mock(spec=AsyncSession)
+
+    @pytest.fixture
+    def repository(self, mock_session):
+        """Create an AsyncMuseumRepository with mock session."""
+        return AsyncMuseumRepository(mock_session)
+
+    @pytest.fixture
+    def mock_city(self):
+        """Create a City."""
+        city = City(name="Paris", country_id=1)
+        city.id = 1
+        return city
+
+    def test_persist_museum_new(self, repository, mock_session, mock_city):
+        """Test persisting a new museum."""
+        mock_session.scalar.return_value = None
+
+        museum, created, updated = asyncio.run(repository.persist("Louvre", 8_700_000, "Louvre", mock_city))
+
+        assert (museum.name, museum.city_id) == ("Louvre", 1)
+        assert (created, updated) == (True, False)
+        mock_session.add.assert_called_once_with(museum)
+        mock_session.flush.assert_awaited_once()
+
+    def test_persist_museum_unchanged(self, repository, mock_session, mock_city):
+        """Test that an unchanged museum is neither updated nor flushed."""
+        mock_session.scalar.return_value = Museum(name="Louvre", number_of_visitors=8_700_000, city_id=1)
+
+        _, created, updated = asyncio.run(repository.persist("Louvre", 8_700_000, "Louvre", mock_city))
+
+        assert (created, updated) == (False, False)
+        mock_session.flush.assert_not_called()
+
+    def test_persist_many_upserts_batch_and_loads_unchanged(self, repository, mock_session, mock_city):
+        """Test that a batch is upserted in one statement and unchanged museums are loaded."""
+        louvre = Museum(name="Louvre", city_id=mock_city.id)
+        orsay = Museum(name="Orsay", city_id=mock_city.id)
+        mock_session.execute.return_value = Mock(**{"all.return_value": [(louvre, True)]})
+        mock_session.scalars.return_value = [orsay]
+
+        results = asyncio.run(repository.persist_many([
+            dict(name="Louvre", number_of_visitors=8_700_000, reference_url="Louvre", city=mock_city),
+            dict(name="Orsay", number_of_visitors=3_200_000, reference_url="Orsay", city=mock_city),
+        ]))
+
+        assert results == [(louvre, True, False), (orsay, False, False)]
+        sql = str(mock_session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (name) DO UPDATE SET number_of_visitors = excluded.number_of_visitors" in sql
+        assert "WHERE museum.number_of_visitors IS DISTINCT FROM excluded.number_of_visitors" in sql
+        mock_session.scalars.assert_awaited_once()
+
+    def test_persist_many_empty_batch(self, repository, mock_session):
+        """Test that an empty batch does not reach the database."""
+        assert asyncio.run(repository.persist_many([])) == []
+        mock_session.execute.assert_not_called()
+
+    def test_persist_many_database_error(self, repository, mock_session, mock_city):
+        """Test that upsert errors are wrapped into DatabaseError."""
+        mock_session.execute.side_effect = SQLAlchemyError("Connection lost")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            asyncio.run(repository.persist_many([dict(name="Louvre", number_of_visitors=1, reference_url="Louvre", city=mock_city)]))
+
+        assert exc_info.value.operation == "persist_many"
+
+    def test_get_museums_loads_relationships_eagerly(self, repository, mock_session):
+        """Test that museums are loaded with their city and attributes in one query."""
+        louvre = Museum(name="Louvre", city_id=1)
+        mock_session.scalars.return_value = Mock(**{"unique.return_value": [louvre]})
+
+        assert asyncio.run(repository.get_museums(include_attributes=True)) == [louvre]
+        sql = str(mock_session.scalars.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "LEFT OUTER JOIN city" in sql
+        assert "LEFT OUTER JOIN museum_attributes" in sql
+
+    def test_stream_museums_uses_server_side_cursor(self, repository, mock_session):
+        """Test that museums are streamed in batches and their attributes loaded by a separate IN query."""
+        louvre, orsay = Museum(name="Louvre", city_id=1), Museum(name="Orsay", city_id=1)
+
+        async def rows():
+            for museum in (louvre, orsay):
+                yield museum
+
+        async def stream():
+            return [museum async for museum in repository.stream_museums(include_attributes=True, batch_size=500)]
+
+        mock_session.stream_scalars.return_value = rows()
+
+        assert asyncio.run(stream()) == [louvre, orsay]
+        statement = mock_session.stream_scalars.call_args.args[0]
+        assert statement.get_execution_options()["yield_per"] == 500
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        assert "LEFT OUTER JOIN city" in sql
+        assert "museum_attributes" not in sql
+
+    def test_get_by_attributes_uses_containment(self, repository, mock_session):
+        """Test that attribute values are matched with a single @> query on museum.attributes."""
+        louvre = Museum(name="Louvre", city_id=1)
+        mock_session.scalars.return_value = [louvre]
+
+        assert asyncio.run(repository.get_by_attributes({"type": "Art museum"})) == [louvre]
+        sql = str(mock_session.scalars.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "WHERE museum.attributes @> %(attributes_1)s" in sql
+
+    def test_get_by_attribute_key_uses_key_operator(self, repository, mock_session):
+        """Test that museums having an attribute are found with a single ? query on museum.attributes."""
+        mock_session.scalars.return_value = []
+
+        assert asyncio.run(repository.get_by_attribute_key("collection_size")) == []
+        sql = str(mock_session.scalars.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "WHERE museum.attributes ? %(attributes_1)s" in sql
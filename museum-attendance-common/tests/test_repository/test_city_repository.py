@@ -1,5 +1,6 @@
 """Tests for CityRepository."""
 import pytest
+from sqlalchemy.orm import Session
 from unittest.mock import Mock
 from museum_attendance_common.repository import CityRepository
 from museum_attendance_common.model import City, Country
@@ -11,7 +12,7 @@ class TestCityRepository:
     @pytest.fixture
     def mock_session(self):
         """Create a mock database session."""
-        return Mock()
+        return Mock(spec=Session)
 
     @pytest.fixture
     def repository(self, mock_session):
@@ -30,24 +31,16 @@ class TestCityRepository:
         expected_city = City(name="Paris", country_id=1)
         expected_city.id = 1
         
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = expected_city
+        mock_session.scalar.return_value = expected_city
         
         result = repository.get_by_name("Paris")
         
         assert result == expected_city
-        mock_session.query.assert_called_once_with(City)
+        assert "WHERE city.name = " in str(mock_session.scalar.call_args.args[0])
 
     def test_get_by_name_not_found(self, repository, mock_session):
         """Test get_by_name when city doesn't exist."""
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = None
+        mock_session.scalar.return_value = None
         
         result = repository.get_by_name("NonExistent")
         
@@ -55,11 +48,7 @@ class TestCityRepository:
 
     def test_persist_city_new(self, repository, mock_session, mock_country):
         """Test persisting a new city."""
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = None  # City doesn't exist
+        mock_session.scalar.return_value = None  # City doesn't exist
         
         city, created, updated = repository.persist("London", 8_900_000, "https://example.com", mock_country)
         
@@ -77,11 +66,7 @@ class TestCityRepository:
         existing_city = City(name="Berlin", country_id=mock_country.id, population=3_500_000)
         existing_city.id = 2
         
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = existing_city  # City exists
+        mock_session.scalar.return_value = existing_city  # City exists
         
         city, created, updated = repository.persist("Berlin", 3_700_000, "https://example.com/berlin", mock_country)
         
@@ -95,11 +80,7 @@ class TestCityRepository:
 
     def test_persist_city_with_none_values(self, repository, mock_session, mock_country):
         """Test persisting city with None values."""
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = None
+        mock_session.scalar.return_value = None
         
         city, created, updated = repository.persist("Rome", None, None, mock_country)
         
@@ -107,3 +88,43 @@ class TestCityRepository:
         assert city.population is None
         assert city.reference_url is None
         assert created is True
+
+    def test_preload_resolves_cities_with_one_query(self, repository, mock_session, mock_country):
+        """Test that preloaded cities are persisted from memory without querying them again."""
+        paris = City(name="Paris", population=2_000_000, country_id=mock_country.id)
+        paris.id = 1
+        mock_session.scalars.return_value = [paris]
+
+        repository.preload(["Paris", "Lyon"])
+        city, created, updated = repository.persist("Paris", 2_165_000, "Paris", mock_country)
+        new_city, new_created, _ = repository.persist("Lyon", 516_000, "Lyon", mock_country)
+
+        assert (city, created, updated) == (paris, False, True)
+        assert city.population == 2_165_000
+        assert new_city.name == "Lyon"
+        assert new_created is True
+        mock_session.scalars.assert_called_once()
+        mock_session.scalar.assert_not_called()
+
+    def test_persist_caches_created_city(self, repository, mock_session, mock_country):
+        """Test that a city created during the run is updated again without a query."""
+        mock_session.scalar.return_value = None
+
+        city, _, _ = repository.persist("Rome", 2_800_000, "Rome", mock_country)
+        same_city, created, updated = repository.persist("Rome", 2_900_000, "Rome", mock_country)
+
+        assert same_city is city
+        assert (created, updated) == (False, True)
+        assert city.population == 2_900_000
+        mock_session.scalar.assert_called_once()
+
+    def test_persist_city_unchanged(self, repository, mock_session, mock_country):
+        """Test that persisting a city with the same population and reference writes nothing."""
+        existing_city = City(name="Paris", population=2_165_000, reference_url="Paris", country_id=mock_country.id)
+        mock_session.scalar.return_value = existing_city
+
+        city, created, updated = repository.persist("Paris", 2_165_000, "Paris", mock_country)
+
+        assert city == existing_city
+        assert (created, updated) == (False, False)
+        mock_session.flush.assert_not_called()
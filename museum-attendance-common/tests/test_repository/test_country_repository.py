@@ -1,5 +1,6 @@
 """Tests for CountryRepository."""
 import pytest
+from sqlalchemy.orm import Session
 from unittest.mock import Mock, MagicMock, call
 from museum_attendance_common.repository import CountryRepository
 from museum_attendance_common.model import Country
@@ -12,7 +13,7 @@ class TestCountryRepository:
     @pytest.fixture
     def mock_session(self):
         """Create a mock database session."""
-        return Mock()
+        return Mock(spec=Session)
 
     @pytest.fixture
     def repository(self, mock_session):
@@ -24,24 +25,16 @@ class TestCountryRepository:
         expected_country = Country(name="France")
         expected_country.id = 1
         
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = expected_country
+        mock_session.scalar.return_value = expected_country
         
         result = repository.get_by_name("France")
         
         assert result == expected_country
-        mock_session.query.assert_called_once_with(Country)
+        assert "WHERE country.name = " in str(mock_session.scalar.call_args.args[0])
 
     def test_get_by_name_not_found(self, repository, mock_session):
         """Test get_by_name when country doesn't exist."""
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = None
+        mock_session.scalar.return_value = None
         
         result = repository.get_by_name("NonExistent")
         
@@ -49,11 +42,7 @@ class TestCountryRepository:
 
     def test_add_country_new(self, repository, mock_session):
         """Test adding a new country."""
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = None  # Country doesn't exist
+        mock_session.scalar.return_value = None  # Country doesn't exist
         
         country, created, updated = repository.add("Germany")
         
@@ -69,11 +58,7 @@ class TestCountryRepository:
         existing_country = Country(name="Italy")
         existing_country.id = 1
         
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = existing_country  # Country exists
+        mock_session.scalar.return_value = existing_country  # Country exists
         
         country, created, updated = repository.add("Italy")
         
@@ -82,3 +67,39 @@ class TestCountryRepository:
         assert updated is False
         mock_session.add.assert_not_called()
         mock_session.flush.assert_not_called()
+
+    def test_preload_resolves_countries_with_one_query(self, repository, mock_session):
+        """Test that preloaded countries are added from memory without querying them again."""
+        france = Country(name="France")
+        france.id = 1
+        mock_session.scalars.return_value = [france]
+
+        repository.preload(["France", "Italy", "France"])
+        country, created, _ = repository.add("France")
+        new_country, new_created, _ = repository.add("Italy")
+
+        assert (country, created) == (france, False)
+        assert new_country.name == "Italy"
+        assert new_created is True
+        mock_session.scalars.assert_called_once()
+        mock_session.scalar.assert_not_called()
+
+    def test_preload_skips_cached_countries(self, repository, mock_session):
+        """Test that countries already resolved during the run are not queried again."""
+        mock_session.scalars.return_value = []
+
+        repository.preload(["France"])
+        repository.preload(["France"])
+
+        mock_session.scalars.assert_called_once()
+
+    def test_add_caches_created_country(self, repository, mock_session):
+        """Test that a country created during the run is found again without a query."""
+        mock_session.scalar.return_value = None
+
+        country, _, _ = repository.add("Spain")
+        same_country, created, _ = repository.add("Spain")
+
+        assert same_country is country
+        assert created is False
+        mock_session.scalar.assert_called_once()
@@ -0,0 +1,197 @@
+"""Tests for CrawlTaskRepository."""
+import pytest
+from unittest.mock import Mock
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+from museum_attendance_common.repository import CrawlTaskRepository
+from museum_attendance_common.model import CrawlTask, ImportLog
+from museum_attendance_common.enumeration import CrawlTaskStatus, ImportStatus, PageType
+from museum_attendance_common.exceptions import DatabaseError
+
+
+class TestCrawlTaskRepository:
+    """Tests for CrawlTaskRepository."""
+
+    @pytest.fixture
+    def mock_session(self):
+        """Create a mock database session."""
+        return Mock()
+
+    @pytest.fixture
+    def repository(self, mock_session):
+        """Create a CrawlTaskRepository with mock session."""
+        return CrawlTaskRepository(mock_session)
+
+    @pytest.fixture
+    def import_log(self):
+        """Create an in-progress ImportLog."""
+        import_log = ImportLog(status=ImportStatus.IN_PROGRESS.value)
+        import_log.id = 7
+        return import_log
+
+    @staticmethod
+    def make_task(page_type=PageType.MUSEUM, page_key="Louvre", status=CrawlTaskStatus.CLAIMED, attempts=1):
+        """Create a CrawlTask of import job 7."""
+        return CrawlTask(import_log_id=7, page_type=page_type.value, page_key=page_key, status=status.value, attempts=attempts)
+
+    def test_enqueue_new_task(self, repository, mock_session, import_log):
+        """Test that queuing a new page inserts it and ignores conflicts."""
+        mock_session.execute.return_value.scalar_one_or_none.return_value = 12
+
+        enqueued = repository.enqueue(import_log, PageType.LIST, "List_of_most_visited_museums")
+
+        assert enqueued is True
+        statement = mock_session.execute.call_args.args[0]
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        assert "INSERT INTO crawl_task" in sql
+        assert "ON CONFLICT (import_log_id, page_type, page_key) DO NOTHING" in sql
+
+    def test_enqueue_already_queued(self, repository, mock_session, import_log):
+        """Test that a page queued by another worker is not queued again."""
+        mock_session.execute.return_value.scalar_one_or_none.return_value = None
+
+        assert repository.enqueue(import_log, PageType.CITY, "Paris") is False
+
+    def test_enqueue_database_error(self, repository, mock_session, import_log):
+        """Test that insert errors are wrapped into DatabaseError."""
+        mock_session.execute.side_effect = SQLAlchemyError("Connection lost")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            repository.enqueue(import_log, PageType.CITY, "Paris")
+
+        assert "Failed to queue crawl task" in str(exc_info.value)
+
+    def test_claim_skips_locked_rows(self, repository, mock_session, import_log):
+        """Test that claiming locks the tasks with SKIP LOCKED and assigns them to the worker."""
+        task = self.make_task(status=CrawlTaskStatus.PENDING, attempts=0)
+        query = mock_session.query.return_value.filter.return_value.order_by.return_value.limit.return_value
+        query.with_for_update.return_value.all.return_value = [task]
+
+        tasks = repository.claim(import_log, "worker-1", limit=5, lease_seconds=300, max_attempts=3)
+
+        assert tasks == [task]
+        assert task.status == CrawlTaskStatus.CLAIMED.value
+        assert task.claimed_by == "worker-1"
+        assert task.attempts == 1
+        mock_session.query.return_value.filter.return_value.order_by.return_value.limit.assert_called_once_with(5)
+        query.with_for_update.assert_called_once_with(skip_locked=True)
+        mock_session.flush.assert_called_once()
+
+    def test_claim_fails_expired_tasks_out_of_attempts(self, repository, mock_session, import_log):
+        """Test that a task whose lease expired on its last attempt is marked FAILED instead of claimed again."""
+        mock_session.execute.return_value.rowcount = 1
+        query = mock_session.query.return_value.filter.return_value.order_by.return_value.limit.return_value
+        query.with_for_update.return_value.all.return_value = []
+
+        assert repository.claim(import_log, "worker-1", limit=5, lease_seconds=300, max_attempts=3) == []
+
+        statement = mock_session.execute.call_args.args[0]
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        params = statement.compile(dialect=postgresql.dialect()).params
+        assert sql.startswith("UPDATE crawl_task SET status=%(status)s")
+        assert "crawl_task.claimed_at < now() - %(now_1)s AND crawl_task.attempts >= %(attempts_1)s" in sql
+        assert params["status"] == CrawlTaskStatus.FAILED.value
+        assert params["attempts_1"] == 3
+        claimable = mock_session.query.return_value.filter.call_args.args[1]
+        assert "crawl_task.attempts < %(attempts_1)s" in str(claimable.compile(dialect=postgresql.dialect()))
+
+    def test_claim_database_error(self, repository, mock_session, import_log):
+        """Test that claim errors are wrapped into DatabaseError."""
+        mock_session.query.side_effect = SQLAlchemyError("Deadlock detected")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            repository.claim(import_log, "worker-1", limit=5, lease_seconds=300, max_attempts=3)
+
+        assert "Failed to claim crawl tasks" in str(exc_info.value)
+
+    def test_complete_while_holding_the_lease(self, repository, mock_session):
+        """Test that a task is completed with one UPDATE conditioned on the claim of the worker."""
+        task = self.make_task()
+        task.id = 12
+        mock_session.execute.return_value.scalar_one_or_none.return_value = 12
+
+        assert repository.complete(task, "worker-1", 300, {"name": "Louvre"}) is True
+
+        statement = mock_session.execute.call_args.args[0]
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        assert sql.startswith("UPDATE crawl_task SET status=%(status)s, completed_at=now(), result=%(result)s::JSONB, error_message=%(error_message)s")
+        assert "crawl_task.status = %(status_1)s AND crawl_task.claimed_by = %(claimed_by_1)s AND crawl_task.claimed_at >= now() - %(now_1)s" in sql
+        params = statement.compile(dialect=postgresql.dialect()).params
+        assert params["status"] == CrawlTaskStatus.DONE.value
+        assert params["claimed_by_1"] == "worker-1"
+
+    def test_complete_after_losing_the_lease(self, repository, mock_session):
+        """Test that the result of a worker whose task was claimed again is not stored."""
+        mock_session.execute.return_value.scalar_one_or_none.return_value = None
+
+        assert repository.complete(self.make_task(), "worker-1", 300, {"name": "Louvre"}) is False
+
+    def test_fail_requeues_or_fails_by_attempts(self, repository, mock_session):
+        """Test that a failed task goes back to the queue until it used all its attempts."""
+        mock_session.execute.return_value.scalar_one_or_none.return_value = 12
+
+        assert repository.fail(self.make_task(), "worker-1", 300, "Timeout", max_attempts=3) is True
+
+        statement = mock_session.execute.call_args.args[0]
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        assert "status=CASE WHEN (crawl_task.attempts >= %(attempts_1)s) THEN %(param_1)s ELSE %(param_2)s END" in sql
+        assert "claimed_by=%(claimed_by)s" in sql
+        assert "crawl_task.claimed_by = %(claimed_by_1)s" in sql
+        params = statement.compile(dialect=postgresql.dialect()).params
+        assert (params["attempts_1"], params["param_1"], params["param_2"]) == (3, CrawlTaskStatus.FAILED.value, CrawlTaskStatus.PENDING.value)
+        assert params["claimed_by"] is None
+
+    def test_fail_after_losing_the_lease(self, repository, mock_session):
+        """Test that a worker whose task was claimed again does not put it back in the queue."""
+        mock_session.execute.return_value.scalar_one_or_none.return_value = None
+
+        assert repository.fail(self.make_task(), "worker-1", 300, "Timeout", max_attempts=3) is False
+
+    def test_complete_database_error(self, repository, mock_session):
+        """Test that update errors are wrapped into DatabaseError."""
+        mock_session.execute.side_effect = SQLAlchemyError("Connection lost")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            repository.complete(self.make_task(), "worker-1", 300)
+
+        assert exc_info.value.operation == "complete"
+
+    def test_get_completed(self, repository, mock_session, import_log):
+        """Test loading the completed tasks of a page type."""
+        tasks = [self.make_task(status=CrawlTaskStatus.DONE)]
+        mock_session.query.return_value.filter.return_value.order_by.return_value.all.return_value = tasks
+
+        assert repository.get_completed(import_log, PageType.MUSEUM) == tasks
+        mock_session.query.assert_called_once_with(CrawlTask)
+
+    def test_count_unfinished(self, repository, mock_session, import_log):
+        """Test counting pending and claimed tasks."""
+        mock_session.query.return_value.filter.return_value.scalar.return_value = 4
+
+        assert repository.count_unfinished(import_log) == 4
+
+    def test_count_unfinished_database_error(self, repository, mock_session, import_log):
+        """Test that count errors are wrapped into DatabaseError."""
+        mock_session.query.side_effect = SQLAlchemyError("Connection lost")
+
+        with pytest.raises(DatabaseError):
+            repository.count_unfinished(import_log)
+
+    def test_count_by_status(self, repository, mock_session, import_log):
+        """Test counting the tasks of an import job per status."""
+        mock_session.query.return_value.filter.return_value.group_by.return_value.all.return_value = [("DONE", 10), ("FAILED", 1)]
+
+        assert repository.count_by_status(import_log) == {"DONE": 10, "FAILED": 1}
+
+    def test_count_by_worker(self, repository, mock_session, import_log):
+        """Test counting the completed tasks of an import job per worker."""
+        mock_session.query.return_value.filter.return_value.group_by.return_value.all.return_value = [("worker-1", 6), ("worker-2", 5)]
+
+        assert repository.count_by_worker(import_log) == {"worker-1": 6, "worker-2": 5}
+
+    def test_get_active_import_log(self, repository, mock_session, import_log):
+        """Test finding the distributed import job workers should join."""
+        mock_session.query.return_value.filter.return_value.exists.return_value = True
+        mock_session.query.return_value.filter.return_value.order_by.return_value.first.return_value = import_log
+
+        assert repository.get_active_import_log() is import_log
@@ -0,0 +1,87 @@
+"""Tests for ImportCheckpointRepository."""
+import pytest
+from unittest.mock import Mock
+from sqlalchemy.exc import SQLAlchemyError
+from museum_attendance_common.repository import ImportCheckpointRepository
+from museum_attendance_common.model import ImportCheckpoint, ImportLog
+from museum_attendance_common.enumeration import ImportStatus, PageType
+from museum_attendance_common.exceptions import DatabaseError
+
+
+class TestImportCheckpointRepository:
+    """Tests for ImportCheckpointRepository."""
+
+    @pytest.fixture
+    def mock_session(self):
+        """Create a mock database session."""
+        return Mock()
+
+    @pytest.fixture
+    def repository(self, mock_session):
+        """Create an ImportCheckpointRepository with mock session."""
+        return ImportCheckpointRepository(mock_session)
+
+    @pytest.fixture
+    def import_log(self):
+        """Create an in-progress ImportLog."""
+        import_log = ImportLog(status=ImportStatus.IN_PROGRESS.value)
+        import_log.id = 7
+        return import_log
+
+    def test_get_by_import_log(self, repository, mock_session, import_log):
+        """Test loading all checkpoints of an import job."""
+        checkpoints = [ImportCheckpoint(import_log_id=7, page_type=PageType.MUSEUM.value, page_key="Louvre")]
+        mock_session.query.return_value.filter.return_value.all.return_value = checkpoints
+
+        result = repository.get_by_import_log(import_log)
+
+        assert result == checkpoints
+        mock_session.query.assert_called_once_with(ImportCheckpoint)
+
+    def test_get_by_import_log_database_error(self, repository, mock_session, import_log):
+        """Test that query errors are wrapped into DatabaseError."""
+        mock_session.query.side_effect = SQLAlchemyError("Connection lost")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            repository.get_by_import_log(import_log)
+
+        assert "Failed to query import checkpoints" in str(exc_info.value)
+
+    def test_mark_completed_new(self, repository, mock_session, import_log):
+        """Test recording a new checkpoint."""
+        mock_session.query.return_value.filter.return_value.first.return_value = None
+
+        checkpoint, created, updated = repository.mark_completed(import_log, PageType.CITY, "Paris", {"name": "Paris"})
+
+        assert isinstance(checkpoint, ImportCheckpoint)
+        assert checkpoint.import_log_id == 7
+        assert checkpoint.page_type == "CITY"
+        assert checkpoint.page_key == "Paris"
+        assert checkpoint.payload == {"name": "Paris"}
+        assert created is True
+        assert updated is False
+        mock_session.add.assert_called_once()
+        mock_session.flush.assert_called_once()
+
+    def test_mark_completed_existing(self, repository, mock_session, import_log):
+        """Test that recording an existing checkpoint updates its payload."""
+        existing = ImportCheckpoint(import_log_id=7, page_type=PageType.CITY.value, page_key="Paris", payload=None)
+        mock_session.query.return_value.filter.return_value.first.return_value = existing
+
+        checkpoint, created, updated = repository.mark_completed(import_log, PageType.CITY, "Paris", {"name": "Paris"})
+
+        assert checkpoint is existing
+        assert checkpoint.payload == {"name": "Paris"}
+        assert created is False
+        assert updated is True
+        mock_session.add.assert_not_called()
+
+    def test_mark_completed_database_error(self, repository, mock_session, import_log):
+        """Test that persistence errors are wrapped into DatabaseError."""
+        mock_session.query.return_value.filter.return_value.first.return_value = None
+        mock_session.flush.side_effect = SQLAlchemyError("Constraint violation")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            repository.mark_completed(import_log, PageType.MUSEUM, "Louvre")
+
+        assert exc_info.value.operation == "mark_completed"
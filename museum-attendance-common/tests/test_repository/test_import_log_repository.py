@@ -2,9 +2,12 @@
 import pytest
 from unittest.mock import Mock
 from datetime import datetime, timezone
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects import postgresql
 from museum_attendance_common.repository import ImportLogRepository
 from museum_attendance_common.model import ImportLog
 from museum_attendance_common.enumeration import ImportStatus
+from museum_attendance_common.exceptions import DatabaseError
 
 
 class TestImportLogRepository:
@@ -118,3 +121,80 @@ class TestImportLogRepository:
         assert final_log.result == result_data
         assert final_log.completed_at is not None
         assert mock_session.flush.call_count == 2
+
+    def test_get_latest_resumable(self, repository, mock_session):
+        """Test fetching the latest job that can be resumed."""
+        import_log = ImportLog(status=ImportStatus.FAILED.value)
+        mock_session.scalar.return_value = import_log
+
+        result = repository.get_latest_resumable()
+
+        assert result == import_log
+        assert "ORDER BY import_log.triggered_at DESC" in str(mock_session.scalar.call_args.args[0])
+
+    def test_get_latest_resumable_none(self, repository, mock_session):
+        """Test that None is returned when every job completed."""
+        mock_session.scalar.return_value = None
+
+        assert repository.get_latest_resumable() is None
+
+    def test_resume_job(self, repository, mock_session):
+        """Test resuming a failed job."""
+        import_log = ImportLog(status=ImportStatus.FAILED.value, result={"error_message": "Interrupted"})
+        import_log.id = 1
+        import_log.completed_at = datetime.now(timezone.utc)
+
+        result = repository.resume_job(import_log, {"page_names": ["List_of_most_visited_museums"]})
+
+        assert result.status == ImportStatus.IN_PROGRESS.value
+        assert result.result == {"page_names": ["List_of_most_visited_museums"]}
+        assert result.completed_at is None
+        mock_session.flush.assert_called_once()
+
+    def test_lock(self, repository, mock_session):
+        """Test locking the import job row and reloading its status."""
+        import_log = ImportLog(status=ImportStatus.IN_PROGRESS.value)
+        import_log.id = 1
+        locked = ImportLog(status=ImportStatus.SUCCESS.value)
+        mock_session.execute.return_value.scalar_one.return_value = locked
+
+        result = repository.lock(import_log)
+
+        assert result is locked
+        statement = mock_session.execute.call_args.args[0]
+        assert statement.get_execution_options()["populate_existing"] is True
+        assert "FOR NO KEY UPDATE" in str(statement.compile(dialect=postgresql.dialect()))
+
+    def test_lock_database_error(self, repository, mock_session):
+        """Test that locking errors are wrapped into DatabaseError."""
+        import_log = ImportLog(status=ImportStatus.IN_PROGRESS.value)
+        import_log.id = 1
+        mock_session.execute.side_effect = SQLAlchemyError("Lock timeout")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            repository.lock(import_log)
+
+        assert "Failed to lock import job" in str(exc_info.value)
+
+    def test_end_job_with_partial_success(self, repository, mock_session):
+        """Test ending a job that ran out of time."""
+        import_log = ImportLog(status=ImportStatus.IN_PROGRESS.value)
+        import_log.id = 1
+
+        result = repository.end_job_with_partial_success(import_log, {"deadline_exceeded": True})
+
+        assert result.status == ImportStatus.PARTIAL.value
+        assert result.result == {"deadline_exceeded": True}
+        assert result.completed_at is not None
+        mock_session.flush.assert_called_once()
+
+    def test_end_job_with_partial_success_database_error(self, repository, mock_session):
+        """Test that flush errors are wrapped into DatabaseError."""
+        import_log = ImportLog(status=ImportStatus.IN_PROGRESS.value)
+        import_log.id = 1
+        mock_session.flush.side_effect = SQLAlchemyError("Connection lost")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            repository.end_job_with_partial_success(import_log)
+
+        assert "Failed to end import job" in str(exc_info.value)
@@ -1,6 +1,9 @@
 """Tests for MuseumAttributesRepository."""
 import pytest
 from unittest.mock import Mock
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+from museum_attendance_common.exceptions import DatabaseError
 from museum_attendance_common.repository import MuseumAttributesRepository
 from museum_attendance_common.model import MuseumAttributes, Museum
 
@@ -34,24 +37,16 @@ class TestMuseumAttributesRepository:
         )
         expected_attr.id = 1
         
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = expected_attr
+        mock_session.scalar.return_value = expected_attr
         
         result = repository.get_by_museum_and_key(mock_museum, "founded")
         
         assert result == expected_attr
-        mock_session.query.assert_called_once_with(MuseumAttributes)
+        assert "WHERE museum_attributes.museum_id = " in str(mock_session.scalar.call_args.args[0])
 
     def test_get_by_museum_and_key_not_found(self, repository, mock_session, mock_museum):
         """Test get_by_museum_and_key when attribute doesn't exist."""
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = None
+        mock_session.scalar.return_value = None
         
         result = repository.get_by_museum_and_key(mock_museum, "architect")
         
@@ -59,14 +54,15 @@ class TestMuseumAttributesRepository:
 
     def test_persist_attribute_new(self, repository, mock_session, mock_museum):
         """Test persisting a new museum attribute."""
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = None  # Attribute doesn't exist
+        mock_session.scalar.return_value = None  # Attribute doesn't exist
         
+        mock_session.execute.return_value.scalar_one.return_value = {"director": "John Doe"}
+
         attr, created, updated = repository.persist(mock_museum, "director", "John Doe")
         
+        sync_sql = str(mock_session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "UPDATE museum SET attributes=(museum.attributes || jsonb_build_object(" in sync_sql
+        assert mock_museum.attributes == {"director": "John Doe"}
         assert isinstance(attr, MuseumAttributes)
         assert attr.museum_id == mock_museum.id
         assert attr.attribute_key == "director"
@@ -85,11 +81,7 @@ class TestMuseumAttributesRepository:
         )
         existing_attr.id = 1
         
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = existing_attr  # Attribute exists
+        mock_session.scalar.return_value = existing_attr  # Attribute exists
         
         attr, created, updated = repository.persist(mock_museum, "area", "80000 sq m")
         
@@ -102,13 +94,67 @@ class TestMuseumAttributesRepository:
 
     def test_persist_attribute_with_none_value(self, repository, mock_session, mock_museum):
         """Test persisting attribute with None value."""
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = None
+        mock_session.scalar.return_value = None
         
         attr, created, updated = repository.persist(mock_museum, "architect", None)
         
         assert attr.attribute_value is None
         assert created is True
+
+    def test_persist_attribute_unchanged(self, repository, mock_session, mock_museum):
+        """Test that persisting an attribute with the same value writes nothing."""
+        existing_attr = MuseumAttributes(museum_id=mock_museum.id, attribute_key="established", attribute_value="1793")
+        mock_session.scalar.return_value = existing_attr
+
+        attribute, created, updated = repository.persist(mock_museum, "established", "1793")
+
+        assert attribute == existing_attr
+        assert (created, updated) == (False, False)
+        mock_session.flush.assert_not_called()
+
+    def test_persist_many_deletes_stale_and_upserts_in_two_statements(self, repository, mock_session, mock_museum):
+        """Test that a batch deletes the attributes gone from the page and upserts the others in one statement, then syncs museum.attributes."""
+        other_museum = Museum(name="Orsay", city_id=1)
+        other_museum.id = 2
+        mock_session.execute.return_value.rowcount = 1
+        mock_session.execute.return_value.scalars.return_value = [True, False, True]
+
+        inserted, updated, deleted = repository.persist_many([
+            (mock_museum, {"established": "1793", "type": "Art Museum"}),
+            (other_museum, {"established": "1986"}),
+        ])
+
+        assert (inserted, updated, deleted) == (2, 1, 1)
+        assert mock_session.execute.call_count == 3
+        delete_sql, upsert_sql, sync_sql = (str(call.args[0].compile(dialect=postgresql.dialect())) for call in mock_session.execute.call_args_list)
+        assert delete_sql.startswith("DELETE FROM museum_attributes")
+        assert "(museum_attributes.museum_id, museum_attributes.attribute_key) NOT IN" in delete_sql
+        assert "ON CONFLICT (museum_id, attribute_key) DO UPDATE SET attribute_value = excluded.attribute_value" in upsert_sql
+        assert "WHERE museum_attributes.attribute_value IS DISTINCT FROM excluded.attribute_value" in upsert_sql
+        assert "RETURNING xmax = 0" in upsert_sql
+        assert "UPDATE museum SET attributes = synced.attributes" in sync_sql
+        assert "museum.attributes IS DISTINCT FROM synced.attributes" in sync_sql
+        assert mock_museum.attributes == {"established": "1793", "type": "Art Museum"}
+        assert other_museum.attributes == {"established": "1986"}
+
+    def test_persist_many_museum_without_attributes(self, repository, mock_session, mock_museum):
+        """Test that a museum whose page has no attributes left only gets its attributes deleted."""
+        mock_session.execute.return_value.rowcount = 4
+
+        assert repository.persist_many([(mock_museum, {})]) == (0, 0, 4)
+        assert mock_session.execute.call_count == 2
+        assert mock_museum.attributes == {}
+
+    def test_persist_many_empty_batch(self, repository, mock_session):
+        """Test that an empty batch does not reach the database."""
+        assert repository.persist_many([]) == (0, 0, 0)
+        mock_session.execute.assert_not_called()
+
+    def test_persist_many_database_error(self, repository, mock_session, mock_museum):
+        """Test that errors of the batch are wrapped into DatabaseError."""
+        mock_session.execute.side_effect = SQLAlchemyError("Connection lost")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            repository.persist_many([(mock_museum, {"established": "1793"})])
+
+        assert exc_info.value.operation == "persist_many"
@@ -0,0 +1,104 @@
+"""Tests for MuseumCityPopulationRepository."""
+import sys
+import pytest
+from unittest.mock import Mock
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+from museum_attendance_common.repository import MuseumCityPopulationRepository
+from museum_attendance_common.exceptions import DatabaseError
+
+
+class TestMuseumCityPopulationRepository:
+    """Tests for MuseumCityPopulationRepository."""
+
+    @pytest.fixture
+    def mock_session(self):
+        """Create a mock database session."""
+        return Mock()
+
+    @pytest.fixture
+    def repository(self, mock_session):
+        """Create a MuseumCityPopulationRepository with mock session."""
+        return MuseumCityPopulationRepository(mock_session)
+
+    def test_refresh_concurrently(self, repository, mock_session):
+        """Test that the view is refreshed without blocking its readers by default."""
+        repository.refresh()
+
+        assert str(mock_session.execute.call_args.args[0]) == "REFRESH MATERIALIZED VIEW CONCURRENTLY museum_city_population"
+
+    def test_refresh_blocking(self, repository, mock_session):
+        """Test that a view never populated can be refreshed without CONCURRENTLY."""
+        repository.refresh(concurrently=False)
+
+        assert str(mock_session.execute.call_args.args[0]) == "REFRESH MATERIALIZED VIEW museum_city_population"
+
+    def test_refresh_database_error(self, repository, mock_session):
+        """Test that refresh errors are wrapped into DatabaseError."""
+        mock_session.execute.side_effect = SQLAlchemyError("cannot refresh materialized view concurrently")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            repository.refresh()
+
+        assert exc_info.value.operation == "refresh"
+
+    def test_get_all_reads_the_view(self, repository, mock_session):
+        """Test that the dataset is read from the view alone, without joining the tables."""
+        mock_session.execute.return_value = [("Louvre", 8_700_000, "Paris", 2_165_000, "France")]
+
+        assert repository.get_all() == [("Louvre", 8_700_000, "Paris", 2_165_000, "France")]
+        sql = str(mock_session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "FROM museum_city_population ORDER BY museum_city_population.museum_id" in sql
+        assert "JOIN" not in sql
+
+    def test_get_all_database_error(self, repository, mock_session):
+        """Test that query errors are wrapped into DatabaseError."""
+        mock_session.execute.side_effect = SQLAlchemyError("relation \"museum_city_population\" does not exist")
+
+        with pytest.raises(DatabaseError, match="Failed to query museum city population"):
+            repository.get_all()
+
+    def test_get_columns_selects_only_the_given_columns(self, repository, mock_session):
+        """Test that only the requested columns are selected, in the requested order."""
+        mock_session.execute.return_value = [(8_700_000, 2_165_000), (3_200_000, 2_165_000)]
+
+        assert repository.get_columns(["visitor_count", "city_population"]) == [(8_700_000, 2_165_000), (3_200_000, 2_165_000)]
+        sql = str(mock_session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert sql.startswith("SELECT museum_city_population.visitor_count, museum_city_population.city_population \nFROM museum_city_population")
+
+    def test_get_columns_unknown_column(self, repository, mock_session):
+        """Test that a column the view does not have is rejected before querying."""
+        with pytest.raises(ValueError, match="Unknown museum_city_population columns: museum_id"):
+            repository.get_columns(["visitor_count", "museum_id"])
+
+        mock_session.execute.assert_not_called()
+
+    def test_get_arrays(self, repository, mock_session):
+        """Test that each column becomes a typed NumPy array."""
+        numpy = pytest.importorskip("numpy")
+        mock_session.execute.return_value = [("Louvre", 8_700_000), ("Orsay", 3_200_000)]
+
+        arrays = repository.get_arrays(["museum_name", "visitor_count"])
+
+        assert arrays["museum_name"].tolist() == ["Louvre", "Orsay"]
+        assert arrays["visitor_count"].dtype == numpy.int64
+        assert arrays["visitor_count"].tolist() == [8_700_000, 3_200_000]
+
+    def test_get_arrow(self, repository, mock_session):
+        """Test that the columns become a typed Arrow table, empty when the view is."""
+        pyarrow = pytest.importorskip("pyarrow")
+        mock_session.execute.return_value = []
+
+        table = repository.get_arrow(["city_name", "city_population"])
+
+        assert table.num_rows == 0
+        assert table.schema == pyarrow.schema([("city_name", pyarrow.string()), ("city_population", pyarrow.int64())])
+
+    def test_get_arrays_without_numpy(self, repository, mock_session, monkeypatch):
+        """Test that a missing analytics extra is reported with the way to install it."""
+        monkeypatch.setitem(sys.modules, "numpy", None)
+
+        with pytest.raises(ModuleNotFoundError, match=r"install museum-attendance-common\[analytics\]"):
+            repository.get_arrays()
+
+        mock_session.execute.assert_not_called()
@@ -1,6 +1,9 @@
 """Tests for MuseumRepository."""
 import pytest
 from unittest.mock import Mock
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+from museum_attendance_common.exceptions import DatabaseError
 from museum_attendance_common.repository import MuseumRepository
 from museum_attendance_common.model import Museum, City
 
@@ -30,24 +33,16 @@ class TestMuseumRepository:
         expected_museum = Museum(name="Louvre", city_id=1)
         expected_museum.id = 1
         
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = expected_museum
+        mock_session.scalar.return_value = expected_museum
         
         result = repository.get_by_name("Louvre")
         
         assert result == expected_museum
-        mock_session.query.assert_called_once_with(Museum)
+        assert "WHERE museum.name = " in str(mock_session.scalar.call_args.args[0])
 
     def test_get_by_name_not_found(self, repository, mock_session):
         """Test get_by_name when museum doesn't exist."""
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = None
+        mock_session.scalar.return_value = None
         
         result = repository.get_by_name("NonExistent")
         
@@ -55,11 +50,7 @@ class TestMuseumRepository:
 
     def test_persist_museum_new(self, repository, mock_session, mock_city):
         """Test persisting a new museum."""
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = None  # Museum doesn't exist
+        mock_session.scalar.return_value = None  # Museum doesn't exist
         
         museum, created, updated = repository.persist("British Museum", 6_000_000, "https://example.com", mock_city)
         
@@ -77,11 +68,7 @@ class TestMuseumRepository:
         existing_museum = Museum(name="MET", city_id=mock_city.id, number_of_visitors=6_000_000)
         existing_museum.id = 2
         
-        mock_query = Mock()
-        mock_filter = Mock()
-        mock_session.query.return_value = mock_query
-        mock_query.filter.return_value = mock_filter
-        mock_filter.first.return_value = existing_museum  # Museum exists
+        mock_session.scalar.return_value = existing_museum  # Museum exists
         
         museum, created, updated = repository.persist("MET", 7_000_000, "https://example.com/met", mock_city)
         
@@ -91,3 +78,144 @@ class TestMuseumRepository:
         assert updated is True
         mock_session.add.assert_not_called()
         mock_session.flush.assert_called_once()
+
+    def test_persist_museum_unchanged(self, repository, mock_session, mock_city):
+        """Test that persisting a museum with the same number of visitors writes nothing."""
+        existing_museum = Museum(name="MET", city_id=mock_city.id, number_of_visitors=6_000_000)
+        mock_session.scalar.return_value = existing_museum
+
+        museum, created, updated = repository.persist("MET", 6_000_000, "https://example.com/met", mock_city)
+
+        assert museum == existing_museum
+        assert (created, updated) == (False, False)
+        mock_session.flush.assert_not_called()
+
+    def test_persist_many_upserts_batch_in_one_statement(self, repository, mock_session, mock_city):
+        """Test that a batch of museums is upserted with a single statement reporting inserts and updates."""
+        louvre = Museum(name="Louvre", city_id=mock_city.id)
+        orsay = Museum(name="Orsay", city_id=mock_city.id)
+        mock_session.execute.return_value.all.return_value = [(orsay, False), (louvre, True)]
+
+        results = repository.persist_many([
+            dict(name="Louvre", number_of_visitors=8_700_000, reference_url="Louvre", city=mock_city),
+            dict(name="Orsay", number_of_visitors=3_200_000, reference_url="Orsay", city=mock_city),
+        ])
+
+        assert results == [(louvre, True, False), (orsay, False, True)]
+        mock_session.execute.assert_called_once()
+        sql = str(mock_session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "INSERT INTO museum" in sql
+        assert "ON CONFLICT (name) DO UPDATE SET number_of_visitors = excluded.number_of_visitors" in sql
+        assert "WHERE museum.number_of_visitors IS DISTINCT FROM excluded.number_of_visitors" in sql
+        assert "xmax = 0" in sql
+        mock_session.scalars.assert_not_called()
+
+    def test_persist_many_loads_unchanged_museums(self, repository, mock_session, mock_city):
+        """Test that museums skipped by the upsert because nothing changed are loaded and reported unchanged."""
+        louvre = Museum(name="Louvre", city_id=mock_city.id)
+        orsay = Museum(name="Orsay", city_id=mock_city.id)
+        mock_session.execute.return_value.all.return_value = [(louvre, False)]
+        mock_session.scalars.return_value = [orsay]
+
+        results = repository.persist_many([
+            dict(name="Louvre", number_of_visitors=8_700_000, reference_url="Louvre", city=mock_city),
+            dict(name="Orsay", number_of_visitors=3_200_000, reference_url="Orsay", city=mock_city),
+        ])
+
+        assert results == [(louvre, False, True), (orsay, False, False)]
+        statement = mock_session.scalars.call_args.args[0]
+        assert statement.compile(dialect=postgresql.dialect()).params["names"] == ["Orsay"]
+
+    def test_persist_many_keeps_last_duplicate(self, repository, mock_session, mock_city):
+        """Test that a museum listed twice in a batch is upserted once with its last values."""
+        louvre = Museum(name="Louvre", city_id=mock_city.id)
+        mock_session.execute.return_value.all.return_value = [(louvre, True)]
+
+        results = repository.persist_many([
+            dict(name="Louvre", number_of_visitors=1, reference_url="Louvre", city=mock_city),
+            dict(name="Louvre", number_of_visitors=2, reference_url="Louvre", city=mock_city),
+        ])
+
+        assert results == [(louvre, True, False)]
+        statement = mock_session.execute.call_args.args[0]
+        params = statement.compile(dialect=postgresql.dialect()).params
+        assert params["numbers_of_visitors"] == [2]
+        assert params["names"] == ["Louvre"]
+
+    def test_persist_many_statement_is_prepared_once(self, repository, mock_session, mock_city):
+        """Test that the upsert has the same text whatever the batch size, so it is prepared once."""
+        louvre = Museum(name="Louvre", city_id=mock_city.id)
+        orsay = Museum(name="Orsay", city_id=mock_city.id)
+        mock_session.execute.return_value.all.side_effect = [[(louvre, True)], [(louvre, False), (orsay, True)]]
+
+        repository.persist_many([dict(name="Louvre", number_of_visitors=1, reference_url="Louvre", city=mock_city)])
+        repository.persist_many([
+            dict(name="Louvre", number_of_visitors=1, reference_url="Louvre", city=mock_city),
+            dict(name="Orsay", number_of_visitors=2, reference_url="Orsay", city=mock_city),
+        ])
+
+        first, second = [str(call.args[0].compile(dialect=postgresql.dialect())) for call in mock_session.execute.call_args_list]
+        assert first == second
+        assert "unnest" in first
+        assert all(call.args[0].get_execution_options()["prepare"] for call in mock_session.execute.call_args_list)
+
+    def test_persist_many_empty_batch(self, repository, mock_session):
+        """Test that an empty batch does not reach the database."""
+        assert repository.persist_many([]) == []
+        mock_session.execute.assert_not_called()
+
+    def test_persist_many_database_error(self, repository, mock_session, mock_city):
+        """Test that upsert errors are wrapped into DatabaseError."""
+        mock_session.execute.side_effect = SQLAlchemyError("Connection lost")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            repository.persist_many([dict(name="Louvre", number_of_visitors=1, reference_url="Louvre", city=mock_city)])
+
+        assert exc_info.value.operation == "persist_many"
+
+    def test_get_by_attributes_uses_containment(self, repository, mock_session):
+        """Test that attribute values are matched with a single @> query on museum.attributes."""
+        louvre = Museum(name="Louvre", city_id=1)
+        mock_session.scalars.return_value = [louvre]
+
+        assert repository.get_by_attributes({"type": "Art museum"}) == [louvre]
+        sql = str(mock_session.scalars.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "WHERE museum.attributes @> %(attributes_1)s::JSONB" in sql
+
+    def test_get_by_attribute_key_uses_key_operator(self, repository, mock_session):
+        """Test that museums having an attribute are found with a single ? query on museum.attributes."""
+        mock_session.scalars.return_value = []
+
+        assert repository.get_by_attribute_key("collection_size") == []
+        sql = str(mock_session.scalars.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "WHERE museum.attributes ? %(attributes_1)s" in sql
+
+    def test_get_by_attributes_database_error(self, repository, mock_session):
+        """Test that query errors are wrapped into DatabaseError."""
+        mock_session.scalars.side_effect = SQLAlchemyError("Connection lost")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            repository.get_by_attributes({"type": "Art museum"})
+
+        assert exc_info.value.operation == "get_by_attributes"
+
+    def test_stream_museums_uses_server_side_cursor(self, repository, mock_session):
+        """Test that museums are fetched in batches and their attributes loaded by a separate IN query."""
+        louvre, orsay = Museum(name="Louvre", city_id=1), Museum(name="Orsay", city_id=1)
+        mock_session.scalars.return_value = iter([louvre, orsay])
+
+        assert list(repository.stream_museums(include_attributes=True, batch_size=500)) == [louvre, orsay]
+        statement = mock_session.scalars.call_args.args[0]
+        assert statement.get_execution_options()["yield_per"] == 500
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        assert "LEFT OUTER JOIN city" in sql
+        assert "museum_attributes" not in sql
+
+    def test_stream_museums_database_error(self, repository, mock_session):
+        """Test that errors while streaming are wrapped into DatabaseError."""
+        mock_session.scalars.side_effect = SQLAlchemyError("Connection lost")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            list(repository.stream_museums())
+
+        assert exc_info.value.operation == "stream_museums"
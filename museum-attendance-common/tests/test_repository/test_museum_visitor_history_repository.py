@@ -0,0 +1,107 @@
+"""Tests for MuseumVisitorHistoryRepository."""
+import pytest
+from datetime import datetime
+from unittest.mock import Mock
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+from museum_attendance_common.repository import MuseumVisitorHistoryRepository
+from museum_attendance_common.model import ImportLog
+from museum_attendance_common.enumeration import ImportStatus
+from museum_attendance_common.exceptions import DatabaseError
+
+
+class TestMuseumVisitorHistoryRepository:
+    """Tests for MuseumVisitorHistoryRepository."""
+
+    @pytest.fixture
+    def mock_session(self):
+        """Create a mock database session."""
+        return Mock()
+
+    @pytest.fixture
+    def repository(self, mock_session):
+        """Create a MuseumVisitorHistoryRepository with mock session."""
+        return MuseumVisitorHistoryRepository(mock_session)
+
+    @pytest.fixture
+    def import_log(self):
+        """Create an in-progress ImportLog triggered in 2031."""
+        import_log = ImportLog(status=ImportStatus.IN_PROGRESS.value, triggered_at=datetime(2031, 3, 14, 9, 30))
+        import_log.id = 7
+        return import_log
+
+    @staticmethod
+    def compile(statement):
+        """Render a statement as PostgreSQL SQL."""
+        return str(statement.compile(dialect=postgresql.dialect()))
+
+    def test_create_partition(self, repository, mock_session):
+        """Test that the partition of a year covers that year and is only created once per repository."""
+        repository.create_partition(2031)
+        repository.create_partition(2031)
+
+        mock_session.execute.assert_called_once()
+        statement = str(mock_session.execute.call_args.args[0])
+        assert "CREATE TABLE IF NOT EXISTS museum_visitor_history_2031 PARTITION OF museum_visitor_history" in statement
+        assert "FROM ('2031-01-01') TO ('2032-01-01')" in statement
+
+    def test_persist_many_records_current_counts(self, repository, mock_session, import_log):
+        """Test that the counts of the museums are copied in one INSERT ... SELECT at the time the job was triggered."""
+        mock_session.execute.return_value.rowcount = 2
+
+        recorded = repository.persist_many(import_log, ["Louvre", "Orsay", "Louvre"])
+
+        assert recorded == 2
+        partition_statement, insert_statement = (call.args[0] for call in mock_session.execute.call_args_list)
+        assert "museum_visitor_history_2031" in str(partition_statement)
+        sql = self.compile(insert_statement)
+        assert "INSERT INTO museum_visitor_history (museum_id, import_log_id, number_of_visitors, recorded_at) SELECT museum.id" in sql
+        assert "museum.number_of_visitors IS NOT NULL" in sql
+        assert "ON CONFLICT DO NOTHING" in sql
+        params = insert_statement.compile(dialect=postgresql.dialect()).params
+        assert params["name_1"] == ["Louvre", "Orsay"]
+        assert datetime(2031, 3, 14, 9, 30) in params.values()
+
+    def test_persist_many_nothing(self, repository, mock_session, import_log):
+        """Test that an empty batch does not reach the database."""
+        assert repository.persist_many(import_log, []) == 0
+        mock_session.execute.assert_not_called()
+
+    def test_persist_many_database_error(self, repository, mock_session, import_log):
+        """Test that persistence errors are wrapped into DatabaseError."""
+        mock_session.execute.side_effect = SQLAlchemyError("no partition of relation \"museum_visitor_history\" found for row")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            repository.persist_many(import_log, ["Louvre"])
+
+        assert exc_info.value.operation == "create_partition"
+
+    def test_persist_staged_reads_the_staging_table(self, repository, mock_session, import_log):
+        """Test that the staged museums are recorded with one INSERT ... SELECT reading their names from the staging table."""
+        mock_session.execute.return_value.rowcount = 3
+
+        assert repository.persist_staged(import_log) == 3
+
+        sql = self.compile(mock_session.execute.call_args.args[0])
+        assert "INSERT INTO museum_visitor_history (museum_id, import_log_id, number_of_visitors, recorded_at) SELECT museum.id" in sql
+        assert "museum.name IN (SELECT staging_museum.name" in sql
+        assert "ON CONFLICT DO NOTHING" in sql
+
+    def test_get_visitors_over_time(self, repository, mock_session):
+        """Test that the time range bounds recorded_at so only the partitions of its years are scanned."""
+        mock_session.execute.return_value = [("Louvre", datetime(2030, 1, 5), 8_700_000), ("Louvre", datetime(2031, 3, 14), 8_900_000)]
+
+        rows = repository.get_visitors_over_time(["Louvre"], start=datetime(2030, 1, 1), end=datetime(2032, 1, 1))
+
+        assert rows == [("Louvre", datetime(2030, 1, 5), 8_700_000), ("Louvre", datetime(2031, 3, 14), 8_900_000)]
+        sql = self.compile(mock_session.execute.call_args.args[0])
+        assert "museum_visitor_history.recorded_at >= %(recorded_at_1)s" in sql
+        assert "museum_visitor_history.recorded_at < %(recorded_at_2)s" in sql
+        assert "ORDER BY museum.name, museum_visitor_history.recorded_at" in sql
+
+    def test_get_visitors_over_time_database_error(self, repository, mock_session):
+        """Test that query errors are wrapped into DatabaseError."""
+        mock_session.execute.side_effect = SQLAlchemyError("Connection lost")
+
+        with pytest.raises(DatabaseError, match="Failed to query visitor history"):
+            repository.get_visitors_over_time()
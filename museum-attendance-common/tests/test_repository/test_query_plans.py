@@ -0,0 +1,177 @@
+"""Query plans of the repository queries on a seeded Postgres database.
+
+The migrations of sql/ are applied to a schema of TEST_DATABASE_URL, seeded with enough rows that the
+planner prefers an index whenever one fits. Every statement a repository method sends is then run
+through EXPLAIN, and a sequential scan of a large table fails the test.
+"""
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from museum_attendance_common.enumeration import PageType
+from museum_attendance_common.model import City, Country, ImportLog, Museum
+from museum_attendance_common.repository import (
+    CountryRepository, CityRepository, MuseumRepository, MuseumAttributesRepository, ImportCheckpointRepository,
+    CrawlTaskRepository, MuseumVisitorHistoryRepository
+)
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+MIGRATIONS = Path(__file__).parents[3] / "sql"
+SCHEMA = "query_plans"
+
+# Tables seeded with enough rows that a sequential scan means a missing or unused index
+LARGE_TABLES = re.compile(r"^(city|museum|museum_attributes|import_checkpoint|crawl_task|museum_visitor_history(_\d{4})?)$")
+
+SEED = """
+    INSERT INTO country (name) SELECT 'Country ' || i FROM generate_series(1, 200) i;
+    INSERT INTO city (name, population, country_id) SELECT 'City ' || i, i * 1000, i % 200 + 1 FROM generate_series(1, 10000) i;
+    INSERT INTO museum (name, number_of_visitors, city_id) SELECT 'Museum ' || i, i * 10, i % 10000 + 1 FROM generate_series(1, 50000) i;
+    INSERT INTO museum_attributes (museum_id, attribute_key, attribute_value)
+    SELECT museum_id, 'key ' || k, 'value ' || museum_id * k % 997 FROM generate_series(1, 50000) museum_id, generate_series(1, 4) k;
+    UPDATE museum SET attributes = synced.attributes
+    FROM (SELECT museum_id, jsonb_object_agg(attribute_key, attribute_value) AS attributes FROM museum_attributes GROUP BY museum_id) AS synced
+    WHERE museum.id = synced.museum_id;
+    -- Three years of monthly imports, the last one still crawling
+    INSERT INTO import_log (triggered_at, status)
+    SELECT timestamp '2024-01-01' + (i - 1) * interval '1 month', CASE WHEN i = 36 THEN 'IN_PROGRESS' ELSE 'SUCCESS' END
+    FROM generate_series(1, 36) i;
+    INSERT INTO import_checkpoint (import_log_id, page_type, page_key)
+    SELECT import_log_id, 'MUSEUM', 'Museum ' || i FROM generate_series(1, 36) import_log_id, generate_series(1, 2000) i;
+    INSERT INTO crawl_task (import_log_id, page_type, page_key, status, claimed_by)
+    SELECT import_log_id, 'MUSEUM', 'Museum ' || i, CASE WHEN import_log_id = 36 AND i > 1000 THEN 'PENDING' ELSE 'DONE' END, 'worker-' || i % 4
+    FROM generate_series(1, 36) import_log_id, generate_series(1, 2000) i;
+    INSERT INTO museum_visitor_history (museum_id, import_log_id, number_of_visitors, recorded_at)
+    SELECT museum.id, import_log.id, museum.number_of_visitors, import_log.triggered_at
+    FROM museum CROSS JOIN import_log WHERE museum.id <= 10000 ORDER BY import_log.triggered_at;
+    ANALYZE country, city, museum, museum_attributes, import_log, import_checkpoint, crawl_task, museum_visitor_history;
+"""
+
+pytestmark = pytest.mark.skipif(TEST_DATABASE_URL is None, reason="set TEST_DATABASE_URL to a local Postgres database to run")
+
+
+def migration_version(path):
+    """Version of a Flyway migration, V0_10 comes after V0_9."""
+    return tuple(int(part) for part in re.match(r"V([\d_]+)__", path.name).group(1).split("_"))
+
+
+def explain(connection, statement, parameters):
+    """Plan of a statement as sent to the database, without running it."""
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        return cursor.fetchone()[0][0]["Plan"]
+    finally:
+        cursor.close()
+
+
+def scans(plan):
+    """(node type, relation) of every scan in a plan."""
+    if "Relation Name" in plan:
+        yield plan["Node Type"], plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from scans(child)
+
+
+@pytest.fixture(scope="module")
+def connection():
+    """Connection to a schema with the migrations applied and the seed committed, dropped afterwards."""
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.connect() as connection:
+        connection.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        connection.exec_driver_sql(f"CREATE SCHEMA {SCHEMA}")
+        connection.exec_driver_sql(f"SET search_path TO {SCHEMA}")
+        # Migrations are run as Flyway runs them, whole scripts on the DBAPI cursor
+        cursor = connection.connection.cursor()
+        for migration in sorted(MIGRATIONS.glob("V*.sql"), key=migration_version):
+            cursor.execute(migration.read_text())
+        cursor.execute(SEED)
+        cursor.close()
+        connection.commit()
+        yield connection
+        connection.rollback()
+        connection.exec_driver_sql(f"DROP SCHEMA {SCHEMA} CASCADE")
+        connection.commit()
+    engine.dispose()
+
+
+@pytest.fixture
+def session(connection):
+    """Session whose writes are rolled back after the test."""
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint", autoflush=False)
+    yield session
+    session.close()
+    transaction.rollback()
+
+
+@pytest.fixture
+def statements(connection):
+    """Statements sent on the connection during the test, with their parameters."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if re.match(r"\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", statement, re.IGNORECASE):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(connection, "before_cursor_execute", record)
+    yield statements
+    event.remove(connection, "before_cursor_execute", record)
+
+
+QUERIES = {
+    "country.get_by_name": lambda session: CountryRepository(session).get_by_name("Country 150"),
+    "country.get_by_names": lambda session: CountryRepository(session).get_by_names(["Country 1", "Country 150"]),
+    "country.add": lambda session: CountryRepository(session).add("Country 151"),
+    "city.get_by_name": lambda session: CityRepository(session).get_by_name("City 4200"),
+    "city.get_by_names": lambda session: CityRepository(session).get_by_names(["City 1", "City 4200"]),
+    "city.persist": lambda session: CityRepository(session).persist("City 4200", 1, None, session.get(Country, 1)),
+    "museum.get_by_name": lambda session: MuseumRepository(session).get_by_name("Museum 42000"),
+    "museum.persist_many": lambda session: MuseumRepository(session).persist_many([
+        dict(name="Museum 42000", number_of_visitors=420_000, reference_url=None, city=session.get(City, 1)),
+        dict(name="Museum 42001", number_of_visitors=1, reference_url=None, city=session.get(City, 1)),
+        dict(name="New Museum", number_of_visitors=1, reference_url=None, city=session.get(City, 1)),
+    ]),
+    "museum.get_by_attributes": lambda session: MuseumRepository(session).get_by_attributes({"key 2": "value 42"}),
+    "museum.get_by_attribute_key": lambda session: MuseumRepository(session).get_by_attribute_key("key 9"),
+    "museum_attributes.get_by_museum_and_key": lambda session: MuseumAttributesRepository(session).get_by_museum_and_key(session.get(Museum, 42000), "key 2"),
+    "museum_attributes.persist_many": lambda session: MuseumAttributesRepository(session).persist_many([
+        (session.get(Museum, 42000), {"key 1": "value 1", "key 2": "new value", "key 5": "value 5"}),
+    ]),
+    "import_checkpoint.get_by_import_log": lambda session: ImportCheckpointRepository(session).get_by_import_log(session.get(ImportLog, 12)),
+    "import_checkpoint.get_by_key": lambda session: ImportCheckpointRepository(session).get_by_key(session.get(ImportLog, 12), PageType.MUSEUM, "Museum 42"),
+    "import_checkpoint.mark_completed": lambda session: ImportCheckpointRepository(session).mark_completed(session.get(ImportLog, 36), PageType.MUSEUM, "Museum 42"),
+    "crawl_task.enqueue": lambda session: CrawlTaskRepository(session).enqueue(session.get(ImportLog, 36), PageType.MUSEUM, "Museum 42"),
+    "crawl_task.claim": lambda session: CrawlTaskRepository(session).claim(session.get(ImportLog, 36), "worker-9", 5, 300, 3),
+    "crawl_task.get_completed": lambda session: CrawlTaskRepository(session).get_completed(session.get(ImportLog, 36), PageType.MUSEUM),
+    "crawl_task.count_unfinished": lambda session: CrawlTaskRepository(session).count_unfinished(session.get(ImportLog, 36)),
+    "crawl_task.count_by_status": lambda session: CrawlTaskRepository(session).count_by_status(session.get(ImportLog, 36)),
+    "crawl_task.count_by_worker": lambda session: CrawlTaskRepository(session).count_by_worker(session.get(ImportLog, 36)),
+    "crawl_task.get_active_import_log": lambda session: CrawlTaskRepository(session).get_active_import_log(),
+    "museum_visitor_history.persist_many": lambda session: MuseumVisitorHistoryRepository(session).persist_many(session.get(ImportLog, 36), ["Museum 42000", "Museum 42001"]),
+    "museum_visitor_history.get_visitors_over_time": lambda session: MuseumVisitorHistoryRepository(session).get_visitors_over_time(["Museum 4200"]),
+}
+
+
+@pytest.mark.parametrize("query", QUERIES.values(), ids=QUERIES.keys())
+def test_no_sequential_scan_of_large_tables(connection, session, statements, query):
+    """Test that the statements of a repository method only reach large tables through an index."""
+    query(session)
+
+    assert statements
+    for statement, parameters in statements:
+        sequential_scans = [relation for node_type, relation in scans(explain(connection, statement, parameters)) if node_type == "Seq Scan" and LARGE_TABLES.match(relation)]
+        assert not sequential_scans, f"Sequential scan of {', '.join(sequential_scans)} in:\n{statement}"
+
+
+def test_visitors_over_time_only_scans_the_partitions_of_the_range(connection, session, statements):
+    """Test that a time range prunes the visitor history partitions of the other years."""
+    MuseumVisitorHistoryRepository(session).get_visitors_over_time(start=datetime(2025, 1, 1), end=datetime(2026, 1, 1))
+
+    (statement, parameters), = statements
+    relations = {relation for _, relation in scans(explain(connection, statement, parameters))}
+    assert relations == {"museum", "museum_visitor_history_2025"}
@@ -0,0 +1,51 @@
+"""Tests for the rollback caches of the repositories."""
+import gc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from museum_attendance_common.repository import AsyncCityRepository, CityRepository, CountryRepository
+from museum_attendance_common.repository.rollback_caches import ROLLBACK_CACHES_KEY
+
+
+class TestRollbackCaches:
+    """Tests for clear_on_rollback."""
+
+    def test_one_listener_per_session(self):
+        """Test that repositories created on one session share a single rollback listener."""
+        session = Session()
+
+        repositories = [CountryRepository(session), CountryRepository(session), CityRepository(session)]
+
+        assert len(session.dispatch.after_soft_rollback) == 1
+        assert set(session.info[ROLLBACK_CACHES_KEY]) == set(repositories)
+
+    def test_async_repositories_listen_on_the_sync_session(self):
+        """Test that the async repositories register on the session wrapped by the AsyncSession."""
+        session = AsyncSession()
+
+        AsyncCityRepository(session)
+        AsyncCityRepository(session)
+
+        assert len(session.sync_session.dispatch.after_soft_rollback) == 1
+
+    def test_rollback_clears_every_cache(self):
+        """Test that a rollback makes every repository of the session query its entities again."""
+        session = Session()
+        repositories = [CountryRepository(session), CityRepository(session)]
+        clear_cache_calls = []
+        for repository in repositories:
+            repository.clear_cache = lambda repository=repository: clear_cache_calls.append(repository)
+
+        session.begin()
+        session.rollback()
+
+        assert sorted(clear_cache_calls, key=id) == sorted(repositories, key=id)
+
+    def test_repositories_are_not_kept_alive(self):
+        """Test that the session does not keep the repositories created on it, nor their caches."""
+        session = Session()
+        CountryRepository(session)
+        CityRepository(session)
+        gc.collect()
+
+        assert len(session.info[ROLLBACK_CACHES_KEY]) == 0
+        assert len(session.dispatch.after_soft_rollback) == 1
@@ -0,0 +1,129 @@
+"""Tests for StagingRepository."""
+import pytest
+from unittest.mock import MagicMock, Mock
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects import postgresql
+from museum_attendance_common.repository import StagingRepository
+from museum_attendance_common.repository.staging_repository import _copy_value
+from museum_attendance_common.exceptions import DatabaseError
+
+
+class TestStagingRepository:
+    """Tests for StagingRepository."""
+
+    @pytest.fixture
+    def mock_session(self):
+        """Create a mock database session."""
+        return Mock()
+
+    @pytest.fixture
+    def repository(self, mock_session):
+        """Create a StagingRepository with mock session."""
+        return StagingRepository(mock_session)
+
+    @pytest.fixture
+    def cursor(self, mock_session):
+        """The DBAPI cursor used for COPY, recording the data it was given."""
+        cursor = mock_session.connection.return_value.connection.cursor.return_value
+        cursor.copied = []
+        cursor.copy_expert.side_effect = lambda sql, buffer: cursor.copied.append((sql, buffer.read()))
+        return cursor
+
+    def test_create_tables(self, repository, mock_session):
+        """Test that the staging tables are temporary and dropped with the transaction."""
+        repository.create_tables()
+
+        statements = [str(call.args[0]) for call in mock_session.execute.call_args_list]
+        assert len(statements) == 3
+        assert all("CREATE TEMPORARY TABLE" in statement and "ON COMMIT DROP" in statement for statement in statements)
+
+    def test_copy_museums_streams_rows_with_copy(self, repository, cursor):
+        """Test that staged rows are sent with a single COPY FROM STDIN in the text format."""
+        copied = repository.copy_museums([
+            ("Louvre", 8_700_000, "Louvre", "Paris", True),
+            ("Unknown Museum", None, None, "Paris", False),
+        ])
+
+        assert copied == 2
+        sql, data = cursor.copied[0]
+        assert sql == "COPY staging_museum (name, number_of_visitors, reference_url, city_name, attributes_fetched) FROM STDIN"
+        assert data == "Louvre\t8700000\tLouvre\tParis\tt\nUnknown Museum\t\\N\t\\N\tParis\tf\n"
+        cursor.close.assert_called_once()
+
+    def test_copy_with_psycopg3_cursor(self, repository, mock_session):
+        """Test that rows are written through cursor.copy() on psycopg 3, which has no copy_expert."""
+        cursor = MagicMock(spec=["copy", "close"])
+        mock_session.connection.return_value.connection.cursor.return_value = cursor
+
+        assert repository.copy_cities([("Paris", 2_165_000, "Paris", "France")]) == 1
+
+        cursor.copy.assert_called_once_with("COPY staging_city (name, population, reference_url, country_name) FROM STDIN")
+        cursor.copy.return_value.__enter__.return_value.write.assert_called_once_with("Paris\t2165000\tParis\tFrance\n")
+        cursor.close.assert_called_once()
+
+    def test_copy_nothing_skips_copy(self, repository, cursor):
+        """Test that an empty batch does not reach the database."""
+        assert repository.copy_attributes([]) == 0
+        cursor.copy_expert.assert_not_called()
+
+    def test_copy_error(self, repository, cursor):
+        """Test that COPY errors are wrapped into DatabaseError."""
+        cursor.copy_expert.side_effect = Exception("invalid input syntax")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            repository.copy_cities([("Paris", 2_165_000, "Paris", "France")])
+
+        assert exc_info.value.entity_id == "staging_city"
+        assert exc_info.value.operation == "copy"
+
+    def test_merge_returns_counters(self, repository, mock_session):
+        """Test that the merge runs its set-based statements and reports the counts of each entity."""
+        analyze_result, countries_result, cities_result, museums_result, deleted_result, attributes_result, fetched_result, sync_result = (Mock() for _ in range(8))
+        countries_result.rowcount = 1
+        cities_result.one.return_value = (2, 3)
+        museums_result.one.return_value = (4, 5)
+        deleted_result.rowcount = 6
+        attributes_result.one.return_value = (7, 8)
+        fetched_result.scalars.return_value = [9, 10]
+        mock_session.execute.side_effect = [analyze_result, countries_result, cities_result, museums_result, deleted_result, attributes_result, fetched_result, sync_result]
+
+        counters = repository.merge()
+
+        assert counters == {
+            "inserted_countries": 1,
+            "updated_countries": 0,
+            "inserted_cities": 2,
+            "updated_cities": 3,
+            "inserted_museums": 4,
+            "updated_museums": 5,
+            "inserted_attributes": 7,
+            "updated_attributes": 8,
+            "deleted_attributes": 6,
+        }
+        statements = [str(call.args[0]) for call in mock_session.execute.call_args_list]
+        assert "ON CONFLICT (name) DO NOTHING" in statements[1]
+        assert "ON CONFLICT (name) DO UPDATE" in statements[3]
+        assert "IS DISTINCT FROM" in statements[2]
+        assert "WHERE museum.number_of_visitors IS DISTINCT FROM EXCLUDED.number_of_visitors" in statements[3]
+        assert "WHERE museum_attributes.attribute_value IS DISTINCT FROM EXCLUDED.attribute_value" in statements[5]
+        assert "DELETE FROM museum_attributes" in statements[4]
+        assert "ON CONFLICT (museum_id, attribute_key) DO UPDATE" in statements[5]
+        assert "WHERE staging_museum.attributes_fetched" in statements[6]
+        assert "UPDATE museum SET attributes = synced.attributes" in statements[7]
+        assert mock_session.execute.call_args_list[7].args[0].compile(dialect=postgresql.dialect()).params["museum_ids"] == [9, 10]
+
+    def test_merge_database_error(self, repository, mock_session):
+        """Test that merge errors are wrapped into DatabaseError."""
+        mock_session.execute.side_effect = SQLAlchemyError("relation \"staging_city\" does not exist")
+
+        with pytest.raises(DatabaseError) as exc_info:
+            repository.merge()
+
+        assert exc_info.value.operation == "merge"
+
+    def test_copy_value_escapes_text_format(self):
+        """Test that values are escaped for the text format of COPY."""
+        assert _copy_value(None) == "\\N"
+        assert _copy_value(True) == "t"
+        assert _copy_value(12) == "12"
+        assert _copy_value("a\tb\nc\\d\re") == "a\\tb\\nc\\\\d\\re"
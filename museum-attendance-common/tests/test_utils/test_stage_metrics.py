@@ -0,0 +1,89 @@
+"""Tests for stage metrics."""
+import asyncio
+import pytest
+from museum_attendance_common.utils import StageMetrics, stage_metrics, measured
+
+
+class TestStageMetrics:
+    """Tests for StageMetrics."""
+
+    def test_report_aggregates_samples(self):
+        """Test count, total, percentiles, max and bytes of a stage."""
+        metrics = StageMetrics()
+        for seconds in [0.4, 0.1, 0.3, 0.2, 1.0]:
+            metrics.record("fetch.city_page", seconds, size=100)
+
+        report = metrics.report()
+
+        assert report["fetch.city_page"] == {
+            "count": 5,
+            "total": 2.0,
+            "p50": 0.3,
+            "p95": 1.0,
+            "max": 1.0,
+            "bytes": 500,
+        }
+
+    def test_report_single_sample(self):
+        """Test that percentiles of a single sample are that sample."""
+        metrics = StageMetrics()
+        metrics.record("collect_data", 12.5)
+
+        assert metrics.report()["collect_data"]["p50"] == 12.5
+        assert metrics.report()["collect_data"]["p95"] == 12.5
+
+    def test_measure_records_size(self):
+        """Test that the size set inside the measured block is recorded."""
+        metrics = StageMetrics()
+
+        with metrics.measure("fetch.list_page") as sample:
+            sample.size = 2048
+
+        report = metrics.report()
+        assert report["fetch.list_page"]["count"] == 1
+        assert report["fetch.list_page"]["bytes"] == 2048
+
+    def test_measure_records_failures(self):
+        """Test that a block raising an exception is still measured."""
+        metrics = StageMetrics()
+
+        with pytest.raises(ValueError):
+            with metrics.measure("extract.city_page"):
+                raise ValueError("Malformed infobox")
+
+        assert metrics.report()["extract.city_page"]["count"] == 1
+
+    def test_reset(self):
+        """Test that reset discards all samples."""
+        metrics = StageMetrics()
+        metrics.record("persist.museum", 0.01)
+
+        metrics.reset()
+
+        assert metrics.report() == {}
+
+    def test_measured_decorator(self):
+        """Test that the decorator records each call in the process-wide registry."""
+        stage_metrics.reset()
+
+        @measured("repository.test.persist")
+        def persist(value):
+            return value * 2
+
+        assert persist(2) == 4
+        assert persist(3) == 6
+        assert stage_metrics.report()["repository.test.persist"]["count"] == 2
+        stage_metrics.reset()
+
+    def test_measured_decorator_awaits_coroutines(self):
+        """Test that an async function is measured until its coroutine completes."""
+        stage_metrics.reset()
+
+        @measured("repository.test.persist_async")
+        async def persist(value):
+            await asyncio.sleep(0.01)
+            return value * 2
+
+        assert asyncio.run(persist(2)) == 4
+        assert stage_metrics.report()["repository.test.persist_async"]["total"] >= 0.01
+        stage_metrics.reset()
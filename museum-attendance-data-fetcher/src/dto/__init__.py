@@ -1,9 +1,11 @@
 from .most_visited_museum_list import MostVisitedMuseumList
 from .museum import Museum
 from .city import City
+from .collection_metrics import CollectionMetrics
 
 __all__ = [
     "MostVisitedMuseumList",
     "Museum",
-    "City"
-]
\ No newline at end of file
+    "City",
+    "CollectionMetrics"
+]
@@ -0,0 +1,17 @@
+from dataclasses import dataclass, asdict, field
+from typing import Any
+
+
+@dataclass
+class CollectionMetrics:
+    museum_pages_requested: int = 0
+    city_pages_requested: int = 0
+    city_requests_avoided: int = 0
+    pages_restored_from_checkpoint: int = 0
+    concurrency: dict[str, Any] = field(default_factory=dict)
+    lists: dict[str, dict[str, int]] = field(default_factory=dict)
+    deadline_exceeded: bool = False
+    coverage: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
@@ -39,6 +39,12 @@ class Museum:
     
     def get_museum_name(self) -> str:
         return self.name
+
+    # Identifies the museum across list pages and checkpoints: its page title, or its name when it has no page
+    def get_museum_key(self) -> str:
+        if self.wikipedia_museum_details_page_title == GlobalEnum.NA.value:
+            return self.name
+        return self.wikipedia_museum_details_page_title
     
     def get_museum_visitor_count(self) -> int:
         return self.visitor_count
\ No newline at end of file
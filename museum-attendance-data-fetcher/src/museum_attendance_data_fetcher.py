@@ -1,9 +1,20 @@
 """Museum attendance data fetcher application."""
+import argparse
+import os
+import socket
 import sys
+import time
+from typing import Any, Callable, Iterable, Iterator
 
-from museum_attendance_common import Settings, get_db_session, close_db, setup_logging, get_logger, ImportStatus
-from museum_attendance_common.repository import CountryRepository, CityRepository, MuseumRepository, MuseumAttributesRepository, ImportLogRepository
-from service import DataCollectionService, PersistenceService
+from museum_attendance_common import Settings, get_db_session, close_db, setup_logging, get_logger, ImportStatus, PageType, PersistenceMode
+from museum_attendance_common.config.database import get_session_maker
+from museum_attendance_common.utils import stage_metrics
+from museum_attendance_common.model import ImportLog
+from museum_attendance_common.exceptions import DatabaseError
+from museum_attendance_common.repository import CountryRepository, CityRepository, MuseumRepository, MuseumAttributesRepository, ImportLogRepository, ImportCheckpointRepository, CrawlTaskRepository, StagingRepository, MuseumVisitorHistoryRepository, MuseumCityPopulationRepository
+from sqlalchemy.orm import Session
+from service import DataCollectionService, PersistenceService, CheckpointService, CrawlWorkerService, PartitionedPersistenceService
+from dto import CollectionMetrics, Museum as MuseumDTO
 
 # Configure logging
 settings = Settings()
@@ -12,89 +23,240 @@ setup_logging(log_level=settings.log_level)
 logger = get_logger(__name__)
 
 
-def export() -> None:
-    """Main application entry point."""
+def batched(museums: Iterable[MuseumDTO], batch_size: int) -> Iterator[list[MuseumDTO]]:
+    """Group museums in lists of batch_size as they arrive, the last one may be shorter."""
+    batch: list[MuseumDTO] = []
+    for museum_dto in museums:
+        batch.append(museum_dto)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def persist_museums(persistence_service: PersistenceService, museums: Iterable[MuseumDTO], batch_size: int | None = None, after_batch: Callable[[list[MuseumDTO]], None] | None = None, partitioned_persistence_service: PartitionedPersistenceService | None = None) -> dict[str, int]:
+    """Persist museums with their country, city and attributes.
+
+    Args:
+        persistence_service: Service writing the entities in the current session
+        museums: Museums to persist, consumed as they arrive
+        batch_size: Museums upserted per statement, defaults to the PERSIST_BATCH_SIZE setting
+        after_batch: Optional callback run after each batch of museums, e.g. to commit it
+        partitioned_persistence_service: Optional service persisting the museums and attributes of
+            each batch in parallel sessions, the countries and cities are then committed before them
+
+    Returns:
+        dict[str, int]: Inserted and updated counts per entity, as stored in the import_log result
+    """
+    batch_size = batch_size or settings.persist_batch_size
+    counters = dict.fromkeys([
+        "inserted_countries", "updated_countries",
+        "inserted_cities", "updated_cities",
+        "inserted_museums", "updated_museums",
+        "inserted_attributes", "updated_attributes", "deleted_attributes"
+    ], 0)
+
+    def persist_batch(batch: list[MuseumDTO]) -> None:
+        with stage_metrics.measure("persist.batch"):
+            persistence_service.preload(batch)
+            cities = []
+            for museum_dto in batch:
+                logger.debug(f"Persisting data for country: {museum_dto.get_country()}")
+                country, country_inserted, country_updated = persistence_service.persist_country(museum_dto.get_country())
+                counters["inserted_countries"] += country_inserted
+                counters["updated_countries"] += country_updated
+                logger.debug(f"Persisting data for city: {museum_dto.get_city()}")
+                city, city_inserted, city_updated = persistence_service.persist_city(museum_dto, country)
+                counters["inserted_cities"] += city_inserted
+                counters["updated_cities"] += city_updated
+                cities.append(city)
+
+            if partitioned_persistence_service is not None:
+                # The partitions run on other connections and only reference the countries and cities by id
+                persistence_service.commit()
+                logger.debug(f"Persisting data for {len(batch)} museums in {partitioned_persistence_service.partitions} partitions")
+                for key, count in partitioned_persistence_service.persist(list(zip(batch, cities))).items():
+                    counters[key] += count
+            else:
+                logger.debug(f"Persisting data for {len(batch)} museums")
+                persisted = persistence_service.persist_museums(list(zip(batch, cities)))
+                for museum, museum_inserted, museum_updated in persisted.values():
+                    counters["inserted_museums"] += museum_inserted
+                    counters["updated_museums"] += museum_updated
+
+                logger.debug(f"Persisting museum attributes for {len(batch)} museums")
+                attribute_inserted, attribute_updated, attribute_deleted = persistence_service.persist_museums_attributes(
+                    [(persisted[museum_dto.name][0], museum_dto.wikipedia_museum_attributes) for museum_dto in batch]
+                )
+                counters["inserted_attributes"] += attribute_inserted
+                counters["updated_attributes"] += attribute_updated
+                counters["deleted_attributes"] += attribute_deleted
+        if after_batch is not None:
+            after_batch(batch)
+
+    for batch in batched(museums, batch_size):
+        persist_batch(batch)
+
+    logger.info(f"Inserted Countries: {counters['inserted_countries']}, Updated Countries: {counters['updated_countries']}")
+    logger.info(f"Inserted Cities: {counters['inserted_cities']}, Updated Cities: {counters['updated_cities']}")
+    logger.info(f"Inserted Museums: {counters['inserted_museums']}, Updated Museums: {counters['updated_museums']}")
+    logger.info(f"Inserted Museum Attributes: {counters['inserted_attributes']}, Updated Museum Attributes: {counters['updated_attributes']}, Deleted Museum Attributes: {counters['deleted_attributes']}")
+    return counters
+
+
+def copy_museums(persistence_service: PersistenceService, museums: Iterable[MuseumDTO], batch_size: int | None = None, after_batch: Callable[[list[MuseumDTO]], None] | None = None) -> dict[str, int]:
+    """Stage museums with COPY as they arrive and merge them into the tables once all are staged.
+
+    Nothing is committed: the caller commits the merge together with the import job.
+
+    Args:
+        persistence_service: Service with a staging repository on the current session
+        museums: Museums to persist, consumed as they arrive
+        batch_size: Museums copied per COPY statement, defaults to the PERSIST_BATCH_SIZE setting
+        after_batch: Optional callback run after each staged batch of museums
+
+    Returns:
+        dict[str, int]: Inserted, updated and deleted counts per entity, as stored in the import_log result
+    """
+    batch_size = batch_size or settings.persist_batch_size
+    persistence_service.start_staging()
+    for batch in batched(museums, batch_size):
+        with stage_metrics.measure("persist.stage"):
+            persistence_service.stage_museums(batch)
+        if after_batch is not None:
+            after_batch(batch)
+
+    with stage_metrics.measure("persist.merge"):
+        counters = persistence_service.merge_staged_museums()
+    logger.info(f"Inserted Countries: {counters['inserted_countries']}")
+    logger.info(f"Inserted Cities: {counters['inserted_cities']}, Updated Cities: {counters['updated_cities']}")
+    logger.info(f"Inserted Museums: {counters['inserted_museums']}, Updated Museums: {counters['updated_museums']}")
+    logger.info(f"Inserted Museum Attributes: {counters['inserted_attributes']}, Updated Museum Attributes: {counters['updated_attributes']}, Deleted Museum Attributes: {counters['deleted_attributes']}")
+    return counters
+
+
+def create_partitioned_persistence_service() -> PartitionedPersistenceService | None:
+    """Service persisting batches in PERSIST_PARTITIONS parallel sessions, None when they are persisted serially."""
+    if settings.persist_partitions <= 1:
+        return None
+    # The partitions share the pool of the engine, each of them holds a connection until it commits
+    partitions = min(settings.persist_partitions, settings.db_pool_size + settings.db_max_overflow)
+    if partitions < settings.persist_partitions:
+        logger.warning(f"PERSIST_PARTITIONS={settings.persist_partitions} exceeds the {partitions} pooled connections, persisting in {partitions} partitions")
+    if partitions <= 1:
+        return None
+    return PartitionedPersistenceService(get_session_maker(), partitions)
+
+
+def refresh_museum_city_population(session: Session) -> None:
+    """Refresh the analytics view once an import job succeeded and is committed.
+
+    A failed refresh does not fail the import, the view keeps the data of the previous import until the next one.
+    """
+    try:
+        with stage_metrics.measure("refresh.museum_city_population"):
+            MuseumCityPopulationRepository(session).refresh()
+        session.commit()
+    except DatabaseError as e:
+        session.rollback()
+        logger.warning(f"museum_city_population was not refreshed, it keeps the data of the previous import: {e}")
+
+
+def export(resume: bool = False, master_page_titles: list[str] | None = None) -> None:
+    """Main application entry point.
+
+    Args:
+        resume: Continue the latest IN_PROGRESS, FAILED or PARTIAL import job and only fetch the pages it did not complete
+        master_page_titles: Wikipedia pages listing the museums, defaults to the MASTER_PAGE_TITLES setting
+    """
+    master_page_titles = master_page_titles or settings.master_page_titles
     logger.info("Starting museum attendance data fetcher...")
+    stage_metrics.reset()
+    # The time budget covers the whole run, museums complete when it runs out are still persisted
+    deadline = time.monotonic() + settings.run_deadline_seconds if settings.run_deadline_seconds > 0 else None
     
     with get_db_session() as session:
         import_log_repository = ImportLogRepository(session)
+        import_checkpoint_repository = ImportCheckpointRepository(session)
         import_log = None
-        logger.debug("Starting import job log entry")
 
-        result: dict[str, int|str] = {
-            "page_name": "List_of_most_visited_museums"
+        # Jobs recorded before several list pages were crawled have "page_name" instead (see V0_8)
+        result: dict[str, Any] = {
+            "page_names": master_page_titles
         }
 
-        import_log = import_log_repository.start_job(ImportStatus.IN_PROGRESS, result=result)
-        session.commit()
-        inserted_countries = 0
-        updated_countries = 0
-        inserted_cities = 0
-        updated_cities = 0
-        inserted_museums = 0
-        updated_museums = 0
-        inserted_attributes = 0
-        updated_attributes = 0
+        if resume:
+            import_log = import_log_repository.get_latest_resumable()
+            if import_log is None:
+                logger.info("No interrupted import job to resume, starting a new one")
 
+        if import_log:
+            checkpoint_service = CheckpointService(import_checkpoint_repository.get_by_import_log(import_log))
+            logger.info(f"Resuming import job {import_log.id} with {checkpoint_service.completed_count} completed pages")
+            result["resumed_pages"] = checkpoint_service.completed_count
+            import_log_repository.resume_job(import_log, result=result)
+        else:
+            logger.debug("Starting import job log entry")
+            checkpoint_service = CheckpointService()
+            import_log = import_log_repository.start_job(ImportStatus.IN_PROGRESS, result=result)
+        session.commit()
         try:
-            logger.debug("Collecting museum data from Wikipedia")
-            data = DataCollectionService.collect_data("List_of_most_visited_museums")
-
-            logger.debug("Persisting collected data to the database")
             persistence_service = PersistenceService(
+                session=session,
                 museum_repository=MuseumRepository(session),
                 country_repository=CountryRepository(session),
                 museum_attributes_repository=MuseumAttributesRepository(session),
-                city_repository=CityRepository(session)
+                city_repository=CityRepository(session),
+                staging_repository=StagingRepository(session),
+                flush_size=settings.persist_flush_size,
+                visitor_history_repository=MuseumVisitorHistoryRepository(session)
             )
+            recorded_visitor_counts = 0
 
-            logger.debug("Beginning data persistence loop")
-            for museum_dto in data.wikipedia_museum_instance_list:
-                logger.debug(f"Persisting data for museum: {museum_dto.get_museum_name()}")
-                logger.debug(f"Persisting data for country: {museum_dto.get_country()}")
-                country, country_inserted, country_updated = persistence_service.persist_country(museum_dto.get_country())
-                if country_inserted:
-                    inserted_countries += 1
-                if country_updated:
-                    updated_countries += 1
-                logger.debug(f"Persisting data for city: {museum_dto.get_city()}")
-                city, city_inserted, city_updated = persistence_service.persist_city(museum_dto, country)
-                if city_inserted:
-                    inserted_cities += 1
-                if city_updated:
-                    updated_cities += 1
-                logger.debug(f"Persisting data for museum: {museum_dto.get_museum_name()}")
-                museum, museum_inserted, museum_updated = persistence_service.persist_museum(museum_dto, city)
-                if museum_inserted:
-                    inserted_museums += 1
-                if museum_updated:
-                    updated_museums += 1
-                logger.debug(f"Persisting museum attributes for museum: {museum_dto.get_museum_name()}")
-                attribute_inserted, attribute_updated = persistence_service.persist_museum_attributes(museum_dto.wikipedia_museum_attributes, museum)
-                inserted_attributes += attribute_inserted
-                updated_attributes += attribute_updated
-            logger.info(f"Inserted Countries: {inserted_countries}, Updated Countries: {updated_countries}")
-            logger.info(f"Inserted Cities: {inserted_cities}, Updated Cities: {updated_cities}")
-            logger.info(f"Inserted Museums: {inserted_museums}, Updated Museums: {updated_museums}")
-            logger.info(f"Inserted Museum Attributes: {inserted_attributes}, Updated Museum Attributes: {updated_attributes}")
-
-            import_log_repository.end_job_with_success(import_log, result={**result, 
-                "inserted_countries": inserted_countries,
-                "updated_countries": updated_countries,
-                "inserted_cities": inserted_cities,
-                "updated_cities": updated_cities,
-                "inserted_museums": inserted_museums,
-                "updated_museums": updated_museums,
-                "inserted_attributes": inserted_attributes,
-                "updated_attributes": updated_attributes
-            })
+            def mark_batch(museum_dtos: list[MuseumDTO]) -> None:
+                for museum_dto in museum_dtos:
+                    checkpoint_service.mark_completed(PageType.MUSEUM, museum_dto.get_museum_key())
+
+            def commit_batch(museum_dtos: list[MuseumDTO]) -> None:
+                nonlocal recorded_visitor_counts
+                recorded_visitor_counts += persistence_service.persist_visitor_history(import_log, museum_dtos)
+                # Each batch is committed together with its checkpoints so an interrupted run can resume after it
+                with stage_metrics.measure("persist.commit"):
+                    mark_batch(museum_dtos)
+                    checkpoint_service.save(import_checkpoint_repository, import_log)
+                    session.commit()
+
+            # Museums are persisted as soon as the crawl hands them over, so the database works while pages are fetched
+            logger.debug("Collecting museum data from Wikipedia and persisting it as it arrives")
+            metrics = CollectionMetrics()
+            museums = DataCollectionService.collect_data(master_page_titles, metrics, checkpoint_service, deadline)
+            if settings.persistence_mode == PersistenceMode.COPY:
+                # The whole import is merged in the transaction completing the import job, checkpoints included
+                counters = copy_museums(persistence_service, museums, after_batch=mark_batch)
+                # Read from the staging tables, so the staged museums are not held in memory until the merge
+                recorded_visitor_counts = persistence_service.persist_staged_visitor_history(import_log)
+                checkpoint_service.save(import_checkpoint_repository, import_log)
+            else:
+                counters = persist_museums(persistence_service, museums, after_batch=commit_batch, partitioned_persistence_service=create_partitioned_persistence_service())
+            final_result = {**result, **metrics.to_dict(), **counters, "recorded_visitor_counts": recorded_visitor_counts, "stages": stage_metrics.report()}
+            if metrics.deadline_exceeded:
+                logger.warning(f"Run deadline of {settings.run_deadline_seconds}s exceeded, persisted {metrics.coverage['museums']['completed']} of {metrics.coverage['museums']['total']} museums")
+                import_log_repository.end_job_with_partial_success(import_log, result=final_result)
+            else:
+                import_log_repository.end_job_with_success(import_log, result=final_result)
+                session.commit()
+                refresh_museum_city_population(session)
         except KeyboardInterrupt:
+            # Only the museums not committed yet are discarded (the whole import in COPY mode)
+            session.rollback()
             if import_log:
-                import_log_repository.end_job_with_failure(import_log, result={**result, "error_message": "Application interrupted by user"})
+                import_log_repository.end_job_with_failure(import_log, result={**result, "error_message": "Application interrupted by user", "stages": stage_metrics.report()})
             logger.info("Application interrupted by user")
         except Exception as e:
+            session.rollback()
             if import_log:
-                import_log_repository.end_job_with_failure(import_log, result={**result, "error_message": str(e)})
+                import_log_repository.end_job_with_failure(import_log, result={**result, "error_message": str(e), "stages": stage_metrics.report()})
             logger.exception(f"Unexpected error: {e}")
             sys.exit(1)
         finally:
@@ -102,5 +264,110 @@ def export() -> None:
             logger.info("Application shutdown complete")
 
 
+def crawl_distributed(master_page_titles: list[str] | None = None, worker: bool = False) -> None:
+    """Entry point of a fetcher replica sharing the crawl of an import job through the crawl_task queue.
+
+    The replica started without --worker creates the import job and queues its list pages, the
+    replicas started with --worker join it. The last replica to run out of tasks persists the
+    crawled museums and completes the import job.
+
+    Args:
+        master_page_titles: Wikipedia pages listing the museums, defaults to the MASTER_PAGE_TITLES setting
+        worker: Join the latest distributed import job instead of starting a new one
+    """
+    master_page_titles = master_page_titles or settings.master_page_titles
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    logger.info(f"Starting museum attendance data fetcher replica {worker_id}...")
+    stage_metrics.reset()
+
+    with get_db_session() as session:
+        import_log_repository = ImportLogRepository(session)
+        if worker:
+            import_log = wait_for_import_job(session, CrawlTaskRepository(session))
+            if import_log is None:
+                logger.info(f"No distributed import job to join after {settings.crawl_worker_wait_timeout}s")
+                close_db()
+                return
+        else:
+            import_log = import_log_repository.start_job(ImportStatus.IN_PROGRESS, result={"page_names": master_page_titles, "distributed": True})
+            session.commit()
+
+        crawl_worker = CrawlWorkerService(session, import_log, worker_id)
+        try:
+            if not worker:
+                crawl_worker.enqueue_lists(master_page_titles)
+            if crawl_worker.run():
+                complete_distributed_job(session, crawl_worker, import_log_repository)
+        except KeyboardInterrupt:
+            # Tasks claimed by this replica are claimed again by the others once their lease expires
+            logger.info("Application interrupted by user")
+        except Exception as e:
+            logger.exception(f"Unexpected error: {e}")
+            sys.exit(1)
+        finally:
+            close_db()
+            logger.info("Application shutdown complete")
+
+
+def wait_for_import_job(session: Session, crawl_task_repository: CrawlTaskRepository) -> ImportLog | None:
+    """Wait for a distributed import job with tasks left, replicas may start before the one creating it."""
+    deadline = time.monotonic() + settings.crawl_worker_wait_timeout
+    while True:
+        import_log = crawl_task_repository.get_active_import_log()
+        session.commit()
+        if import_log is not None or time.monotonic() >= deadline:
+            return import_log
+        time.sleep(settings.crawl_poll_interval)
+
+
+def complete_distributed_job(session: Session, crawl_worker: CrawlWorkerService, import_log_repository: ImportLogRepository) -> None:
+    """Persist the museums crawled by all replicas and complete the import job.
+
+    Runs while the import job row is locked, the other replicas wait for the outcome.
+    """
+    import_log = crawl_worker.import_log
+    result: dict[str, Any] = {**(import_log.result or {}), **crawl_worker.get_summary()}
+    try:
+        failed_tasks = crawl_worker.get_failed_count()
+        if failed_tasks:
+            import_log_repository.end_job_with_failure(import_log, result={**result, "error_message": f"{failed_tasks} crawl tasks failed"})
+        else:
+            persistence_service = PersistenceService(
+                session=session,
+                museum_repository=MuseumRepository(session),
+                country_repository=CountryRepository(session),
+                museum_attributes_repository=MuseumAttributesRepository(session),
+                city_repository=CityRepository(session),
+                staging_repository=StagingRepository(session),
+                flush_size=settings.persist_flush_size,
+                visitor_history_repository=MuseumVisitorHistoryRepository(session)
+            )
+            persist = copy_museums if settings.persistence_mode == PersistenceMode.COPY else persist_museums
+            persisted_museums: list[MuseumDTO] = []
+            counters = persist(persistence_service, crawl_worker.collect_results(), after_batch=persisted_museums.extend)
+            # Recorded once everything is persisted, the museums are only merged at the end in COPY mode
+            recorded_visitor_counts = persistence_service.persist_visitor_history(import_log, persisted_museums)
+            # The stages cover the pages fetched by this replica and the persistence of the whole job
+            import_log_repository.end_job_with_success(import_log, result={**result, **counters, "recorded_visitor_counts": recorded_visitor_counts, "stages": stage_metrics.report()})
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        import_log_repository.end_job_with_failure(import_log, result={**result, "error_message": str(e)})
+        session.commit()
+        raise
+    if not failed_tasks:
+        refresh_museum_city_population(session)
+
+
 if __name__ == "__main__":
-    export()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Fetch the most visited museums from Wikipedia and persist them in the database")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--resume", action="store_true", help="continue the latest IN_PROGRESS, FAILED or PARTIAL import job instead of starting a new one")
+    mode.add_argument("--distributed", action="store_true", help="start an import job whose crawl is shared with the --worker replicas")
+    mode.add_argument("--worker", action="store_true", help="join the latest distributed import job started with --distributed")
+    parser.add_argument("--page", action="append", dest="master_page_titles", metavar="TITLE", help="wikipedia list page to import, can be repeated (defaults to MASTER_PAGE_TITLES)")
+    args = parser.parse_args()
+    if args.distributed or args.worker:
+        crawl_distributed(master_page_titles=args.master_page_titles, worker=args.worker)
+    else:
+        export(resume=args.resume, master_page_titles=args.master_page_titles)
\ No newline at end of file
@@ -1,4 +1,7 @@
 from .data_collection_service import DataCollectionService
 from .persistence_service import PersistenceService
+from .checkpoint_service import CheckpointService
+from .crawl_worker_service import CrawlWorkerService
+from .partitioned_persistence_service import PartitionedPersistenceService
 
-__all__ = ["DataCollectionService", "PersistenceService"]
\ No newline at end of file
+__all__ = ["DataCollectionService", "PersistenceService", "CheckpointService", "CrawlWorkerService", "PartitionedPersistenceService"]
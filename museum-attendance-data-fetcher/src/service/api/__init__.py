@@ -1,3 +1,4 @@
 from .wikipedia_service import wikipedia_service
+from .adaptive_concurrency_controller import AdaptiveConcurrencyController
 
-__all__ = ["wikipedia_service"]
\ No newline at end of file
+__all__ = ["wikipedia_service", "AdaptiveConcurrencyController"]
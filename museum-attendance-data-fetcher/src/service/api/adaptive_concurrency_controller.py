@@ -0,0 +1,122 @@
+import threading
+import time
+from typing import Any, Callable
+from museum_attendance_common.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class AdaptiveConcurrencyController:
+    """AIMD controller limiting the number of in-flight Wikipedia requests.
+
+    The limit grows by one after a full window of fast, successful requests (additive increase)
+    and is cut by ``decrease_factor`` on a 429 response, an error or when the smoothed latency
+    exceeds the target (multiplicative decrease). It never leaves the [floor, ceiling] range.
+    """
+
+    def __init__(
+        self,
+        floor: int,
+        ceiling: int,
+        target_latency: float,
+        initial: int | None = None,
+        decrease_factor: float = 0.5,
+        latency_smoothing: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if floor < 1 or ceiling < floor:
+            raise ValueError(f"Invalid concurrency bounds: floor={floor}, ceiling={ceiling}")
+        self.__floor = floor
+        self.__ceiling = ceiling
+        self.__target_latency = target_latency
+        self.__decrease_factor = decrease_factor
+        self.__latency_smoothing = latency_smoothing
+        self.__clock = clock
+        self.__condition = threading.Condition()
+        self.__limit = min(max(initial if initial is not None else floor, floor), ceiling)
+        self.__in_flight = 0
+        self.__successes_in_window = 0
+        self.__smoothed_latency: float | None = None
+        self.__requests = 0
+        self.__errors = 0
+        self.__throttled = 0
+        self.__started_at = clock()
+        self.__last_decrease_at: float | None = None
+        self.__samples: list[tuple[float, int]] = [(0.0, self.__limit)]
+
+    @property
+    def limit(self) -> int:
+        with self.__condition:
+            return self.__limit
+
+    @property
+    def in_flight(self) -> int:
+        with self.__condition:
+            return self.__in_flight
+
+    def acquire(self) -> None:
+        """Block until a request slot is available under the current limit."""
+        with self.__condition:
+            while self.__in_flight >= self.__limit:
+                self.__condition.wait()
+            self.__in_flight += 1
+
+    def release(self, latency: float, error: bool = False, throttled: bool = False) -> None:
+        """Release a request slot and adapt the limit to the outcome of the request.
+
+        Args:
+            latency: Duration of the request in seconds
+            error: Whether the request failed
+            throttled: Whether the request was rejected with HTTP 429
+        """
+        with self.__condition:
+            self.__in_flight -= 1
+            self.__requests += 1
+            self.__errors += int(error)
+            self.__throttled += int(throttled)
+            if self.__smoothed_latency is None:
+                self.__smoothed_latency = latency
+            else:
+                self.__smoothed_latency += self.__latency_smoothing * (latency - self.__smoothed_latency)
+
+            if throttled or error or self.__smoothed_latency > self.__target_latency:
+                self.__decrease()
+            else:
+                self.__successes_in_window += 1
+                if self.__successes_in_window >= self.__limit:
+                    self.__set_limit(self.__limit + 1)
+            self.__condition.notify_all()
+
+    def report(self) -> dict[str, Any]:
+        """Summarise the run for the import log."""
+        with self.__condition:
+            limits = [limit for _, limit in self.__samples]
+            return {
+                "floor": self.__floor,
+                "ceiling": self.__ceiling,
+                "final": self.__limit,
+                "min": min(limits),
+                "max": max(limits),
+                "requests": self.__requests,
+                "errors": self.__errors,
+                "throttled": self.__throttled,
+                "samples": [[round(elapsed, 3), limit] for elapsed, limit in self.__samples],
+            }
+
+    def __decrease(self) -> None:
+        # A burst of failures from the same window of requests only counts as one congestion signal
+        now = self.__clock()
+        window = max(self.__smoothed_latency or 0.0, self.__target_latency)
+        if self.__last_decrease_at is not None and now - self.__last_decrease_at < window:
+            return
+        self.__last_decrease_at = now
+        self.__set_limit(int(self.__limit * self.__decrease_factor))
+
+    def __set_limit(self, limit: int) -> None:
+        limit = min(max(limit, self.__floor), self.__ceiling)
+        self.__successes_in_window = 0
+        if limit == self.__limit:
+            return
+        logger.debug(f"Adjusting concurrency limit from {self.__limit} to {limit}")
+        self.__limit = limit
+        self.__samples.append((self.__clock() - self.__started_at, limit))
@@ -2,6 +2,7 @@ from ratelimit import limits, sleep_and_retry
 import requests
 import os
 import time
+from typing import Callable
 from requests.exceptions import RequestException, HTTPError
 from museum_attendance_common.utils import get_logger
 from museum_attendance_common.config import Settings
@@ -67,11 +68,13 @@ class WikipediaService:
 
     @sleep_and_retry
     @limits(calls=2, period=1)
-    def get_page_html(self, page_title: str) -> str:
+    def get_page_html(self, page_title: str, on_latency: Callable[[float], None] | None = None) -> str:
         """Fetch HTML content for a Wikipedia page.
 
         Args:
             page_title: Title of the Wikipedia page to fetch
+            on_latency: Called with the duration of the HTTP request alone, whether it succeeded or not.
+                The wait for the rate limit is not part of it.
 
         Returns:
             str: HTML content of the page
@@ -83,17 +86,18 @@ class WikipediaService:
 
         logger.info(f"Fetching Wikipedia page: {page_title}")
 
+        headers = {
+            "Authorization": f"Bearer {self.__get_access_token()}",
+            "User-Agent": "MuseumAttendanceDataFetcher/1.0 (contact: fady.sawan@gmail.com)",
+        }
         try:
-            start_time = time.time()
-            response = requests.get(
-                url,
-                headers={
-                    "Authorization": f"Bearer {self.__get_access_token()}",
-                    "User-Agent": "MuseumAttendanceDataFetcher/1.0 (contact: fady.sawan@gmail.com)",
-                },
-                timeout=30,
-            )
-            elapsed_time = time.time() - start_time
+            start_time = time.monotonic()
+            try:
+                response = requests.get(url, headers=headers, timeout=30)
+            finally:
+                elapsed_time = time.monotonic() - start_time
+                if on_latency is not None:
+                    on_latency(elapsed_time)
 
             response.raise_for_status()
 
@@ -0,0 +1,51 @@
+from museum_attendance_common.enumeration import PageType
+from museum_attendance_common.model import ImportCheckpoint, ImportLog
+from museum_attendance_common.repository import ImportCheckpointRepository
+from museum_attendance_common.utils import get_logger
+from typing import Any, Iterable
+import threading
+
+logger = get_logger(__name__)
+
+class CheckpointService:
+    """Tracks the completed pages of an import job so an interrupted job can resume.
+
+    Pages are marked as completed from the crawler threads and kept in memory until the
+    persistence loop saves them in the same transaction as the data they belong to.
+    """
+
+    def __init__(self, checkpoints: Iterable[ImportCheckpoint] = ()) -> None:
+        self.__lock = threading.Lock()
+        self.__completed: dict[tuple[str, str], Any] = {
+            (checkpoint.page_type, checkpoint.page_key): checkpoint.payload for checkpoint in checkpoints
+        }
+        self.__pending: list[tuple[PageType, str, Any]] = []
+
+    @property
+    def completed_count(self) -> int:
+        with self.__lock:
+            return len(self.__completed)
+
+    def is_completed(self, page_type: PageType, page_key: str) -> bool:
+        with self.__lock:
+            return (page_type.value, page_key) in self.__completed
+
+    def get_payload(self, page_type: PageType, page_key: str) -> Any:
+        with self.__lock:
+            return self.__completed.get((page_type.value, page_key))
+
+    def mark_completed(self, page_type: PageType, page_key: str, payload: Any = None) -> None:
+        with self.__lock:
+            self.__completed[(page_type.value, page_key)] = payload
+            self.__pending.append((page_type, page_key, payload))
+
+    def save(self, repository: ImportCheckpointRepository, import_log: ImportLog) -> int:
+        """Writes the checkpoints recorded since the last save and returns how many were written."""
+        with self.__lock:
+            pending, self.__pending = self.__pending, []
+
+        for page_type, page_key, payload in pending:
+            repository.mark_completed(import_log, page_type, page_key, payload)
+        if pending:
+            logger.debug(f"Saved {len(pending)} checkpoints for import job {import_log.id}")
+        return len(pending)
@@ -0,0 +1,159 @@
+from museum_attendance_common.config import Settings
+from museum_attendance_common.enumeration import CrawlTaskStatus, ImportStatus, PageType
+from museum_attendance_common.model import CrawlTask, ImportLog
+from museum_attendance_common.repository import CrawlTaskRepository, ImportLogRepository
+from museum_attendance_common.utils import get_logger
+from sqlalchemy.orm import Session
+from dto import Museum, City
+from enumeration import GlobalEnum
+from service.api import AdaptiveConcurrencyController
+from service.data_collection_service import DataCollectionService
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from dataclasses import asdict
+from typing import Any, Iterator
+import time
+
+logger = get_logger(__name__)
+settings = Settings()
+
+class CrawlWorkerService:
+    """Crawls the pages of a distributed import job from the crawl_task queue.
+
+    Every fetcher replica runs a worker on the same import job: tasks are claimed with
+    SELECT ... FOR UPDATE SKIP LOCKED, fetched on a thread pool and completed with their parsed
+    result. List pages queue their museum and city pages, so the crawl spreads over all replicas.
+    Once the queue is empty, exactly one worker wins the lock on the import job and completes it.
+    """
+
+    def __init__(self, session: Session, import_log: ImportLog, worker_id: str) -> None:
+        self.__session = session
+        self.__import_log = import_log
+        self.__worker_id = worker_id
+        self.__crawl_task_repository = CrawlTaskRepository(session)
+        self.__import_log_repository = ImportLogRepository(session)
+        self.__concurrency_controller = AdaptiveConcurrencyController(
+            floor=settings.concurrency_floor,
+            ceiling=settings.concurrency_ceiling,
+            target_latency=settings.concurrency_target_latency,
+            initial=settings.max_workers,
+        )
+        self.__tasks_completed = 0
+        self.__tasks_failed = 0
+
+    @property
+    def import_log(self) -> ImportLog:
+        return self.__import_log
+
+    def enqueue_lists(self, master_page_titles: list[str]) -> None:
+        """Queue the list pages of the import job, the crawl starts from them."""
+        for master_page_title in master_page_titles:
+            self.__crawl_task_repository.enqueue(self.__import_log, PageType.LIST, master_page_title)
+        self.__session.commit()
+
+    def run(self) -> bool:
+        """Work on the import job until its queue is empty.
+
+        Returns:
+            bool: True when this worker must complete the import job. The import job row is then
+            locked until the caller commits, so the other workers wait for the outcome.
+        """
+        logger.info(f"Worker {self.__worker_id} joined import job {self.__import_log.id}")
+        with ThreadPoolExecutor(max_workers=settings.concurrency_ceiling) as executor:
+            while True:
+                tasks = self.__crawl_task_repository.claim(
+                    self.__import_log, self.__worker_id, settings.crawl_claim_batch_size, settings.crawl_task_lease_seconds,
+                    settings.crawl_task_max_attempts
+                )
+                self.__session.commit()
+                if tasks:
+                    futures = {executor.submit(self.__fetch, task.page_type, task.page_key, task.payload): task for task in tasks}
+                    for future in as_completed(futures):
+                        self.__finish(futures[future], future)
+                    continue
+
+                if self.__crawl_task_repository.count_unfinished(self.__import_log) > 0:
+                    # Other workers still hold tasks, which may queue more pages
+                    self.__session.commit()
+                    time.sleep(settings.crawl_poll_interval)
+                    continue
+
+                logger.info(f"Worker {self.__worker_id} completed {self.__tasks_completed} tasks ({self.__tasks_failed} failed attempts)")
+                import_log = self.__import_log_repository.lock(self.__import_log)
+                if import_log.status != ImportStatus.IN_PROGRESS.value:
+                    self.__session.commit()
+                    logger.info(f"Import job {import_log.id} was completed by another worker")
+                    return False
+                if self.__crawl_task_repository.count_unfinished(import_log) > 0:
+                    self.__session.commit()
+                    continue
+                logger.info(f"Worker {self.__worker_id} completes import job {import_log.id}")
+                return True
+
+    def get_failed_count(self) -> int:
+        failed_count: int = self.__crawl_task_repository.count_by_status(self.__import_log).get(CrawlTaskStatus.FAILED.value, 0)
+        return failed_count
+
+    def collect_results(self) -> Iterator[Museum]:
+        """Yield the museums crawled by all workers, with their city details attached."""
+        cities = {
+            task.page_key: City(**task.result)
+            for task in self.__crawl_task_repository.get_completed(self.__import_log, PageType.CITY)
+            if task.result
+        }
+        for task in self.__crawl_task_repository.get_completed(self.__import_log, PageType.MUSEUM):
+            museum = Museum(**task.result)
+            city = cities.get(museum.wikipedia_city_details_page_title)
+            if city is not None:
+                museum.wikipedia_city_details = city
+            yield museum
+
+    def get_summary(self) -> dict[str, Any]:
+        return {
+            "crawl_tasks": self.__crawl_task_repository.count_by_status(self.__import_log),
+            "workers": self.__crawl_task_repository.count_by_worker(self.__import_log),
+        }
+
+    def __fetch(self, page_type: str, page_key: str, payload: Any) -> Any:
+        """Fetch and parse the page of a task, runs on the thread pool and never touches the session.
+
+        Fetch errors are raised, so the task is retried or marked FAILED rather than completed without its data.
+        """
+        if page_type == PageType.LIST.value:
+            museums = DataCollectionService.fetch_museum_list(page_key, self.__concurrency_controller)
+            return [asdict(museum) for museum in museums]
+        if page_type == PageType.MUSEUM.value:
+            museum = DataCollectionService.fetch_museum_details(Museum(**payload), self.__concurrency_controller, raise_errors=True)
+            return asdict(museum)
+        city = DataCollectionService.fetch_city_details(page_key, self.__concurrency_controller, raise_errors=True)
+        return asdict(city) if city is not None else None
+
+    def __finish(self, task: CrawlTask, future: Future[Any]) -> None:
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"Crawl task {task.page_type} '{task.page_key}' failed: {e}")
+            if self.__crawl_task_repository.fail(task, self.__worker_id, settings.crawl_task_lease_seconds, str(e), settings.crawl_task_max_attempts):
+                self.__tasks_failed += 1
+            else:
+                logger.warning(f"Worker {self.__worker_id} lost the lease of crawl task {task.page_type} '{task.page_key}', another worker retries it")
+            self.__session.commit()
+            return
+
+        if task.page_type == PageType.LIST.value:
+            # Queuing the same pages again is a no-op, so this is safe even when the lease was lost
+            self.__enqueue_list_pages(result)
+            result = {"museums": len(result)}
+        if self.__crawl_task_repository.complete(task, self.__worker_id, settings.crawl_task_lease_seconds, result):
+            self.__tasks_completed += 1
+        else:
+            logger.warning(f"Worker {self.__worker_id} lost the lease of crawl task {task.page_type} '{task.page_key}', its result is dropped")
+        # Each task is committed on its own so the other workers see the pages it queued right away
+        self.__session.commit()
+
+    def __enqueue_list_pages(self, museums: list[dict[str, Any]]) -> None:
+        for museum in museums:
+            # Same key as the local crawl and its checkpoints
+            self.__crawl_task_repository.enqueue(self.__import_log, PageType.MUSEUM, Museum(**museum).get_museum_key(), museum)
+            city_page_title = museum["wikipedia_city_details_page_title"]
+            if city_page_title != GlobalEnum.NA.value:
+                self.__crawl_task_repository.enqueue(self.__import_log, PageType.CITY, city_page_title)
@@ -1,11 +1,21 @@
-from bs4 import BeautifulSoup
 from quantulum3 import parser
-from museum_attendance_common.utils import get_logger
+from museum_attendance_common.utils import get_logger, stage_metrics
 from museum_attendance_common.config import Settings
-from dto import MostVisitedMuseumList, Museum, City
+from museum_attendance_common.enumeration import PageType
+from dto import Museum, City, CollectionMetrics
+from enumeration import GlobalEnum
+from exceptions import APIError
 from service.extractor import MuseumListPageExtractor, MuseumInstancePageExtractor, CityPageExtractor
-from service.api import wikipedia_service
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from service.api import wikipedia_service, AdaptiveConcurrencyController
+from service.checkpoint_service import CheckpointService
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from collections import deque
+from dataclasses import asdict
+from functools import partial
+from queue import Queue, Full
+from typing import Any, Iterator
+import threading
+import time
 
 
 logger = get_logger(__name__)
@@ -13,44 +23,322 @@ settings = Settings()
 
 class DataCollectionService:
     @staticmethod
-    def collect_data(master_page_title: str) -> MostVisitedMuseumList:
-        most_visited_museums_html_content = wikipedia_service.get_page_html(master_page_title)
-        museum_list_page_extractor: MuseumListPageExtractor = MuseumListPageExtractor(_html_content=most_visited_museums_html_content)
-        data = museum_list_page_extractor.to_dto()
-        
-        with ThreadPoolExecutor(max_workers=settings.max_workers) as executor:
-            museum_details_futures = [executor.submit(DataCollectionService.fetch_museum_details, museum) for museum in data]
-            for future in as_completed(museum_details_futures):
-                museum = future.result()
-                logger.info(f"Completed data collection for museum: {museum.name}")
-
-            city_details_futures = [executor.submit(DataCollectionService.fetch_city_details, museum) for museum in data if museum.wikipedia_city_details_page_title != "N/A"]
-            for future in as_completed(city_details_futures):
-                museum = future.result()
-                logger.info(f"Completed data collection for city: {museum.city}")
-
-        return MostVisitedMuseumList(wikipedia_museum_instance_list=data)
-    
+    def collect_data(master_page_titles: list[str], metrics: CollectionMetrics | None = None, checkpoint_service: CheckpointService | None = None, deadline: float | None = None) -> Iterator[Museum]:
+        """Yield museums as soon as their museum and city pages have been collected.
+
+        The crawl runs in a background thread and hands enriched museums over through a bounded
+        queue, so a slow consumer (e.g. the persistence loop) throttles the crawl instead of
+        letting fetched pages pile up in memory. All list pages share one crawl frontier: a museum
+        or city appearing on several lists is fetched and yielded only once.
+
+        When the deadline passes, pending fetches are cancelled and the crawl ends without raising:
+        only the museums complete by then are yielded, and metrics report the coverage of each stage.
+
+        Args:
+            master_page_titles: Titles of the Wikipedia pages listing the museums
+            metrics: Optional metrics object updated while the crawl progresses
+            checkpoint_service: Optional checkpoints of the import job, completed pages are not fetched again
+            deadline: Optional time.monotonic() value after which the crawl stops
+
+        Yields:
+            Museum: Museum DTO with its attributes and shared city details attached
+        """
+        metrics = metrics if metrics is not None else CollectionMetrics()
+        checkpoint_service = checkpoint_service if checkpoint_service is not None else CheckpointService()
+        concurrency_controller = AdaptiveConcurrencyController(
+            floor=settings.concurrency_floor,
+            ceiling=settings.concurrency_ceiling,
+            target_latency=settings.concurrency_target_latency,
+            initial=settings.max_workers,
+        )
+        ready_museums: Queue[Museum | BaseException | None] = Queue(maxsize=settings.collection_queue_size)
+        stop_event = threading.Event()
+        crawler = MuseumCrawler(master_page_titles, ready_museums, stop_event, metrics, checkpoint_service, concurrency_controller, deadline)
+        crawler_thread = threading.Thread(target=crawler.run, name="museum-crawler", daemon=True)
+        start_time = time.perf_counter()
+        crawler_thread.start()
+        try:
+            while True:
+                item = ready_museums.get()
+                if item is None:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop_event.set()
+            crawler_thread.join()
+            metrics.concurrency = concurrency_controller.report()
+            # Includes the time the consumer spent on each museum, as the queue paces the crawl
+            stage_metrics.record("collect_data", time.perf_counter() - start_time)
+            logger.info(f"Fetched {metrics.city_pages_requested} city pages, avoided {metrics.city_requests_avoided} duplicate requests")
+
+    @staticmethod
+    def fetch_museum_list(master_page_title: str, concurrency_controller: AdaptiveConcurrencyController | None = None) -> list[Museum]:
+        logger.info(f"Collecting museum list: {master_page_title}")
+        museum_list_html_content = DataCollectionService._get_page_html(master_page_title, concurrency_controller, "list_page")
+        with stage_metrics.measure("extract.list_page"):
+            museum_list_page_extractor: MuseumListPageExtractor = MuseumListPageExtractor(_html_content=museum_list_html_content, _low_memory=settings.low_memory_mode)
+            return museum_list_page_extractor.to_dto()
+
     @staticmethod
-    def fetch_museum_details(museum: Museum) -> Museum:
+    def fetch_museum_details(museum: Museum, concurrency_controller: AdaptiveConcurrencyController | None = None, raise_errors: bool = False) -> Museum:
+        """Fetch the attributes of a museum from its page.
+
+        Errors are logged and the museum is returned without attributes, unless raise_errors is set
+        (the crawl task queue then retries the page or marks it FAILED).
+        """
         try:
             logger.info(f"Collecting data for museum: {museum.name}")
-            museum_instance_html_content = wikipedia_service.get_page_html(museum.wikipedia_museum_details_page_title)
-            museum_instance_page_extractor = MuseumInstancePageExtractor(_html_content=museum_instance_html_content)
-            museum.wikipedia_museum_attributes = museum_instance_page_extractor.extract_data(BeautifulSoup(museum_instance_html_content, 'html.parser'))
+            museum_instance_html_content = DataCollectionService._get_page_html(museum.wikipedia_museum_details_page_title, concurrency_controller, "museum_page")
+            with stage_metrics.measure("extract.museum_page"):
+                museum_instance_page_extractor = MuseumInstancePageExtractor(_html_content=museum_instance_html_content, _low_memory=settings.low_memory_mode)
+                museum.wikipedia_museum_attributes = museum_instance_page_extractor.get_data()
             return museum
         except Exception as e:
+            if raise_errors:
+                raise
             logger.error(f"Error fetching data for {museum.name}: {e}")
             return museum
 
     @staticmethod
-    def fetch_city_details(museum: Museum) -> Museum:
+    def fetch_city_details(city_page_title: str, concurrency_controller: AdaptiveConcurrencyController | None = None, raise_errors: bool = False) -> City | None:
+        """Fetch the details of a city from its page, errors are logged and give None unless raise_errors is set."""
         try:
-            logger.info(f"Collecting data for city: {museum.city}")
-            city_html_content = wikipedia_service.get_page_html(museum.wikipedia_city_details_page_title)
-            city_page_extractor = CityPageExtractor(_html_content=city_html_content)
-            museum.wikipedia_city_details = city_page_extractor.to_dto()
-            return museum
+            logger.info(f"Collecting data for city: {city_page_title}")
+            city_html_content = DataCollectionService._get_page_html(city_page_title, concurrency_controller, "city_page")
+            with stage_metrics.measure("extract.city_page"):
+                city_page_extractor = CityPageExtractor(_html_content=city_html_content, _low_memory=settings.low_memory_mode)
+                return city_page_extractor.to_dto()
         except Exception as e:
-            logger.error(f"Error fetching data for city {museum.city}: {e}")
-            return museum
+            if raise_errors:
+                raise
+            logger.error(f"Error fetching data for city {city_page_title}: {e}")
+            return None
+
+    @staticmethod
+    def _get_page_html(page_title: str, concurrency_controller: AdaptiveConcurrencyController | None, page_kind: str) -> str:
+        """Fetch a page within the limit of the concurrency controller and report the outcome to it.
+
+        The fetch is recorded in the "fetch.<page_kind>" stage with the size of the page.
+        """
+        with stage_metrics.measure(f"fetch.{page_kind}") as sample:
+            html_content = DataCollectionService.__fetch_page_html(page_title, concurrency_controller)
+            sample.size = len(html_content.encode("utf-8"))
+            return html_content
+
+    @staticmethod
+    def __fetch_page_html(page_title: str, concurrency_controller: AdaptiveConcurrencyController | None) -> str:
+        if concurrency_controller is None:
+            page_html_content: str = wikipedia_service.get_page_html(page_title)
+            return page_html_content
+
+        # Only the HTTP request is timed: the wait for the local rate limit is not a sign of Wikipedia slowing down
+        latencies: list[float] = []
+        concurrency_controller.acquire()
+        try:
+            html_content: str = wikipedia_service.get_page_html(page_title, on_latency=latencies.append)
+        except APIError as e:
+            concurrency_controller.release(sum(latencies), error=True, throttled=e.status_code == 429)
+            raise
+        except Exception:
+            concurrency_controller.release(sum(latencies), error=True)
+            raise
+        concurrency_controller.release(sum(latencies))
+        return html_content
+
+class MuseumCrawler:
+    """Fetches list, museum and city pages on a thread pool and queues each museum once it is complete."""
+
+    def __init__(
+        self,
+        master_page_titles: list[str],
+        ready_museums: Queue[Museum | BaseException | None],
+        stop_event: threading.Event,
+        metrics: CollectionMetrics,
+        checkpoint_service: CheckpointService,
+        concurrency_controller: AdaptiveConcurrencyController,
+        deadline: float | None = None,
+    ) -> None:
+        self.__master_page_titles = master_page_titles
+        self.__ready_museums = ready_museums
+        self.__stop_event = stop_event
+        self.__metrics = metrics
+        self.__checkpoint_service = checkpoint_service
+        self.__concurrency_controller = concurrency_controller
+        self.__deadline = deadline
+        # Shared frontier of all list pages, a museum is identified by its page title (or its name when it has none)
+        self.__frontier: deque[Museum] = deque()
+        self.__seen_museums: set[str] = set()
+        self.__list_futures: dict[Future[list[Museum]], str] = {}
+        self.__museum_futures: dict[Future[Museum], Museum] = {}
+        # Several museums usually share a city, so each city page is fetched once and the DTO is shared
+        self.__city_futures: dict[str, Future[City | None]] = {}
+        self.__museums_awaiting_city: dict[str, list[Museum]] = {}
+        # Progress of each stage, reported as coverage when the crawl ends
+        self.__lists_completed = 0
+        self.__museum_pages_completed = 0
+        self.__museums_completed = 0
+        self.__known_cities: set[str] = set()
+
+    def run(self) -> None:
+        """Crawl all pages, then signal the end of the crawl (or its failure) to the consumer."""
+        try:
+            self.__crawl()
+        except BaseException as e:
+            self.__put(e)
+        finally:
+            self.__put(None)
+
+    def __crawl(self) -> None:
+        # Only a bounded window of museums is in flight, the queue then blocks the crawl when the consumer falls behind
+        window = settings.concurrency_ceiling + settings.collection_queue_size
+
+        # The pool is sized for the ceiling, the controller decides how many of its threads may fetch at once
+        executor = ThreadPoolExecutor(max_workers=settings.concurrency_ceiling)
+        try:
+            for master_page_title in dict.fromkeys(self.__master_page_titles):
+                self.__metrics.lists[master_page_title] = {"museums": 0, "new": 0, "duplicates": 0}
+                if self.__checkpoint_service.is_completed(PageType.LIST, master_page_title):
+                    logger.info(f"Restoring museum list from checkpoint: {master_page_title}")
+                    payload = self.__checkpoint_service.get_payload(PageType.LIST, master_page_title)
+                    self.__metrics.pages_restored_from_checkpoint += 1
+                    self.__lists_completed += 1
+                    self.__add_to_frontier(master_page_title, [Museum(**museum_data) for museum_data in payload])
+                else:
+                    list_future = executor.submit(DataCollectionService.fetch_museum_list, master_page_title, self.__concurrency_controller)
+                    self.__list_futures[list_future] = master_page_title
+
+            while not self.__stop_event.is_set():
+                if self.__deadline is not None and time.monotonic() >= self.__deadline:
+                    logger.warning("Run deadline exceeded, cancelling the pending page fetches")
+                    self.__metrics.deadline_exceeded = True
+                    break
+
+                in_flight = len(self.__museum_futures) + sum(len(museums) for museums in self.__museums_awaiting_city.values())
+                while self.__frontier and in_flight < window:
+                    self.__submit_museum(executor, self.__frontier.popleft())
+                    in_flight += 1
+
+                if not (self.__list_futures or self.__museum_futures or self.__museums_awaiting_city or self.__frontier):
+                    break
+
+                waiting_on: set[Future[Any]] = set(self.__list_futures) | set(self.__museum_futures)
+                waiting_on |= {self.__city_futures[title] for title in self.__museums_awaiting_city}
+                timeout = None if self.__deadline is None else max(self.__deadline - time.monotonic(), 0)
+                done, _ = wait(waiting_on, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    if future in self.__list_futures:
+                        master_page_title = self.__list_futures.pop(future)
+                        museums = future.result()
+                        self.__lists_completed += 1
+                        self.__checkpoint_service.mark_completed(PageType.LIST, master_page_title, [asdict(museum) for museum in museums])
+                        self.__add_to_frontier(master_page_title, museums)
+                    elif future in self.__museum_futures:
+                        museum = self.__museum_futures.pop(future)
+                        future.result()  # re-raise unexpected errors from the worker thread
+                        self.__museum_pages_completed += 1
+                        city_future = self.__city_futures.get(museum.wikipedia_city_details_page_title)
+                        if city_future is None or city_future.done():
+                            self.__emit(museum)
+                        else:
+                            self.__museums_awaiting_city.setdefault(museum.wikipedia_city_details_page_title, []).append(museum)
+
+                for city_page_title in [title for title in self.__museums_awaiting_city if self.__city_futures[title].done()]:
+                    logger.info(f"Completed data collection for city: {city_page_title}")
+                    for museum in self.__museums_awaiting_city.pop(city_page_title):
+                        self.__emit(museum)
+
+            if self.__stop_event.is_set() or self.__metrics.deadline_exceeded:
+                pending_futures: list[Future[Any]] = [*self.__list_futures, *self.__museum_futures, *self.__city_futures.values()]
+                for pending_future in pending_futures:
+                    pending_future.cancel()
+        finally:
+            # Past the deadline the fetches already running are not waited for, their results are dropped
+            executor.shutdown(wait=not self.__metrics.deadline_exceeded, cancel_futures=True)
+            self.__metrics.coverage = self.__coverage()
+
+    def __coverage(self) -> dict[str, dict[str, int]]:
+        """Completed and known pages of each stage, a museum is complete once it is handed to the consumer."""
+        museums_total = sum(list_counts["new"] for list_counts in self.__metrics.lists.values())
+        return {
+            "list_pages": {"completed": self.__lists_completed, "total": len(self.__metrics.lists)},
+            "museum_pages": {"completed": self.__museum_pages_completed, "total": museums_total},
+            "city_pages": {
+                "completed": sum(1 for future in self.__city_futures.values() if future.done() and not future.cancelled()),
+                "total": len(self.__known_cities),
+            },
+            "museums": {"completed": self.__museums_completed, "total": museums_total},
+        }
+
+    def __add_to_frontier(self, master_page_title: str, museums: list[Museum]) -> None:
+        list_counts = self.__metrics.lists[master_page_title]
+        for museum in museums:
+            list_counts["museums"] += 1
+            museum_key = museum.get_museum_key()
+            if museum_key in self.__seen_museums:
+                list_counts["duplicates"] += 1
+                continue
+            self.__seen_museums.add(museum_key)
+            list_counts["new"] += 1
+            # Museums persisted by an earlier attempt of this import job are neither fetched nor yielded again
+            if self.__checkpoint_service.is_completed(PageType.MUSEUM, museum_key):
+                self.__metrics.pages_restored_from_checkpoint += 1
+                self.__museum_pages_completed += 1
+                self.__museums_completed += 1
+                continue
+            if museum.wikipedia_city_details_page_title != GlobalEnum.NA.value:
+                self.__known_cities.add(museum.wikipedia_city_details_page_title)
+            self.__frontier.append(museum)
+
+    def __submit_museum(self, executor: ThreadPoolExecutor, museum: Museum) -> None:
+        museum_future = executor.submit(DataCollectionService.fetch_museum_details, museum, self.__concurrency_controller)
+        self.__museum_futures[museum_future] = museum
+        self.__metrics.museum_pages_requested += 1
+
+        city_page_title = museum.wikipedia_city_details_page_title
+        if city_page_title == GlobalEnum.NA.value:
+            return
+        if city_page_title in self.__city_futures:
+            self.__metrics.city_requests_avoided += 1
+        elif self.__checkpoint_service.is_completed(PageType.CITY, city_page_title):
+            self.__city_futures[city_page_title] = self.__restore_city(city_page_title)
+            self.__metrics.pages_restored_from_checkpoint += 1
+        else:
+            city_future = executor.submit(DataCollectionService.fetch_city_details, city_page_title, self.__concurrency_controller)
+            city_future.add_done_callback(partial(self.__checkpoint_city, city_page_title))
+            self.__city_futures[city_page_title] = city_future
+            self.__metrics.city_pages_requested += 1
+
+    def __emit(self, museum: Museum) -> None:
+        city_future = self.__city_futures.get(museum.wikipedia_city_details_page_title)
+        city = city_future.result() if city_future is not None else None
+        if city is not None:
+            museum.wikipedia_city_details = city
+        logger.info(f"Completed data collection for museum: {museum.name}")
+        self.__museums_completed += 1
+        self.__put(museum)
+
+    def __restore_city(self, city_page_title: str) -> Future[City | None]:
+        """Wrap a city collected by an earlier attempt of the import job into a completed future."""
+        payload = self.__checkpoint_service.get_payload(PageType.CITY, city_page_title)
+        city_future: Future[City | None] = Future()
+        city_future.set_result(City(**payload) if payload else None)
+        return city_future
+
+    def __checkpoint_city(self, city_page_title: str, city_future: Future[City | None]) -> None:
+        if city_future.cancelled():
+            return
+        city = city_future.result()
+        if city is not None:
+            self.__checkpoint_service.mark_completed(PageType.CITY, city_page_title, asdict(city))
+
+    def __put(self, item: Museum | BaseException | None) -> None:
+        """Block until the consumer takes the item, unless the consumer stopped listening."""
+        while not self.__stop_event.is_set():
+            try:
+                self.__ready_museums.put(item, timeout=0.1)
+                return
+            except Full:
+                continue
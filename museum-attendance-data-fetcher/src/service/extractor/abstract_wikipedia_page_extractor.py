@@ -8,6 +8,8 @@ T = TypeVar('T')
 @dataclass
 class AbstractWikipediaPageExtractor(ABC, Generic[T]):
     _html_content: str
+    # Free the raw HTML and the parsed tree as soon as the data is extracted
+    _low_memory: bool = False
 
     def get_html_content(self) -> str:
         return self._html_content
@@ -23,7 +25,27 @@ class AbstractWikipediaPageExtractor(ABC, Generic[T]):
     def get_data(self) -> dict:
         """Get the extracted data as a dictionary."""
         soup = self.parse_html()
-        return self.extract_data(soup)
+        if self._low_memory:
+            # The tree holds everything the extraction needs
+            self._html_content = ""
+        try:
+            return self.extract_data(soup)
+        finally:
+            if self._low_memory:
+                self.release(soup)
+
+    @staticmethod
+    def release(soup: BeautifulSoup) -> None:
+        """Destroy a parsed tree right away.
+
+        The nodes of a tree reference each other, so without this the tree stays in memory until
+        the cyclic garbage collector runs, which lets dead pages pile up during a long crawl.
+        """
+        # Decomposing the BeautifulSoup object alone only wipes the root, each top-level element
+        # must be decomposed to wipe the document
+        for element in list(soup.contents):
+            element.decompose()
+        soup.decompose()
     
     @abstractmethod
     def to_dto(self) -> T | list[T]:
@@ -0,0 +1,91 @@
+from museum_attendance_common.model import City
+from museum_attendance_common.repository import CityRepository, CountryRepository, MuseumRepository, MuseumAttributesRepository
+from museum_attendance_common.utils import get_logger, stage_metrics
+from sqlalchemy.orm import Session
+from dto import Museum as MuseumDTO
+from service.persistence_service import PersistenceService
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Tuple
+import zlib
+
+logger = get_logger(__name__)
+
+class PartitionedPersistenceService:
+    """Persists the museums of a batch in parallel, one pooled session per partition.
+
+    Museums are partitioned by a hash of their name, the key of their upsert, so two partitions
+    never write the same museum or attribute rows and cannot deadlock. Their countries and cities
+    must be committed beforehand: partitions only reference them by id and never write them.
+    Each partition commits on its own, the caller commits the checkpoints of the batch once
+    all its partitions did, so an interrupted import resumes before any partition that failed.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], partitions: int) -> None:
+        self.__session_factory = session_factory
+        self.__partitions = max(partitions, 1)
+
+    @property
+    def partitions(self) -> int:
+        return self.__partitions
+
+    def partition(self, museums: list[Tuple[MuseumDTO, City]]) -> list[list[Tuple[MuseumDTO, City]]]:
+        """Split museums by a stable hash of their name, the empty partitions are left out."""
+        partitions: list[list[Tuple[MuseumDTO, City]]] = [[] for _ in range(self.__partitions)]
+        for museum_dto, city in museums:
+            partitions[zlib.crc32(museum_dto.name.encode()) % self.__partitions].append((museum_dto, city))
+        return [partition for partition in partitions if partition]
+
+    def persist(self, museums: list[Tuple[MuseumDTO, City]]) -> dict[str, int]:
+        """Persist museums and their attributes across the partitions and wait for all of them.
+
+        Args:
+            museums: Museum DTOs with their committed city
+
+        Returns:
+            dict[str, int]: Inserted, updated and deleted museum and attribute counts
+
+        Raises:
+            Exception: The first error of a partition, once every partition has finished
+        """
+        counters = dict.fromkeys(["inserted_museums", "updated_museums", "inserted_attributes", "updated_attributes", "deleted_attributes"], 0)
+        partitions = self.partition(museums)
+        errors: list[Exception] = []
+        with ThreadPoolExecutor(max_workers=len(partitions) or 1, thread_name_prefix="persist") as executor:
+            futures = [executor.submit(self.__persist_partition, partition) for partition in partitions]
+            for future in as_completed(futures):
+                try:
+                    for key, count in future.result().items():
+                        counters[key] += count
+                except Exception as e:
+                    logger.error(f"Persisting a partition of {len(museums)} museums failed: {e}")
+                    errors.append(e)
+        if errors:
+            raise errors[0]
+        logger.debug(f"Persisted {len(museums)} museums in {len(partitions)} partitions")
+        return counters
+
+    def __persist_partition(self, museums: list[Tuple[MuseumDTO, City]]) -> dict[str, int]:
+        with stage_metrics.measure("persist.partition"), self.__session_factory() as session:
+            persistence_service = PersistenceService(
+                session=session,
+                museum_repository=MuseumRepository(session),
+                country_repository=CountryRepository(session),
+                museum_attributes_repository=MuseumAttributesRepository(session),
+                city_repository=CityRepository(session)
+            )
+            try:
+                persisted = persistence_service.persist_museums(museums)
+                inserted_attributes, updated_attributes, deleted_attributes = persistence_service.persist_museums_attributes(
+                    [(persisted[museum_dto.name][0], museum_dto.wikipedia_museum_attributes) for museum_dto, _ in museums]
+                )
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            return {
+                "inserted_museums": sum(inserted for _, inserted, _ in persisted.values()),
+                "updated_museums": sum(updated for _, _, updated in persisted.values()),
+                "inserted_attributes": inserted_attributes,
+                "updated_attributes": updated_attributes,
+                "deleted_attributes": deleted_attributes,
+            }
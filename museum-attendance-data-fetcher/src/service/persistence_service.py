@@ -1,7 +1,8 @@
 
 
-from museum_attendance_common.repository import CityRepository, CountryRepository, MuseumRepository, MuseumAttributesRepository
-from museum_attendance_common.model import Museum, City, Country
+from museum_attendance_common.repository import CityRepository, CountryRepository, MuseumRepository, MuseumAttributesRepository, StagingRepository, MuseumVisitorHistoryRepository
+from museum_attendance_common.model import Museum, City, Country, ImportLog
+from sqlalchemy.orm import Session
 from museum_attendance_common.utils import get_logger
 from museum_attendance_common.exceptions import DatabaseError
 from dto import Museum as MuseumDTO
@@ -15,12 +16,53 @@ class PersistenceService:
     city_repository: CityRepository
     country_repository: CountryRepository
     museum_attributes_repository: MuseumAttributesRepository
+    staging_repository: StagingRepository | None
+    visitor_history_repository: MuseumVisitorHistoryRepository | None
 
-    def __init__(self, museum_repository: MuseumRepository, country_repository: CountryRepository, museum_attributes_repository: MuseumAttributesRepository, city_repository: CityRepository) -> None:
+    def __init__(self, session: Session, museum_repository: MuseumRepository, country_repository: CountryRepository, museum_attributes_repository: MuseumAttributesRepository, city_repository: CityRepository, staging_repository: StagingRepository | None = None, flush_size: int = 1, visitor_history_repository: MuseumVisitorHistoryRepository | None = None) -> None:
+        """Write the entities of an import through the repositories.
+
+        Args:
+            session: Session of the repositories, flushed and committed by the service
+            flush_size: Countries and cities written per flush. With 1 every entity is flushed as
+                soon as it is written, above 1 the changes accumulate in the session (unit of work)
+                and are sent together, pending entities get their ids in the same flush.
+        """
+        self.__session = session
         self.museum_repository = museum_repository
         self.country_repository = country_repository
         self.museum_attributes_repository = museum_attributes_repository
         self.city_repository = city_repository
+        self.staging_repository = staging_repository
+        self.visitor_history_repository = visitor_history_repository
+        self.__flush_size = max(flush_size, 1)
+        self.__pending_count = 0
+
+    def flush(self) -> None:
+        """Send the accumulated changes, the ids of the pending entities are then known."""
+        if self.__pending_count:
+            self.__session.flush()
+            logger.debug(f"Flushed {self.__pending_count} pending entities")
+            self.__pending_count = 0
+
+    def commit(self) -> None:
+        """Commit the entities written so far, sessions on other connections then see them."""
+        self.__session.commit()
+
+    def __track(self, inserted: bool, updated: bool) -> None:
+        if self.__flush_size > 1 and (inserted or updated):
+            self.__pending_count += 1
+            if self.__pending_count >= self.__flush_size:
+                self.flush()
+
+    def preload(self, museum_dtos: list[MuseumDTO]) -> None:
+        """Resolve the countries and cities of a batch with one query each before persisting it.
+
+        Museums are streamed, so this runs once per batch rather than once per run, but the repositories
+        only query the names they have not resolved yet: each country and city is still read once per run.
+        """
+        self.country_repository.preload({museum_dto.get_country() for museum_dto in museum_dtos})
+        self.city_repository.preload({museum_dto.get_city() for museum_dto in museum_dtos})
 
     def persist_country(self, country_name: str) -> Tuple[Country, bool, bool]:
         if not country_name:
@@ -28,7 +70,8 @@ class PersistenceService:
             raise DataProcessingError("Country name cannot be empty", field="country_name", value=country_name)
         
         try:
-            country, inserted, updated = self.country_repository.add(country_name)
+            country, inserted, updated = self.country_repository.add(country_name, flush=self.__flush_size == 1)
+            self.__track(inserted, updated)
             logger.debug(f"Country persisted: {country_name} (inserted={inserted}, updated={updated})")
             return country, inserted, updated
         except DatabaseError:
@@ -48,8 +91,10 @@ class PersistenceService:
                 museum_dto.get_city(), 
                 museum_dto.get_city_population(), 
                 museum_dto.get_city_reference_url(), 
-                country
+                country,
+                flush=self.__flush_size == 1
             )
+            self.__track(inserted, updated)
             logger.debug(f"City persisted: {city_name} (inserted={inserted}, updated={updated})")
             return city, inserted, updated
         except DatabaseError:
@@ -58,47 +103,136 @@ class PersistenceService:
             logger.error(f"Unexpected error persisting city '{city_name}': {str(e)}")
             raise DataProcessingError(f"Failed to persist city: {str(e)}", field="city", value=city_name) from e
     
-    def persist_museum(self, museum_dto: MuseumDTO, city: City) -> Tuple[Museum, bool, bool]:
-        if not museum_dto.name:
-            logger.error("Museum name cannot be empty")
-            raise DataProcessingError("Museum name cannot be empty", field="museum_name", value=museum_dto.name)
-        
+    def persist_museums(self, museums: list[Tuple[MuseumDTO, City]]) -> dict[str, Tuple[Museum, bool, bool]]:
+        """Upsert a batch of museums in one statement.
+
+        Args:
+            museums: Museum DTOs with the city they were persisted in
+
+        Returns:
+            dict: (museum, inserted, updated) by museum name
+        """
+        for museum_dto, _ in museums:
+            if not museum_dto.name:
+                logger.error("Museum name cannot be empty")
+                raise DataProcessingError("Museum name cannot be empty", field="museum_name", value=museum_dto.name)
+
+        try:
+            # The museums reference their cities by id, the pending cities are inserted together first
+            self.flush()
+            persisted = self.museum_repository.persist_many([
+                dict(
+                    name=museum_dto.name,
+                    number_of_visitors=museum_dto.get_museum_visitor_count(),
+                    reference_url=museum_dto.get_museum_reference_url(),
+                    city=city
+                )
+                for museum_dto, city in museums
+            ])
+            logger.debug(f"Museums persisted: {len(persisted)}")
+            return {museum.name: (museum, inserted, updated) for museum, inserted, updated in persisted}
+        except DatabaseError:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error persisting {len(museums)} museums: {str(e)}")
+            raise DataProcessingError(f"Failed to persist museums: {str(e)}", field="museum_name") from e
+
+    def persist_museums_attributes(self, museums: list[Tuple[Museum, dict[str, str] | None]]) -> Tuple[int, int, int]:
+        """Replace the attributes of a batch of museums.
+
+        Museums without attributes (their page could not be fetched) are skipped, so the attributes
+        of a previous import are kept instead of deleted.
+
+        Returns:
+            Tuple[int, int, int]: Inserted, updated and deleted attribute counts
+        """
         try:
-            museum, inserted, updated = self.museum_repository.persist(
-                name=museum_dto.name,
-                number_of_visitors=museum_dto.get_museum_visitor_count(),
-                reference_url=museum_dto.get_museum_reference_url(),
-                city=city
+            inserted_count, updated_count, deleted_count = self.museum_attributes_repository.persist_many(
+                [(museum, attributes) for museum, attributes in museums if attributes is not None]
             )
-            logger.debug(f"Museum persisted: {museum_dto.name} (inserted={inserted}, updated={updated})")
-            return museum, inserted, updated
+            logger.debug(f"Museum attributes persisted for {len(museums)} museums: {inserted_count} inserted, {updated_count} updated, {deleted_count} deleted")
+            return inserted_count, updated_count, deleted_count
         except DatabaseError:
             raise
         except Exception as e:
-            logger.error(f"Unexpected error persisting museum '{museum_dto.name}': {str(e)}")
-            raise DataProcessingError(f"Failed to persist museum: {str(e)}", field="museum_name", value=museum_dto.name) from e
+            logger.error(f"Unexpected error persisting museum attributes of {len(museums)} museums: {str(e)}")
+            raise DataProcessingError(f"Failed to persist museum attributes: {str(e)}") from e
 
-    def persist_museum_attributes(self, attributes: dict[str, str], museum: Museum) -> Tuple[int, int]:
-        inserted_count = 0
-        updated_count = 0
-        
+    def persist_visitor_history(self, import_log: ImportLog, museum_dtos: list[MuseumDTO]) -> int:
+        """Record the visitor counts of persisted museums for the import job, without a history repository nothing is recorded.
+
+        Returns:
+            int: Number of visitor counts recorded
+        """
+        if self.visitor_history_repository is None:
+            return 0
         try:
-            for museum_attribute_key, museum_attribute_value in attributes.items():
-                museum_attribute, inserted, updated = self.museum_attributes_repository.persist(
-                    museum=museum,
-                    attribute_key=museum_attribute_key,
-                    attribute_value=museum_attribute_value
-                )
-                if inserted:
-                    inserted_count += 1
-                if updated:
-                    updated_count += 1
-            
-            logger.debug(f"Museum attributes persisted for museum {museum.id}: {inserted_count} inserted, {updated_count} updated")
-            return inserted_count, updated_count
-            
+            # The museums are read back from the database, they must have been persisted (or merged) first
+            self.flush()
+            recorded: int = self.visitor_history_repository.persist_many(import_log, [museum_dto.name for museum_dto in museum_dtos])
+            return recorded
         except DatabaseError:
             raise
         except Exception as e:
-            logger.error(f"Unexpected error persisting museum attributes for museum {museum.id}: {str(e)}")
-            raise DataProcessingError(f"Failed to persist museum attributes: {str(e)}") from e
\ No newline at end of file
+            logger.error(f"Unexpected error recording the visitor history of {len(museum_dtos)} museums: {str(e)}")
+            raise DataProcessingError(f"Failed to persist visitor history: {str(e)}") from e
+
+    def persist_staged_visitor_history(self, import_log: ImportLog) -> int:
+        """Record the visitor counts of the museums merged from the staging tables, without a history repository nothing is recorded.
+
+        Returns:
+            int: Number of visitor counts recorded
+        """
+        if self.visitor_history_repository is None:
+            return 0
+        recorded: int = self.visitor_history_repository.persist_staged(import_log)
+        return recorded
+
+    def start_staging(self) -> None:
+        """Create the staging tables, they live until the end of the transaction."""
+        if self.staging_repository is None:
+            raise DataProcessingError("Staging museums requires a staging repository")
+        self.staging_repository.create_tables()
+
+    def stage_museums(self, museum_dtos: list[MuseumDTO]) -> None:
+        """Copy a batch of museums with their city, country and attributes into the staging tables."""
+        if self.staging_repository is None:
+            raise DataProcessingError("Staging museums requires a staging repository")
+        for museum_dto in museum_dtos:
+            if not museum_dto.name:
+                logger.error("Museum name cannot be empty")
+                raise DataProcessingError("Museum name cannot be empty", field="museum_name", value=museum_dto.name)
+            if not museum_dto.get_city():
+                logger.error("City name cannot be empty")
+                raise DataProcessingError("City name cannot be empty", field="city", value=museum_dto.get_city())
+            if not museum_dto.get_country():
+                logger.error("Country name cannot be empty")
+                raise DataProcessingError("Country name cannot be empty", field="country_name", value=museum_dto.get_country())
+
+        try:
+            self.staging_repository.copy_cities(
+                (museum_dto.get_city(), museum_dto.get_city_population(), museum_dto.get_city_reference_url(), museum_dto.get_country())
+                for museum_dto in museum_dtos
+            )
+            self.staging_repository.copy_museums(
+                (museum_dto.name, museum_dto.get_museum_visitor_count(), museum_dto.get_museum_reference_url(), museum_dto.get_city(), museum_dto.wikipedia_museum_attributes is not None)
+                for museum_dto in museum_dtos
+            )
+            self.staging_repository.copy_attributes(
+                (museum_dto.name, attribute_key, attribute_value)
+                for museum_dto in museum_dtos
+                for attribute_key, attribute_value in (museum_dto.wikipedia_museum_attributes or {}).items()
+            )
+            logger.debug(f"Museums staged: {len(museum_dtos)}")
+        except DatabaseError:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error staging {len(museum_dtos)} museums: {str(e)}")
+            raise DataProcessingError(f"Failed to stage museums: {str(e)}") from e
+
+    def merge_staged_museums(self) -> dict[str, int]:
+        """Merge everything staged during the run, in the current transaction."""
+        if self.staging_repository is None:
+            raise DataProcessingError("Merging museums requires a staging repository")
+        counters: dict[str, int] = self.staging_repository.merge()
+        return counters
@@ -0,0 +1,30 @@
+"""Tests for CollectionMetrics DTO."""
+from dto import CollectionMetrics
+
+
+class TestCollectionMetrics:
+    """Test suite for CollectionMetrics DTO."""
+
+    def test_default_values(self):
+        """Test that all counters start at zero."""
+        metrics = CollectionMetrics()
+
+        assert metrics.museum_pages_requested == 0
+        assert metrics.city_pages_requested == 0
+        assert metrics.city_requests_avoided == 0
+        assert metrics.pages_restored_from_checkpoint == 0
+
+    def test_to_dict(self):
+        """Test converting metrics to a dictionary for the import log."""
+        metrics = CollectionMetrics(museum_pages_requested=10, city_pages_requested=4, city_requests_avoided=6)
+
+        assert metrics.to_dict() == {
+            "museum_pages_requested": 10,
+            "city_pages_requested": 4,
+            "city_requests_avoided": 6,
+            "pages_restored_from_checkpoint": 0,
+            "concurrency": {},
+            "lists": {},
+            "deadline_exceeded": False,
+            "coverage": {},
+        }
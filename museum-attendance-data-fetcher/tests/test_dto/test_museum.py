@@ -184,3 +184,20 @@ class TestMuseum:
         )
         
         assert museum.get_museum_visitor_count() == 9_600_000
+
+    def test_get_museum_key(self):
+        """Test that a museum is identified by its page title, or by its name when it has no page."""
+        museum = Museum(
+            name="Louvre",
+            visitor_count=9_600_000,
+            city="Paris",
+            wikipedia_city_details_page_title="Paris",
+            wikipedia_city_details=None,
+            country="France",
+            wikipedia_museum_details_page_title="Musée du Louvre",
+            wikipedia_museum_attributes={}
+        )
+
+        assert museum.get_museum_key() == "Musée du Louvre"
+        museum.wikipedia_museum_details_page_title = GlobalEnum.NA.value
+        assert museum.get_museum_key() == "Louvre"
@@ -0,0 +1,118 @@
+"""Tests for AdaptiveConcurrencyController."""
+import threading
+import pytest
+
+from service.api.adaptive_concurrency_controller import AdaptiveConcurrencyController
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAdaptiveConcurrencyController:
+    """Test suite for AdaptiveConcurrencyController."""
+
+    @pytest.fixture
+    def clock(self):
+        """Create a manually advanced clock."""
+        return FakeClock()
+
+    def complete_requests(self, controller, count, latency=0.1, **outcome):
+        """Run a number of requests through the controller."""
+        for _ in range(count):
+            controller.acquire()
+            controller.release(latency, **outcome)
+
+    def test_initial_limit_is_clamped(self, clock):
+        """Test that the initial limit stays within floor and ceiling."""
+        assert AdaptiveConcurrencyController(floor=2, ceiling=4, target_latency=1.0, initial=10, clock=clock).limit == 4
+        assert AdaptiveConcurrencyController(floor=2, ceiling=4, target_latency=1.0, initial=1, clock=clock).limit == 2
+
+    def test_invalid_bounds(self):
+        """Test that a ceiling below the floor is rejected."""
+        with pytest.raises(ValueError):
+            AdaptiveConcurrencyController(floor=5, ceiling=2, target_latency=1.0)
+
+    def test_additive_increase_after_fast_window(self, clock):
+        """Test that a full window of fast requests raises the limit by one."""
+        controller = AdaptiveConcurrencyController(floor=1, ceiling=10, target_latency=1.0, initial=3, clock=clock)
+
+        self.complete_requests(controller, 2)
+        assert controller.limit == 3
+
+        self.complete_requests(controller, 1)
+        assert controller.limit == 4
+
+    def test_multiplicative_decrease_on_throttling(self, clock):
+        """Test that a 429 response halves the limit."""
+        controller = AdaptiveConcurrencyController(floor=1, ceiling=10, target_latency=1.0, initial=8, clock=clock)
+
+        self.complete_requests(controller, 1, error=True, throttled=True)
+
+        assert controller.limit == 4
+
+    def test_decrease_on_slow_requests(self, clock):
+        """Test that latency above the target is treated as congestion."""
+        controller = AdaptiveConcurrencyController(floor=1, ceiling=10, target_latency=1.0, initial=8, clock=clock)
+
+        self.complete_requests(controller, 1, latency=3.0)
+
+        assert controller.limit == 4
+
+    def test_burst_of_errors_decreases_once(self, clock):
+        """Test that failures from the same window only cut the limit once."""
+        controller = AdaptiveConcurrencyController(floor=1, ceiling=10, target_latency=1.0, initial=8, clock=clock)
+
+        self.complete_requests(controller, 3, error=True)
+        assert controller.limit == 4
+
+        clock.now = 5.0
+        self.complete_requests(controller, 1, error=True)
+        assert controller.limit == 2
+
+    def test_limit_never_drops_below_floor(self, clock):
+        """Test that the floor is respected."""
+        controller = AdaptiveConcurrencyController(floor=2, ceiling=10, target_latency=1.0, initial=2, clock=clock)
+
+        self.complete_requests(controller, 1, error=True)
+
+        assert controller.limit == 2
+
+    def test_acquire_blocks_at_limit(self, clock):
+        """Test that no more than the limit of requests run at once."""
+        controller = AdaptiveConcurrencyController(floor=1, ceiling=1, target_latency=1.0, clock=clock)
+        controller.acquire()
+        acquired = threading.Event()
+
+        waiter = threading.Thread(target=lambda: (controller.acquire(), acquired.set()))
+        waiter.start()
+        assert not acquired.wait(0.1)
+
+        controller.release(0.1)
+        assert acquired.wait(1.0)
+        waiter.join()
+        assert controller.in_flight == 1
+
+    def test_report_records_limit_over_time(self, clock):
+        """Test that the report exposes the concurrency level over time."""
+        controller = AdaptiveConcurrencyController(floor=1, ceiling=10, target_latency=1.0, initial=2, clock=clock)
+        clock.now = 1.5
+        self.complete_requests(controller, 2)
+        clock.now = 3.0
+        self.complete_requests(controller, 1, error=True, throttled=True)
+
+        report = controller.report()
+
+        assert report["samples"] == [[0.0, 2], [1.5, 3], [3.0, 1]]
+        assert report["min"] == 1
+        assert report["max"] == 3
+        assert report["final"] == 1
+        assert report["requests"] == 3
+        assert report["errors"] == 1
+        assert report["throttled"] == 1
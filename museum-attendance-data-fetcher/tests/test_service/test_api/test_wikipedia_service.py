@@ -86,7 +86,7 @@ class TestWikipediaService:
         assert "Authentication failed" in str(exc_info.value)
 
     @patch('service.api.wikipedia_service.requests.get')
-    @patch('service.api.wikipedia_service.time.time')
+    @patch('service.api.wikipedia_service.time.monotonic')
     def test_get_page_html_success(self, mock_time, mock_get, wiki_service):
         """Test successful page fetch."""
         mock_time.side_effect = [200.0, 200.8]
@@ -168,6 +168,21 @@ class TestWikipediaService:
         
         assert "Request error" in str(exc_info.value)
 
+    @patch('service.api.wikipedia_service.requests.get')
+    @patch('service.api.wikipedia_service.time.monotonic')
+    def test_get_page_html_reports_request_latency(self, mock_time, mock_get, wiki_service):
+        """Test that only the HTTP request is timed, failed or not."""
+        mock_time.side_effect = [200.0, 200.8, 300.0, 330.0]
+        wiki_service._WikipediaService__access_token = "test_token"
+        mock_get.side_effect = [Mock(status_code=200, text="<html></html>"), RequestException("Read timed out")]
+        latencies = []
+
+        wiki_service.get_page_html("Test_Page", on_latency=latencies.append)
+        with pytest.raises(APIError):
+            wiki_service.get_page_html("Other_Page", on_latency=latencies.append)
+
+        assert latencies == [pytest.approx(0.8), pytest.approx(30.0)]
+
     @patch('builtins.open', new_callable=mock_open)
     @patch('os.path.exists')
     @patch('os.makedirs')
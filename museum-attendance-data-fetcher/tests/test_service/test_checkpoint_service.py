@@ -0,0 +1,47 @@
+"""Tests for CheckpointService."""
+from unittest.mock import Mock
+
+from museum_attendance_common.enumeration import ImportStatus, PageType
+from museum_attendance_common.model import ImportCheckpoint, ImportLog
+
+from service.checkpoint_service import CheckpointService
+
+
+class TestCheckpointService:
+    """Test suite for CheckpointService."""
+
+    def test_loads_existing_checkpoints(self):
+        """Test that checkpoints of an earlier attempt are reported as completed."""
+        checkpoint_service = CheckpointService([
+            ImportCheckpoint(page_type=PageType.CITY.value, page_key="Paris", payload={"name": "Paris"}),
+        ])
+
+        assert checkpoint_service.completed_count == 1
+        assert checkpoint_service.is_completed(PageType.CITY, "Paris")
+        assert not checkpoint_service.is_completed(PageType.MUSEUM, "Paris")
+        assert checkpoint_service.get_payload(PageType.CITY, "Paris") == {"name": "Paris"}
+
+    def test_mark_completed(self):
+        """Test that a page marked as completed is immediately visible."""
+        checkpoint_service = CheckpointService()
+
+        checkpoint_service.mark_completed(PageType.MUSEUM, "Louvre")
+
+        assert checkpoint_service.is_completed(PageType.MUSEUM, "Louvre")
+        assert checkpoint_service.get_payload(PageType.MUSEUM, "Louvre") is None
+
+    def test_save_writes_pending_checkpoints_once(self):
+        """Test that only checkpoints recorded since the last save are written."""
+        repository = Mock()
+        import_log = ImportLog(status=ImportStatus.IN_PROGRESS.value)
+        import_log.id = 1
+        checkpoint_service = CheckpointService()
+        checkpoint_service.mark_completed(PageType.CITY, "Paris", {"name": "Paris"})
+        checkpoint_service.mark_completed(PageType.MUSEUM, "Louvre")
+
+        assert checkpoint_service.save(repository, import_log) == 2
+        assert checkpoint_service.save(repository, import_log) == 0
+
+        repository.mark_completed.assert_any_call(import_log, PageType.CITY, "Paris", {"name": "Paris"})
+        repository.mark_completed.assert_any_call(import_log, PageType.MUSEUM, "Louvre", None)
+        assert repository.mark_completed.call_count == 2
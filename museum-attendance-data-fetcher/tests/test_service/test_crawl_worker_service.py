@@ -0,0 +1,319 @@
+"""Tests for CrawlWorkerService."""
+import multiprocessing
+import os
+import pytest
+from unittest.mock import Mock, patch
+
+from dataclasses import asdict
+from museum_attendance_common.enumeration import CrawlTaskStatus, ImportStatus, PageType
+from museum_attendance_common.model import CrawlTask, ImportLog
+
+from service.crawl_worker_service import CrawlWorkerService
+from dto import Museum, City
+
+
+def make_museum(name, city_page_title):
+    """Create a Museum DTO as produced by the list page extractor."""
+    return Museum(
+        name=name,
+        visitor_count=1_000_000,
+        city=city_page_title,
+        wikipedia_city_details_page_title=city_page_title,
+        wikipedia_city_details=None,
+        country="France",
+        wikipedia_museum_details_page_title=name,
+        wikipedia_museum_attributes=None
+    )
+
+
+class TestCrawlWorkerService:
+    """Test suite for CrawlWorkerService."""
+
+    @pytest.fixture
+    def import_log(self):
+        """Create an in-progress ImportLog."""
+        import_log = ImportLog(status=ImportStatus.IN_PROGRESS.value)
+        import_log.id = 7
+        return import_log
+
+    @pytest.fixture
+    def repositories(self):
+        """Patch the repositories created by the worker."""
+        with patch('service.crawl_worker_service.CrawlTaskRepository') as crawl_task_repository_class, \
+                patch('service.crawl_worker_service.ImportLogRepository') as import_log_repository_class:
+            yield crawl_task_repository_class.return_value, import_log_repository_class.return_value
+
+    @staticmethod
+    def make_task(page_type, page_key, payload=None):
+        """Create a claimed CrawlTask of import job 7."""
+        return CrawlTask(import_log_id=7, page_type=page_type.value, page_key=page_key, payload=payload, status=CrawlTaskStatus.CLAIMED.value, attempts=1)
+
+    def test_enqueue_lists(self, repositories, import_log):
+        """Test that the list pages start the crawl of the import job."""
+        crawl_task_repository, _ = repositories
+        session = Mock()
+
+        CrawlWorkerService(session, import_log, "worker-1").enqueue_lists(["List_A", "List_B"])
+
+        crawl_task_repository.enqueue.assert_any_call(import_log, PageType.LIST, "List_A")
+        crawl_task_repository.enqueue.assert_any_call(import_log, PageType.LIST, "List_B")
+        session.commit.assert_called_once()
+
+    @patch('service.crawl_worker_service.DataCollectionService')
+    def test_run_list_task_queues_museum_and_city_pages(self, mock_data_collection_service, repositories, import_log):
+        """Test that a list page queues its museum and city pages and the worker then completes the job."""
+        crawl_task_repository, import_log_repository = repositories
+        list_task = self.make_task(PageType.LIST, "List_of_most_visited_museums")
+        crawl_task_repository.claim.side_effect = [[list_task], []]
+        crawl_task_repository.count_unfinished.return_value = 0
+        import_log_repository.lock.return_value = import_log
+        mock_data_collection_service.fetch_museum_list.return_value = [make_museum("Louvre", "Paris"), make_museum("Unknown Museum", "NA")]
+
+        must_complete = CrawlWorkerService(Mock(), import_log, "worker-1").run()
+
+        assert must_complete is True
+        crawl_task_repository.enqueue.assert_any_call(import_log, PageType.MUSEUM, "Louvre", asdict(make_museum("Louvre", "Paris")))
+        crawl_task_repository.enqueue.assert_any_call(import_log, PageType.CITY, "Paris")
+        assert crawl_task_repository.enqueue.call_count == 3
+        crawl_task_repository.complete.assert_called_once_with(list_task, "worker-1", 300, {"museums": 2})
+
+    @patch('service.crawl_worker_service.DataCollectionService')
+    def test_run_list_task_keys_museums_like_checkpoints(self, mock_data_collection_service, repositories, import_log):
+        """Test that museum pages are queued under Museum.get_museum_key(), the key of the checkpoints."""
+        crawl_task_repository, import_log_repository = repositories
+        crawl_task_repository.claim.side_effect = [[self.make_task(PageType.LIST, "List_of_most_visited_museums")], []]
+        crawl_task_repository.count_unfinished.return_value = 0
+        import_log_repository.lock.return_value = import_log
+        louvre = make_museum("Louvre", "Paris")
+        louvre.wikipedia_museum_details_page_title = "Musée du Louvre"
+        unknown_museum = make_museum("Unknown Museum", "NA")
+        unknown_museum.wikipedia_museum_details_page_title = "NA"
+        mock_data_collection_service.fetch_museum_list.return_value = [louvre, unknown_museum]
+
+        CrawlWorkerService(Mock(), import_log, "worker-1").run()
+
+        museum_keys = [call.args[2] for call in crawl_task_repository.enqueue.call_args_list if call.args[1] == PageType.MUSEUM]
+        assert museum_keys == [louvre.get_museum_key(), unknown_museum.get_museum_key()] == ["Musée du Louvre", "Unknown Museum"]
+
+    @patch('service.crawl_worker_service.DataCollectionService')
+    def test_run_museum_and_city_tasks_store_parsed_pages(self, mock_data_collection_service, repositories, import_log):
+        """Test that museum and city tasks are completed with their parsed page."""
+        crawl_task_repository, import_log_repository = repositories
+        museum_task = self.make_task(PageType.MUSEUM, "Louvre", asdict(make_museum("Louvre", "Paris")))
+        city_task = self.make_task(PageType.CITY, "Paris")
+        crawl_task_repository.claim.side_effect = [[museum_task, city_task], []]
+        crawl_task_repository.count_unfinished.return_value = 0
+        import_log_repository.lock.return_value = import_log
+
+        def fetch_museum_details(museum, concurrency_controller, raise_errors):
+            museum.wikipedia_museum_attributes = {"established": "1793"}
+            return museum
+
+        mock_data_collection_service.fetch_museum_details.side_effect = fetch_museum_details
+        mock_data_collection_service.fetch_city_details.return_value = City(name="Paris", country="France", population=2_165_000)
+
+        CrawlWorkerService(Mock(), import_log, "worker-1").run()
+
+        results = {call.args[0].page_key: call.args[3] for call in crawl_task_repository.complete.call_args_list}
+        assert results["Louvre"]["wikipedia_museum_attributes"] == {"established": "1793"}
+        assert results["Paris"] == {"name": "Paris", "country": "France", "population": 2_165_000}
+
+    @patch('service.crawl_worker_service.DataCollectionService')
+    def test_run_failed_task_is_reported(self, mock_data_collection_service, repositories, import_log):
+        """Test that a task whose page cannot be fetched is failed instead of completed."""
+        crawl_task_repository, import_log_repository = repositories
+        list_task = self.make_task(PageType.LIST, "List_of_most_visited_museums")
+        crawl_task_repository.claim.side_effect = [[list_task], []]
+        crawl_task_repository.count_unfinished.return_value = 0
+        import_log_repository.lock.return_value = import_log
+        mock_data_collection_service.fetch_museum_list.side_effect = RuntimeError("Service unavailable")
+
+        CrawlWorkerService(Mock(), import_log, "worker-1").run()
+
+        crawl_task_repository.fail.assert_called_once_with(list_task, "worker-1", 300, "Service unavailable", 3)
+        crawl_task_repository.complete.assert_not_called()
+
+    @patch('service.crawl_worker_service.DataCollectionService')
+    def test_run_page_errors_reach_the_queue(self, mock_data_collection_service, repositories, import_log):
+        """Test that museum and city pages are fetched without swallowing errors, so they are retried."""
+        crawl_task_repository, import_log_repository = repositories
+        museum_task = self.make_task(PageType.MUSEUM, "Louvre", asdict(make_museum("Louvre", "Paris")))
+        city_task = self.make_task(PageType.CITY, "Paris")
+        crawl_task_repository.claim.side_effect = [[museum_task, city_task], []]
+        crawl_task_repository.count_unfinished.return_value = 0
+        import_log_repository.lock.return_value = import_log
+        mock_data_collection_service.fetch_museum_details.side_effect = TimeoutError("Read timed out")
+        mock_data_collection_service.fetch_city_details.side_effect = TimeoutError("Read timed out")
+
+        CrawlWorkerService(Mock(), import_log, "worker-1").run()
+
+        assert mock_data_collection_service.fetch_museum_details.call_args.kwargs == {"raise_errors": True}
+        assert mock_data_collection_service.fetch_city_details.call_args.kwargs == {"raise_errors": True}
+        assert {call.args[0].page_key for call in crawl_task_repository.fail.call_args_list} == {"Louvre", "Paris"}
+        crawl_task_repository.complete.assert_not_called()
+
+    @patch('service.crawl_worker_service.DataCollectionService')
+    def test_run_lost_lease_is_not_counted(self, mock_data_collection_service, repositories, import_log):
+        """Test that a task claimed again by another worker is not counted as completed by this one."""
+        crawl_task_repository, import_log_repository = repositories
+        crawl_task_repository.claim.side_effect = [[self.make_task(PageType.CITY, "Paris")], []]
+        crawl_task_repository.count_unfinished.return_value = 0
+        crawl_task_repository.complete.return_value = False
+        import_log_repository.lock.return_value = import_log
+        mock_data_collection_service.fetch_city_details.return_value = City(name="Paris", country="France", population=2_165_000)
+        session = Mock()
+
+        with patch('service.crawl_worker_service.logger') as mock_logger:
+            CrawlWorkerService(session, import_log, "worker-1").run()
+
+        assert "lost the lease" in mock_logger.warning.call_args.args[0]
+        assert any("completed 0 tasks" in call.args[0] for call in mock_logger.info.call_args_list)
+
+    @patch('service.crawl_worker_service.time')
+    def test_run_waits_for_tasks_held_by_other_workers(self, mock_time, repositories, import_log):
+        """Test that a worker polls while other workers still hold tasks."""
+        crawl_task_repository, import_log_repository = repositories
+        crawl_task_repository.claim.return_value = []
+        crawl_task_repository.count_unfinished.side_effect = [2, 0, 0]
+        import_log_repository.lock.return_value = import_log
+
+        assert CrawlWorkerService(Mock(), import_log, "worker-1").run() is True
+        mock_time.sleep.assert_called_once()
+
+    def test_run_job_completed_by_another_worker(self, repositories, import_log):
+        """Test that only the worker finding the job still IN_PROGRESS completes it."""
+        crawl_task_repository, import_log_repository = repositories
+        crawl_task_repository.claim.return_value = []
+        crawl_task_repository.count_unfinished.return_value = 0
+        import_log_repository.lock.return_value = ImportLog(status=ImportStatus.SUCCESS.value)
+
+        assert CrawlWorkerService(Mock(), import_log, "worker-2").run() is False
+
+    def test_collect_results_attaches_cities(self, repositories, import_log):
+        """Test that crawled museums are rebuilt with the city crawled by any worker."""
+        crawl_task_repository, _ = repositories
+        city_tasks = [self.make_task(PageType.CITY, "Paris")]
+        city_tasks[0].result = {"name": "Paris", "country": "France", "population": 2_165_000}
+        museum_tasks = [self.make_task(PageType.MUSEUM, "Louvre"), self.make_task(PageType.MUSEUM, "Unknown Museum")]
+        museum_tasks[0].result = asdict(make_museum("Louvre", "Paris"))
+        museum_tasks[1].result = asdict(make_museum("Unknown Museum", "NA"))
+        crawl_task_repository.get_completed.side_effect = lambda import_log, page_type: city_tasks if page_type == PageType.CITY else museum_tasks
+
+        museums = list(CrawlWorkerService(Mock(), import_log, "worker-1").collect_results())
+
+        assert [museum.name for museum in museums] == ["Louvre", "Unknown Museum"]
+        assert museums[0].wikipedia_city_details == City(name="Paris", country="France", population=2_165_000)
+        assert museums[1].wikipedia_city_details is None
+
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+def run_worker(database_url, import_log_id, worker_id, outcomes):
+    """Run one fetcher replica in its own process and connection, as a container would."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from museum_attendance_common.repository import ImportLogRepository
+
+    engine = create_engine(database_url)
+    with Session(engine, expire_on_commit=False) as session:
+        import_log = session.get(ImportLog, import_log_id)
+        crawl_worker = CrawlWorkerService(session, import_log, worker_id)
+        must_complete = crawl_worker.run()
+        if must_complete:
+            ImportLogRepository(session).end_job_with_success(crawl_worker.import_log, result=crawl_worker.get_summary())
+            session.commit()
+    engine.dispose()
+    outcomes.put(must_complete)
+
+
+@pytest.mark.skipif(TEST_DATABASE_URL is None, reason="set TEST_DATABASE_URL to a local Postgres database to run")
+class TestCrawlWorkerServicePostgres:
+    """Runs several worker processes on one import job against a real Postgres database."""
+
+    @pytest.fixture
+    def engine(self):
+        """Create the queue tables in the test database."""
+        from sqlalchemy import create_engine
+        from museum_attendance_common.model.base import Base
+
+        engine = create_engine(TEST_DATABASE_URL)
+        Base.metadata.create_all(engine, tables=[ImportLog.__table__, CrawlTask.__table__])
+        yield engine
+        engine.dispose()
+
+    def test_workers_split_the_crawl_and_complete_the_job_once(self, engine):
+        """Test that every page is crawled once and a single worker completes the job."""
+        from sqlalchemy.orm import Session
+        from museum_attendance_common.repository import CrawlTaskRepository, ImportLogRepository
+
+        with Session(engine, expire_on_commit=False) as session:
+            import_log = ImportLogRepository(session).start_job(ImportStatus.IN_PROGRESS)
+            CrawlTaskRepository(session).enqueue(import_log, PageType.LIST, "List_of_most_visited_museums")
+            session.commit()
+        engine.dispose()
+
+        museums = [make_museum(f"Museum {index}", f"City {index % 5}") for index in range(30)]
+
+        def fetch_museum_details(museum, concurrency_controller, raise_errors):
+            museum.wikipedia_museum_attributes = {"fetched_by": str(os.getpid())}
+            return museum
+
+        context = multiprocessing.get_context("fork")
+        outcomes = context.Queue()
+        with patch('service.crawl_worker_service.DataCollectionService') as mock_data_collection_service, \
+                patch('service.crawl_worker_service.settings') as mock_settings:
+            mock_data_collection_service.fetch_museum_list.return_value = museums
+            mock_data_collection_service.fetch_museum_details.side_effect = fetch_museum_details
+            mock_data_collection_service.fetch_city_details.side_effect = lambda title, concurrency_controller, raise_errors: City(name=title, country="France", population=1)
+            mock_settings.configure_mock(
+                concurrency_floor=1, concurrency_ceiling=2, concurrency_target_latency=2.0, max_workers=2,
+                crawl_claim_batch_size=2, crawl_task_lease_seconds=300, crawl_task_max_attempts=3, crawl_poll_interval=0.05
+            )
+            processes = [context.Process(target=run_worker, args=(TEST_DATABASE_URL, import_log.id, f"worker-{index}", outcomes)) for index in range(3)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join(timeout=60)
+
+        assert all(process.exitcode == 0 for process in processes)
+        assert sorted(outcomes.get(timeout=5) for _ in processes) == [False, False, True]
+
+        with Session(engine) as session:
+            import_log = session.get(ImportLog, import_log.id)
+            assert import_log.status == ImportStatus.SUCCESS.value
+            assert import_log.result["crawl_tasks"] == {CrawlTaskStatus.DONE.value: 36}
+            assert sum(import_log.result["workers"].values()) == 36
+            assert len(import_log.result["workers"]) > 1
+            session.delete(import_log)
+            session.commit()
+
+    def test_task_abandoned_on_its_last_attempt_fails(self, engine):
+        """Test that a task whose lease expired on its last attempt is marked FAILED and the job still completes."""
+        from datetime import datetime, timedelta
+        from sqlalchemy.orm import Session
+        from museum_attendance_common.repository import ImportLogRepository
+
+        with Session(engine, expire_on_commit=False) as session:
+            import_log = ImportLogRepository(session).start_job(ImportStatus.IN_PROGRESS)
+            session.add(CrawlTask(
+                import_log_id=import_log.id, page_type=PageType.MUSEUM.value, page_key="Louvre", payload=asdict(make_museum("Louvre", "Paris")),
+                status=CrawlTaskStatus.CLAIMED.value, claimed_by="worker-killed", claimed_at=datetime.now() - timedelta(hours=1), attempts=3
+            ))
+            session.commit()
+
+            with patch('service.crawl_worker_service.DataCollectionService') as mock_data_collection_service, \
+                    patch('service.crawl_worker_service.settings') as mock_settings:
+                mock_settings.configure_mock(
+                    concurrency_floor=1, concurrency_ceiling=2, concurrency_target_latency=2.0, max_workers=2,
+                    crawl_claim_batch_size=2, crawl_task_lease_seconds=300, crawl_task_max_attempts=3, crawl_poll_interval=0.05
+                )
+                assert CrawlWorkerService(session, import_log, "worker-1").run() is True
+            session.commit()
+
+            mock_data_collection_service.fetch_museum_details.assert_not_called()
+            task = session.query(CrawlTask).filter(CrawlTask.import_log_id == import_log.id).one()
+            assert task.status == CrawlTaskStatus.FAILED.value
+            assert task.attempts == 3
+            session.delete(import_log)
+            session.commit()
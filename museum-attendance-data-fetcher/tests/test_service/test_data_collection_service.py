@@ -1,10 +1,20 @@
 """Tests for DataCollectionService."""
+import gc
+import threading
+import time
+import tracemalloc
 import pytest
-from unittest.mock import Mock, MagicMock, patch
-from bs4 import BeautifulSoup
+from unittest.mock import Mock, patch
+
+from dataclasses import asdict
+from museum_attendance_common.enumeration import PageType
+from museum_attendance_common.model import ImportCheckpoint
+from museum_attendance_common.utils import stage_metrics
 
 from service.data_collection_service import DataCollectionService
-from dto import Museum, City, MostVisitedMuseumList
+from service.checkpoint_service import CheckpointService
+from dto import Museum, City, CollectionMetrics
+from exceptions import APIError
 
 
 class TestDataCollectionService:
@@ -24,41 +34,221 @@ class TestDataCollectionService:
             wikipedia_museum_attributes={}
         )
 
-    @pytest.fixture
-    def sample_museums_list(self, sample_museum):
-        """Create a sample list of museums."""
-        return [sample_museum]
+    @staticmethod
+    def make_museum(name, city_page_title):
+        """Create a Museum DTO as produced by the list page extractor."""
+        return Museum(
+            name=name,
+            visitor_count=1_000_000,
+            city=city_page_title,
+            wikipedia_city_details_page_title=city_page_title,
+            wikipedia_city_details=None,
+            country="France",
+            wikipedia_museum_details_page_title=name,
+            wikipedia_museum_attributes=None
+        )
 
     @patch('service.data_collection_service.wikipedia_service')
+    @patch('service.data_collection_service.CityPageExtractor')
+    @patch('service.data_collection_service.MuseumInstancePageExtractor')
     @patch('service.data_collection_service.MuseumListPageExtractor')
-    @patch('service.data_collection_service.ThreadPoolExecutor')
-    def test_collect_data_success(self, mock_executor, mock_extractor_class, mock_wiki_service, sample_museums_list):
+    def test_collect_data_success(self, mock_list_extractor_class, mock_instance_extractor_class, mock_city_extractor_class, mock_wiki_service):
         """Test successful data collection."""
-        # Mock Wikipedia service
         mock_wiki_service.get_page_html.return_value = "<html>Museum list content</html>"
-        
-        # Mock extractor
-        mock_extractor = Mock()
-        mock_extractor.to_dto.return_value = sample_museums_list
-        mock_extractor_class.return_value = mock_extractor
-        
-        # Mock ThreadPoolExecutor
-        mock_executor_instance = MagicMock()
-        mock_executor.return_value.__enter__.return_value = mock_executor_instance
-        
-        # Mock futures
-        mock_future = Mock()
-        mock_future.result.return_value = sample_museums_list[0]
-        mock_executor_instance.submit.return_value = mock_future
-        
-        with patch('service.data_collection_service.as_completed') as mock_as_completed:
-            mock_as_completed.side_effect = [[mock_future], [mock_future]]
-            
-            result = DataCollectionService.collect_data("List_of_most_visited_museums")
-        
-        assert isinstance(result, MostVisitedMuseumList)
-        assert len(result.wikipedia_museum_instance_list) == 1
-        mock_wiki_service.get_page_html.assert_called_once_with("List_of_most_visited_museums")
+        mock_list_extractor_class.return_value.to_dto.return_value = [self.make_museum("Louvre", "Paris")]
+        mock_instance_extractor_class.return_value.get_data.return_value = {"established": "1793"}
+        mock_city_extractor_class.return_value.to_dto.return_value = City(name="Paris", country="France", population=2_165_000)
+
+        result = list(DataCollectionService.collect_data(["List_of_most_visited_museums"]))
+
+        assert len(result) == 1
+        assert result[0].wikipedia_museum_attributes == {"established": "1793"}
+        assert result[0].wikipedia_city_details.population == 2_165_000
+        assert "List_of_most_visited_museums" in [call.args[0] for call in mock_wiki_service.get_page_html.call_args_list]
+
+    @patch('service.data_collection_service.wikipedia_service')
+    @patch('service.data_collection_service.CityPageExtractor')
+    @patch('service.data_collection_service.MuseumInstancePageExtractor')
+    @patch('service.data_collection_service.MuseumListPageExtractor')
+    def test_collect_data_fetches_each_city_once(self, mock_list_extractor_class, mock_instance_extractor_class, mock_city_extractor_class, mock_wiki_service):
+        """Test that museums sharing a city share a single city page fetch."""
+        museums = [
+            self.make_museum("Louvre", "Paris"),
+            self.make_museum("Musée d'Orsay", "Paris"),
+            self.make_museum("Centre Pompidou", "Paris"),
+            self.make_museum("British Museum", "London"),
+            self.make_museum("Unknown Museum", "NA"),
+        ]
+        mock_wiki_service.get_page_html.return_value = "<html></html>"
+        mock_list_extractor_class.return_value.to_dto.return_value = museums
+        mock_instance_extractor_class.return_value.get_data.return_value = {}
+        mock_city_extractor_class.return_value.to_dto.side_effect = lambda: City(name="City", country="Country", population=1)
+        metrics = CollectionMetrics()
+
+        result = {museum.name: museum for museum in DataCollectionService.collect_data(["List_of_most_visited_museums"], metrics)}
+
+        city_page_calls = [call.args[0] for call in mock_wiki_service.get_page_html.call_args_list if call.args[0] in ("Paris", "London", "NA")]
+        assert sorted(city_page_calls) == ["London", "Paris"]
+        paris_museums = [result["Louvre"], result["Musée d'Orsay"], result["Centre Pompidou"]]
+        assert all(museum.wikipedia_city_details is paris_museums[0].wikipedia_city_details for museum in paris_museums)
+        assert result["Unknown Museum"].wikipedia_city_details is None
+        assert metrics.museum_pages_requested == 5
+        assert metrics.city_pages_requested == 2
+        assert metrics.city_requests_avoided == 2
+        assert metrics.concurrency["requests"] == 8
+
+    @patch('service.data_collection_service.wikipedia_service')
+    @patch('service.data_collection_service.CityPageExtractor')
+    @patch('service.data_collection_service.MuseumInstancePageExtractor')
+    def test_collect_data_resumes_from_checkpoints(self, mock_instance_extractor_class, mock_city_extractor_class, mock_wiki_service):
+        """Test that pages completed by an earlier attempt are not fetched again."""
+        museums = [self.make_museum("Louvre", "Paris"), self.make_museum("British Museum", "London")]
+        checkpoint_service = CheckpointService([
+            ImportCheckpoint(page_type=PageType.LIST.value, page_key="List_of_most_visited_museums", payload=[asdict(museum) for museum in museums]),
+            ImportCheckpoint(page_type=PageType.MUSEUM.value, page_key="Louvre", payload=None),
+            ImportCheckpoint(page_type=PageType.CITY.value, page_key="London", payload={"name": "London", "country": "UK", "population": 8_982_000}),
+        ])
+        mock_wiki_service.get_page_html.return_value = "<html></html>"
+        mock_instance_extractor_class.return_value.get_data.return_value = {}
+        metrics = CollectionMetrics()
+
+        result = list(DataCollectionService.collect_data(["List_of_most_visited_museums"], metrics, checkpoint_service))
+
+        assert [museum.name for museum in result] == ["British Museum"]
+        assert result[0].wikipedia_city_details == City(name="London", country="UK", population=8_982_000)
+        assert [call.args[0] for call in mock_wiki_service.get_page_html.call_args_list] == ["British Museum"]
+        mock_city_extractor_class.assert_not_called()
+        assert metrics.pages_restored_from_checkpoint == 3
+
+    @patch('service.data_collection_service.wikipedia_service')
+    @patch('service.data_collection_service.CityPageExtractor')
+    @patch('service.data_collection_service.MuseumInstancePageExtractor')
+    def test_collect_data_resumes_museums_by_page_title(self, mock_instance_extractor_class, mock_city_extractor_class, mock_wiki_service):
+        """Test that museum checkpoints are keyed by page title, like the deduplication of the lists."""
+        louvre = self.make_museum("Louvre", "Paris")
+        louvre.wikipedia_museum_details_page_title = "Musée du Louvre"
+        checkpoint_service = CheckpointService([
+            ImportCheckpoint(page_type=PageType.LIST.value, page_key="List_of_most_visited_museums", payload=[asdict(louvre)]),
+            ImportCheckpoint(page_type=PageType.MUSEUM.value, page_key="Musée du Louvre", payload=None),
+        ])
+
+        result = list(DataCollectionService.collect_data(["List_of_most_visited_museums"], checkpoint_service=checkpoint_service))
+
+        assert result == []
+        mock_wiki_service.get_page_html.assert_not_called()
+
+    @patch('service.data_collection_service.wikipedia_service')
+    @patch('service.data_collection_service.CityPageExtractor')
+    @patch('service.data_collection_service.MuseumInstancePageExtractor')
+    @patch('service.data_collection_service.MuseumListPageExtractor')
+    def test_collect_data_records_checkpoints(self, mock_list_extractor_class, mock_instance_extractor_class, mock_city_extractor_class, mock_wiki_service):
+        """Test that the list page and collected cities are recorded as completed."""
+        mock_wiki_service.get_page_html.return_value = "<html></html>"
+        mock_list_extractor_class.return_value.to_dto.return_value = [self.make_museum("Louvre", "Paris")]
+        mock_instance_extractor_class.return_value.get_data.return_value = {}
+        mock_city_extractor_class.return_value.to_dto.return_value = City(name="Paris", country="France", population=2_165_000)
+        checkpoint_service = CheckpointService()
+
+        list(DataCollectionService.collect_data(["List_of_most_visited_museums"], checkpoint_service=checkpoint_service))
+
+        assert checkpoint_service.get_payload(PageType.LIST, "List_of_most_visited_museums")[0]["name"] == "Louvre"
+        assert checkpoint_service.get_payload(PageType.CITY, "Paris") == {"name": "Paris", "country": "France", "population": 2_165_000}
+        assert not checkpoint_service.is_completed(PageType.MUSEUM, "Louvre")
+
+    @patch('service.data_collection_service.wikipedia_service')
+    @patch('service.data_collection_service.CityPageExtractor')
+    @patch('service.data_collection_service.MuseumInstancePageExtractor')
+    @patch('service.data_collection_service.DataCollectionService.fetch_museum_list')
+    def test_collect_data_deduplicates_across_lists(self, mock_fetch_museum_list, mock_instance_extractor_class, mock_city_extractor_class, mock_wiki_service):
+        """Test that museums and cities appearing on several lists are fetched once."""
+        lists = {
+            "List_of_most_visited_museums": [self.make_museum("Louvre", "Paris"), self.make_museum("British Museum", "London")],
+            "List_of_most_visited_art_museums": [self.make_museum("Louvre", "Paris"), self.make_museum("Musée d'Orsay", "Paris")],
+        }
+        mock_fetch_museum_list.side_effect = lambda title, controller: lists[title]
+        mock_wiki_service.get_page_html.return_value = "<html></html>"
+        mock_instance_extractor_class.return_value.get_data.return_value = {}
+        mock_city_extractor_class.return_value.to_dto.return_value = City(name="City", country="Country", population=1)
+        metrics = CollectionMetrics()
+
+        result = list(DataCollectionService.collect_data(list(lists), metrics))
+
+        assert sorted(museum.name for museum in result) == ["British Museum", "Louvre", "Musée d'Orsay"]
+        fetched_pages = [call.args[0] for call in mock_wiki_service.get_page_html.call_args_list]
+        assert fetched_pages.count("Louvre") == 1
+        assert fetched_pages.count("Paris") == 1
+        assert metrics.lists == {
+            "List_of_most_visited_museums": {"museums": 2, "new": 2, "duplicates": 0},
+            "List_of_most_visited_art_museums": {"museums": 2, "new": 1, "duplicates": 1},
+        }
+
+    @patch('service.data_collection_service.settings')
+    @patch('service.data_collection_service.wikipedia_service')
+    @patch('service.data_collection_service.MuseumInstancePageExtractor')
+    @patch('service.data_collection_service.MuseumListPageExtractor')
+    def test_collect_data_applies_backpressure(self, mock_list_extractor_class, mock_instance_extractor_class, mock_wiki_service, mock_settings):
+        """Test that the crawl does not run ahead of a slow consumer."""
+        mock_settings.max_workers = 1
+        mock_settings.concurrency_floor = 1
+        mock_settings.concurrency_ceiling = 1
+        mock_settings.concurrency_target_latency = 2.0
+        mock_settings.collection_queue_size = 1
+        mock_wiki_service.get_page_html.return_value = "<html></html>"
+        mock_list_extractor_class.return_value.to_dto.return_value = [self.make_museum(f"Museum {index}", "NA") for index in range(20)]
+        mock_instance_extractor_class.return_value.get_data.return_value = {}
+        metrics = CollectionMetrics()
+
+        museums = DataCollectionService.collect_data(["List_of_most_visited_museums"], metrics)
+        next(museums)
+        time.sleep(0.2)
+
+        # consumed + queued + blocked on the queue + in-flight window
+        assert metrics.museum_pages_requested <= 5
+        museums.close()
+
+    @patch('service.data_collection_service.wikipedia_service')
+    @patch('service.data_collection_service.CityPageExtractor')
+    @patch('service.data_collection_service.MuseumInstancePageExtractor')
+    @patch('service.data_collection_service.MuseumListPageExtractor')
+    def test_collect_data_stops_at_deadline(self, mock_list_extractor_class, mock_instance_extractor_class, mock_city_extractor_class, mock_wiki_service):
+        """Test that the crawl yields the complete museums and reports coverage once the deadline passes."""
+        release_slow_page = threading.Event()
+
+        def get_page_html(page_title, on_latency):
+            if page_title == "Slow Museum":
+                release_slow_page.wait(timeout=5)
+            return "<html></html>"
+
+        mock_wiki_service.get_page_html.side_effect = get_page_html
+        mock_list_extractor_class.return_value.to_dto.return_value = [self.make_museum("Louvre", "Paris"), self.make_museum("Slow Museum", "London")]
+        mock_instance_extractor_class.return_value.get_data.return_value = {}
+        mock_city_extractor_class.return_value.to_dto.return_value = City(name="City", country="Country", population=1)
+        metrics = CollectionMetrics()
+
+        start_time = time.monotonic()
+        result = list(DataCollectionService.collect_data(["List_of_most_visited_museums"], metrics, deadline=start_time + 0.5))
+        elapsed_time = time.monotonic() - start_time
+        release_slow_page.set()
+
+        assert [museum.name for museum in result] == ["Louvre"]
+        assert elapsed_time < 2
+        assert metrics.deadline_exceeded is True
+        assert metrics.coverage["list_pages"] == {"completed": 1, "total": 1}
+        assert metrics.coverage["museum_pages"] == {"completed": 1, "total": 2}
+        assert metrics.coverage["city_pages"] == {"completed": 2, "total": 2}
+        assert metrics.coverage["museums"] == {"completed": 1, "total": 2}
+
+    @patch('service.data_collection_service.wikipedia_service')
+    @patch('service.data_collection_service.MuseumListPageExtractor')
+    @patch('service.data_collection_service.DataCollectionService.fetch_museum_details')
+    def test_collect_data_propagates_crawl_errors(self, mock_fetch_museum_details, mock_list_extractor_class, mock_wiki_service):
+        """Test that an unexpected crawl error is raised in the consumer."""
+        mock_wiki_service.get_page_html.return_value = "<html></html>"
+        mock_list_extractor_class.return_value.to_dto.return_value = [self.make_museum("Louvre", "NA")]
+        mock_fetch_museum_details.side_effect = RuntimeError("Crawl failed")
+
+        with pytest.raises(RuntimeError, match="Crawl failed"):
+            list(DataCollectionService.collect_data(["List_of_most_visited_museums"]))
 
     @patch('service.data_collection_service.wikipedia_service')
     @patch('service.data_collection_service.MuseumInstancePageExtractor')
@@ -67,7 +257,7 @@ class TestDataCollectionService:
         mock_wiki_service.get_page_html.return_value = "<html>Museum details</html>"
         
         mock_extractor = Mock()
-        mock_extractor.extract_data.return_value = {"established": "1793"}
+        mock_extractor.get_data.return_value = {"established": "1793"}
         mock_extractor_class.return_value = mock_extractor
         
         result = DataCollectionService.fetch_museum_details(sample_museum)
@@ -75,6 +265,31 @@ class TestDataCollectionService:
         assert result.wikipedia_museum_attributes == {"established": "1793"}
         mock_wiki_service.get_page_html.assert_called_once_with("Louvre")
 
+    @patch('service.data_collection_service.wikipedia_service')
+    def test_fetch_reports_throttling_to_controller(self, mock_wiki_service, sample_museum):
+        """Test that a 429 response is reported to the concurrency controller."""
+        mock_wiki_service.get_page_html.side_effect = APIError("Too many requests", status_code=429)
+        controller = Mock()
+
+        DataCollectionService.fetch_museum_details(sample_museum, controller)
+
+        controller.acquire.assert_called_once()
+        assert controller.release.call_args.kwargs == {"error": True, "throttled": True}
+
+    @patch('service.data_collection_service.wikipedia_service')
+    def test_fetch_reports_request_latency_to_controller(self, mock_wiki_service, sample_museum):
+        """Test that the controller gets the latency of the HTTP request, not the wait for the rate limit."""
+        def get_page_html(page_title, on_latency):
+            on_latency(0.3)
+            return "<html>Museum details</html>"
+
+        mock_wiki_service.get_page_html.side_effect = get_page_html
+        controller = Mock()
+
+        DataCollectionService.fetch_museum_details(sample_museum, controller)
+
+        controller.release.assert_called_once_with(0.3)
+
     @patch('service.data_collection_service.wikipedia_service')
     def test_fetch_museum_details_handles_error(self, mock_wiki_service, sample_museum):
         """Test that fetch_museum_details handles errors gracefully."""
@@ -88,7 +303,7 @@ class TestDataCollectionService:
 
     @patch('service.data_collection_service.wikipedia_service')
     @patch('service.data_collection_service.CityPageExtractor')
-    def test_fetch_city_details_success(self, mock_extractor_class, mock_wiki_service, sample_museum):
+    def test_fetch_city_details_success(self, mock_extractor_class, mock_wiki_service):
         """Test successful city details fetching."""
         mock_wiki_service.get_page_html.return_value = "<html>City details</html>"
         
@@ -97,19 +312,90 @@ class TestDataCollectionService:
         mock_extractor.to_dto.return_value = city_dto
         mock_extractor_class.return_value = mock_extractor
         
-        result = DataCollectionService.fetch_city_details(sample_museum)
+        result = DataCollectionService.fetch_city_details("Paris")
         
-        assert result.wikipedia_city_details.name == "Paris"
-        assert result.wikipedia_city_details.population == 2_165_000
+        assert result.name == "Paris"
+        assert result.population == 2_165_000
         mock_wiki_service.get_page_html.assert_called_once_with("Paris")
 
     @patch('service.data_collection_service.wikipedia_service')
-    def test_fetch_city_details_handles_error(self, mock_wiki_service, sample_museum):
+    @patch('service.data_collection_service.CityPageExtractor')
+    def test_fetch_city_details_records_stages(self, mock_extractor_class, mock_wiki_service):
+        """Test that the fetch and the extraction of a page are recorded as stages."""
+        stage_metrics.reset()
+        mock_wiki_service.get_page_html.return_value = "<html>Zürich</html>"
+        mock_extractor_class.return_value.to_dto.return_value = City(name="Zürich", country="Switzerland", population=421_878)
+
+        DataCollectionService.fetch_city_details("Zürich")
+
+        report = stage_metrics.report()
+        assert report["fetch.city_page"]["count"] == 1
+        assert report["fetch.city_page"]["bytes"] == len("<html>Zürich</html>".encode("utf-8"))
+        assert report["extract.city_page"]["count"] == 1
+        stage_metrics.reset()
+
+    @patch('service.data_collection_service.wikipedia_service')
+    def test_fetch_city_details_handles_error(self, mock_wiki_service):
         """Test that fetch_city_details handles errors gracefully."""
         mock_wiki_service.get_page_html.side_effect = Exception("Network error")
         
-        result = DataCollectionService.fetch_city_details(sample_museum)
+        result = DataCollectionService.fetch_city_details("Paris")
         
-        # Should return original museum without crashing
-        assert result.name == "Louvre"
-        assert result.city == "Paris"
+        # Should return None without crashing
+        assert result is None
+
+    @patch('service.data_collection_service.wikipedia_service')
+    def test_fetch_details_raise_errors(self, mock_wiki_service, sample_museum):
+        """Test that errors are raised to the caller when it handles them, as the crawl task queue does."""
+        mock_wiki_service.get_page_html.side_effect = TimeoutError("Read timed out")
+
+        with pytest.raises(TimeoutError):
+            DataCollectionService.fetch_museum_details(sample_museum, raise_errors=True)
+        with pytest.raises(TimeoutError):
+            DataCollectionService.fetch_city_details("Paris", raise_errors=True)
+
+
+class TestLowMemoryMode:
+    """Peak memory of the fetch path with and without low memory mode."""
+
+    INFOBOX_ROWS = "".join(f"<tr><th>Field {index}</th><td>Value {index} <a href='/wiki/Link_{index}'>link</a></td></tr>" for index in range(50))
+    PAGE_TEMPLATE = f"<!DOCTYPE html><html><body><table class='infobox'>{INFOBOX_ROWS}</table><p>{'text ' * 500}</p></body></html>"
+
+    def measure_peak(self, page_count, low_memory_mode):
+        """Fetch museum and city pages one after the other and return the peak of traced memory."""
+        with patch('service.data_collection_service.wikipedia_service') as mock_wiki_service, \
+                patch('service.data_collection_service.settings') as mock_settings:
+            mock_settings.low_memory_mode = low_memory_mode
+            # A fresh string per page, as a real response would be
+            mock_wiki_service.get_page_html.side_effect = lambda page_title: self.PAGE_TEMPLATE.replace("Field 0", page_title)
+            # Parsed trees are full of reference cycles, with the collector off only the pages that
+            # are explicitly released are freed, which makes the measure deterministic
+            gc.collect()
+            gc.disable()
+            tracemalloc.start()
+            try:
+                for index in range(page_count):
+                    museum = TestDataCollectionService.make_museum(f"Museum {index}", f"City {index}")
+                    DataCollectionService.fetch_museum_details(museum)
+                    DataCollectionService.fetch_city_details(f"City {index}")
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+                gc.enable()
+        return peak
+
+    def test_peak_memory_stays_flat_as_page_count_grows(self):
+        """Test that low memory mode frees each page before the next one is fetched."""
+        stage_metrics.reset()
+
+        small_crawl_peak = self.measure_peak(5, low_memory_mode=True)
+        large_crawl_peak = self.measure_peak(20, low_memory_mode=True)
+
+        assert large_crawl_peak < small_crawl_peak * 1.5
+
+    def test_peak_memory_grows_without_low_memory_mode(self):
+        """Test that the measure detects pages piling up when they are not released."""
+        small_crawl_peak = self.measure_peak(5, low_memory_mode=False)
+        large_crawl_peak = self.measure_peak(20, low_memory_mode=False)
+
+        assert large_crawl_peak > small_crawl_peak * 2
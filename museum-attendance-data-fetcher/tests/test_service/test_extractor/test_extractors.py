@@ -235,3 +235,28 @@ class TestAbstractWikipediaPageExtractor:
         data = extractor.get_data()
         
         assert isinstance(data, dict)
+
+    def test_get_data_low_memory_releases_page(self):
+        """Test that low memory mode drops the HTML and wipes the parsed tree once extracted."""
+        html = "<!DOCTYPE html><html><body><table class='infobox'><tr><th>Opened</th><td>1793</td></tr></table></body></html>"
+        extractor = MuseumInstancePageExtractor(_html_content=html, _low_memory=True)
+        soups = []
+        elements = []
+        parse_html = extractor.parse_html
+
+        def tracked_parse_html():
+            soup = parse_html()
+            soups.append(soup)
+            # Release empties the tree, so its elements are captured before
+            elements.extend(soup.contents)
+            elements.extend(soup.find_all(True))
+            return soup
+
+        with patch.object(extractor, 'parse_html', side_effect=tracked_parse_html):
+            data = extractor.get_data()
+
+        assert data == {"opened": "1793"}
+        assert extractor.get_html_content() == ""
+        assert soups[0].decomposed
+        assert len(elements) > 2
+        assert all(element.decomposed for element in elements)
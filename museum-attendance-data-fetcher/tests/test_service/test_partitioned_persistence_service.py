@@ -0,0 +1,138 @@
+"""Tests for PartitionedPersistenceService."""
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from sqlalchemy.orm import Session
+
+from museum_attendance_common.model import City, Museum
+from museum_attendance_common.exceptions import DatabaseError
+from service.partitioned_persistence_service import PartitionedPersistenceService
+from dto import Museum as MuseumDTO
+
+
+def make_museums(count):
+    """Create museums of one city, with one attribute each."""
+    city = City(name="Paris", country_id=1)
+    city.id = 1
+    return [
+        (
+            MuseumDTO(
+                name=f"Museum {index}",
+                visitor_count=1_000_000,
+                city="Paris",
+                wikipedia_city_details_page_title="Paris",
+                wikipedia_city_details=None,
+                country="France",
+                wikipedia_museum_details_page_title=f"Museum {index}",
+                wikipedia_museum_attributes={"established": str(1800 + index)}
+            ),
+            city
+        )
+        for index in range(count)
+    ]
+
+
+class TestPartitionedPersistenceService:
+    """Test suite for PartitionedPersistenceService."""
+
+    @pytest.fixture
+    def sessions(self):
+        """Sessions handed out by the session factory, one per partition."""
+        return []
+
+    @pytest.fixture
+    def session_factory(self, sessions):
+        """Create a session factory recording the sessions it opens."""
+        def open_session():
+            session = MagicMock(spec=Session)
+            session.__enter__.return_value = session
+            sessions.append(session)
+            return session
+        return open_session
+
+    @pytest.fixture
+    def persistence_service_class(self):
+        """Patch the PersistenceService of each partition, every museum of a partition is inserted."""
+        with patch('service.partitioned_persistence_service.PersistenceService') as persistence_service_class:
+            def persist_museums(museums):
+                return {museum_dto.name: (Museum(name=museum_dto.name), True, False) for museum_dto, _ in museums}
+
+            def persist_museums_attributes(museums):
+                return len(museums), 0, 0
+
+            persistence_service_class.return_value.persist_museums.side_effect = persist_museums
+            persistence_service_class.return_value.persist_museums_attributes.side_effect = persist_museums_attributes
+            yield persistence_service_class
+
+    def test_partition_is_stable_by_name(self, session_factory):
+        """Test that a museum always lands in the same partition and every museum is in one partition."""
+        service = PartitionedPersistenceService(session_factory, partitions=4)
+        museums = make_museums(40)
+
+        partitions = service.partition(museums)
+
+        assert sorted(museum_dto.name for partition in partitions for museum_dto, _ in partition) == sorted(museum_dto.name for museum_dto, _ in museums)
+        assert service.partition(museums) == partitions
+        assert all(partition for partition in partitions)
+
+    def test_partition_keeps_duplicates_together(self, session_factory):
+        """Test that a museum listed twice is upserted by a single partition."""
+        museums = make_museums(10) + make_museums(10)
+
+        partitions = PartitionedPersistenceService(session_factory, partitions=3).partition(museums)
+
+        partition_of_name = {}
+        for index, partition in enumerate(partitions):
+            for museum_dto, _ in partition:
+                assert partition_of_name.setdefault(museum_dto.name, index) == index
+
+    def test_persist_sums_partitions_committed_on_their_own(self, session_factory, sessions, persistence_service_class):
+        """Test that each partition commits its own session and the counts of all partitions are summed."""
+        service = PartitionedPersistenceService(session_factory, partitions=3)
+
+        counters = service.persist(make_museums(30))
+
+        assert counters == {"inserted_museums": 30, "updated_museums": 0, "inserted_attributes": 30, "updated_attributes": 0, "deleted_attributes": 0}
+        assert len(sessions) == len(service.partition(make_museums(30)))
+        assert all(session.commit.call_count == 1 for session in sessions)
+
+    def test_persist_runs_partitions_in_parallel(self, session_factory, sessions, persistence_service_class):
+        """Test that the partitions of a batch are persisted at the same time."""
+        partitions = len(PartitionedPersistenceService(session_factory, partitions=3).partition(make_museums(30)))
+        barrier = threading.Barrier(partitions, timeout=5)
+        persist_museums = persistence_service_class.return_value.persist_museums.side_effect
+
+        def wait_for_other_partitions(museums):
+            barrier.wait()
+            return persist_museums(museums)
+
+        persistence_service_class.return_value.persist_museums.side_effect = wait_for_other_partitions
+
+        counters = PartitionedPersistenceService(session_factory, partitions=3).persist(make_museums(30))
+
+        assert counters["inserted_museums"] == 30
+
+    def test_persist_failed_partition(self, session_factory, sessions, persistence_service_class):
+        """Test that a failing partition is rolled back and raised once the others committed."""
+        persist_museums = persistence_service_class.return_value.persist_museums.side_effect
+        failing_name = make_museums(30)[0][0].name
+
+        def fail_one_partition(museums):
+            if any(museum_dto.name == failing_name for museum_dto, _ in museums):
+                raise DatabaseError("deadlock detected", entity_type="Museum", operation="persist_many")
+            return persist_museums(museums)
+
+        persistence_service_class.return_value.persist_museums.side_effect = fail_one_partition
+
+        with pytest.raises(DatabaseError, match="deadlock detected"):
+            PartitionedPersistenceService(session_factory, partitions=3).persist(make_museums(30))
+
+        assert sum(session.rollback.call_count for session in sessions) == 1
+        assert sum(session.commit.call_count for session in sessions) == len(sessions) - 1
+
+    def test_persist_empty_batch(self, session_factory, sessions):
+        """Test that an empty batch opens no session."""
+        counters = PartitionedPersistenceService(session_factory, partitions=3).persist([])
+
+        assert set(counters.values()) == {0}
+        assert sessions == []
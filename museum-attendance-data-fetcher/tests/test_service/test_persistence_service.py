@@ -3,7 +3,7 @@ import pytest
 from unittest.mock import Mock, MagicMock
 
 from service.persistence_service import PersistenceService
-from museum_attendance_common.model import Country, City, Museum
+from museum_attendance_common.model import Country, City, Museum, ImportLog
 from museum_attendance_common.exceptions import DatabaseError
 from dto import Museum as MuseumDTO, City as CityDTO
 from exceptions import DataProcessingError
@@ -16,6 +16,7 @@ class TestPersistenceService:
     def mock_repositories(self):
         """Create mock repositories."""
         return {
+            'session': Mock(),
             'museum_repository': Mock(),
             'country_repository': Mock(),
             'museum_attributes_repository': Mock(),
@@ -60,6 +61,13 @@ class TestPersistenceService:
             wikipedia_museum_attributes={"established": "1793", "type": "Art Museum"}
         )
 
+    def test_commit_uses_given_session(self, persistence_service, mock_repositories):
+        """Test that the service commits its own session rather than the session of a repository."""
+        persistence_service.commit()
+
+        mock_repositories['session'].commit.assert_called_once()
+        mock_repositories['city_repository'].session.commit.assert_not_called()
+
     def test_persist_country_success(self, persistence_service, sample_country, mock_repositories):
         """Test successful country persistence."""
         mock_repositories['country_repository'].add.return_value = (sample_country, True, False)
@@ -69,7 +77,7 @@ class TestPersistenceService:
         assert country == sample_country
         assert inserted is True
         assert updated is False
-        mock_repositories['country_repository'].add.assert_called_once_with("France")
+        mock_repositories['country_repository'].add.assert_called_once_with("France", flush=True)
 
     def test_persist_country_empty_name(self, persistence_service):
         """Test persisting country with empty name raises error."""
@@ -104,7 +112,7 @@ class TestPersistenceService:
         assert inserted is True
         assert updated is False
         mock_repositories['city_repository'].persist.assert_called_once_with(
-            "Paris", 2_165_000, "Paris", sample_country
+            "Paris", 2_165_000, "Paris", sample_country, flush=True
         )
 
     def test_persist_city_empty_name(self, persistence_service, sample_country):
@@ -142,97 +150,237 @@ class TestPersistenceService:
         
         assert "Failed to persist city" in str(exc_info.value)
 
-    def test_persist_museum_success(self, persistence_service, sample_museum_dto, sample_city, mock_repositories):
-        """Test successful museum persistence."""
+    def test_preload_resolves_countries_and_cities_of_batch(self, persistence_service, sample_museum_dto, mock_repositories):
+        """Test that the distinct countries and cities of a batch are preloaded."""
+        persistence_service.preload([sample_museum_dto, sample_museum_dto])
+
+        mock_repositories['country_repository'].preload.assert_called_once_with({"France"})
+        mock_repositories['city_repository'].preload.assert_called_once_with({"Paris"})
+
+    def test_persist_museums_success(self, persistence_service, sample_museum_dto, sample_city, mock_repositories):
+        """Test that a batch of museums is upserted at once and returned by name."""
         museum = Museum()
         museum.id = 1
         museum.name = "Louvre"
-        mock_repositories['museum_repository'].persist.return_value = (museum, True, False)
-        
-        result_museum, inserted, updated = persistence_service.persist_museum(sample_museum_dto, sample_city)
-        
-        assert result_museum == museum
-        assert inserted is True
-        assert updated is False
-        mock_repositories['museum_repository'].persist.assert_called_once_with(
-            name="Louvre",
-            number_of_visitors=9_600_000,
-            reference_url="Louvre",
-            city=sample_city
-        )
+        mock_repositories['museum_repository'].persist_many.return_value = [(museum, False, True)]
 
-    def test_persist_museum_empty_name(self, persistence_service, sample_city):
-        """Test persisting museum with empty name raises error."""
-        city_dto = CityDTO(name="Paris", country="France", population=2_165_000)
-        museum_dto = MuseumDTO(
+        persisted = persistence_service.persist_museums([(sample_museum_dto, sample_city)])
+
+        assert persisted == {"Louvre": (museum, False, True)}
+        mock_repositories['museum_repository'].persist_many.assert_called_once_with([
+            dict(name="Louvre", number_of_visitors=9_600_000, reference_url="Louvre", city=sample_city)
+        ])
+
+    def test_persist_museums_empty_name(self, persistence_service, sample_museum_dto, sample_city, mock_repositories):
+        """Test that a batch containing a museum without a name is rejected before reaching the database."""
+        unnamed_museum_dto = MuseumDTO(
             name="",
-            visitor_count=1000,
+            visitor_count=1_000_000,
             city="Paris",
             wikipedia_city_details_page_title="Paris",
-            wikipedia_city_details=city_dto,
+            wikipedia_city_details=None,
             country="France",
-            wikipedia_museum_details_page_title="Test",
+            wikipedia_museum_details_page_title="NA",
             wikipedia_museum_attributes={}
         )
-        
-        with pytest.raises(DataProcessingError) as exc_info:
-            persistence_service.persist_museum(museum_dto, sample_city)
-        
-        assert "Museum name cannot be empty" in str(exc_info.value)
 
-    def test_persist_museum_database_error(self, persistence_service, sample_museum_dto, sample_city, mock_repositories):
-        """Test handling database error when persisting museum."""
-        mock_repositories['museum_repository'].persist.side_effect = DatabaseError("DB error")
-        
+        with pytest.raises(DataProcessingError):
+            persistence_service.persist_museums([(sample_museum_dto, sample_city), (unnamed_museum_dto, sample_city)])
+
+        mock_repositories['museum_repository'].persist_many.assert_not_called()
+
+    def test_persist_museums_database_error(self, persistence_service, sample_museum_dto, sample_city, mock_repositories):
+        """Test that database errors of the batch upsert are propagated."""
+        mock_repositories['museum_repository'].persist_many.side_effect = DatabaseError("DB error")
+
         with pytest.raises(DatabaseError):
-            persistence_service.persist_museum(sample_museum_dto, sample_city)
+            persistence_service.persist_museums([(sample_museum_dto, sample_city)])
 
-    def test_persist_museum_unexpected_error(self, persistence_service, sample_museum_dto, sample_city, mock_repositories):
-        """Test handling unexpected error when persisting museum."""
-        mock_repositories['museum_repository'].persist.side_effect = Exception("Unexpected error")
-        
-        with pytest.raises(DataProcessingError) as exc_info:
-            persistence_service.persist_museum(sample_museum_dto, sample_city)
-        
-        assert "Failed to persist museum" in str(exc_info.value)
+    def test_persist_museums_attributes_success(self, persistence_service, mock_repositories):
+        """Test that the attributes of a batch of museums are written at once."""
+        louvre = Museum()
+        louvre.id = 1
+        orsay = Museum()
+        orsay.id = 2
+        mock_repositories['museum_attributes_repository'].persist_many.return_value = (2, 1, 3)
 
-    def test_persist_museum_attributes_success(self, persistence_service, mock_repositories):
-        """Test successful museum attributes persistence."""
-        museum = Museum()
-        museum.id = 1
-        attributes = {"established": "1793", "type": "Art Museum", "architect": "Unknown"}
-        
-        # Mock each attribute persistence
-        mock_repositories['museum_attributes_repository'].persist.side_effect = [
-            (Mock(), True, False),   # First attribute inserted
-            (Mock(), False, True),   # Second attribute updated
-            (Mock(), True, False),   # Third attribute inserted
-        ]
-        
-        inserted_count, updated_count = persistence_service.persist_museum_attributes(attributes, museum)
-        
-        assert inserted_count == 2
-        assert updated_count == 1
-        assert mock_repositories['museum_attributes_repository'].persist.call_count == 3
+        counts = persistence_service.persist_museums_attributes([(louvre, {"established": "1793", "type": "Art Museum"}), (orsay, {"established": "1986"})])
 
-    def test_persist_museum_attributes_empty_dict(self, persistence_service, mock_repositories):
-        """Test persisting empty museum attributes dictionary."""
-        museum = Museum()
-        museum.id = 1
-        
-        inserted_count, updated_count = persistence_service.persist_museum_attributes({}, museum)
-        
-        assert inserted_count == 0
-        assert updated_count == 0
-        mock_repositories['museum_attributes_repository'].persist.assert_not_called()
+        assert counts == (2, 1, 3)
+        mock_repositories['museum_attributes_repository'].persist_many.assert_called_once_with(
+            [(louvre, {"established": "1793", "type": "Art Museum"}), (orsay, {"established": "1986"})]
+        )
+
+    def test_persist_museums_attributes_skips_unfetched_pages(self, persistence_service, mock_repositories):
+        """Test that museums whose page was not fetched keep their stored attributes."""
+        louvre = Museum()
+        louvre.id = 1
+        orsay = Museum()
+        orsay.id = 2
+        mock_repositories['museum_attributes_repository'].persist_many.return_value = (0, 0, 0)
+
+        persistence_service.persist_museums_attributes([(louvre, None), (orsay, {})])
 
-    def test_persist_museum_attributes_database_error(self, persistence_service, mock_repositories):
-        """Test handling database error when persisting museum attributes."""
+        mock_repositories['museum_attributes_repository'].persist_many.assert_called_once_with([(orsay, {})])
+
+    def test_persist_museums_attributes_database_error(self, persistence_service, mock_repositories):
+        """Test that database errors of the batch are propagated."""
         museum = Museum()
         museum.id = 1
-        attributes = {"established": "1793"}
-        
-        mock_repositories['museum_attributes_repository'].persist.side_effect = DatabaseError("DB error")
-        
+        mock_repositories['museum_attributes_repository'].persist_many.side_effect = DatabaseError("DB error")
+
         with pytest.raises(DatabaseError):
-            persistence_service.persist_museum_attributes(attributes, museum)
+            persistence_service.persist_museums_attributes([(museum, {"established": "1793"})])
+
+    def test_persist_visitor_history(self, mock_repositories, sample_museum_dto):
+        """Test that the visitor counts of the persisted museums are recorded by name for the import job."""
+        visitor_history_repository = Mock()
+        visitor_history_repository.persist_many.return_value = 1
+        persistence_service = PersistenceService(**mock_repositories, visitor_history_repository=visitor_history_repository)
+        import_log = ImportLog(status="IN_PROGRESS")
+
+        assert persistence_service.persist_visitor_history(import_log, [sample_museum_dto]) == 1
+        visitor_history_repository.persist_many.assert_called_once_with(import_log, ["Louvre"])
+
+    def test_persist_visitor_history_without_repository(self, persistence_service, sample_museum_dto):
+        """Test that nothing is recorded without a visitor history repository."""
+        assert persistence_service.persist_visitor_history(ImportLog(status="IN_PROGRESS"), [sample_museum_dto]) == 0
+
+    def test_persist_staged_visitor_history(self, mock_repositories):
+        """Test that the visitor counts of the merged museums are recorded from the staging tables."""
+        visitor_history_repository = Mock()
+        visitor_history_repository.persist_staged.return_value = 2
+        persistence_service = PersistenceService(**mock_repositories, visitor_history_repository=visitor_history_repository)
+        import_log = ImportLog(status="IN_PROGRESS")
+
+        assert persistence_service.persist_staged_visitor_history(import_log) == 2
+        visitor_history_repository.persist_staged.assert_called_once_with(import_log)
+
+    def test_stage_museums_copies_rows(self, mock_repositories, sample_museum_dto):
+        """Test that a batch is copied into the staging tables of cities, museums and attributes."""
+        staging_repository = Mock()
+        persistence_service = PersistenceService(**mock_repositories, staging_repository=staging_repository)
+
+        persistence_service.stage_museums([sample_museum_dto])
+
+        assert list(staging_repository.copy_cities.call_args.args[0]) == [("Paris", 2_165_000, "Paris", "France")]
+        assert list(staging_repository.copy_museums.call_args.args[0]) == [("Louvre", 9_600_000, "Louvre", "Paris", True)]
+        assert list(staging_repository.copy_attributes.call_args.args[0]) == [("Louvre", "established", "1793"), ("Louvre", "type", "Art Museum")]
+
+    def test_stage_museums_unfetched_attributes(self, mock_repositories, sample_museum_dto):
+        """Test that a museum whose page was not fetched is staged without attributes to replace."""
+        staging_repository = Mock()
+        persistence_service = PersistenceService(**mock_repositories, staging_repository=staging_repository)
+        sample_museum_dto.wikipedia_museum_attributes = None
+
+        persistence_service.stage_museums([sample_museum_dto])
+
+        assert list(staging_repository.copy_museums.call_args.args[0])[0][4] is False
+        assert list(staging_repository.copy_attributes.call_args.args[0]) == []
+
+    def test_stage_museums_requires_staging_repository(self, persistence_service, sample_museum_dto):
+        """Test that staging without a staging repository is rejected."""
+        with pytest.raises(DataProcessingError):
+            persistence_service.stage_museums([sample_museum_dto])
+
+    def test_merge_staged_museums(self, mock_repositories):
+        """Test that the merge counters of the staging repository are returned."""
+        staging_repository = Mock()
+        staging_repository.merge.return_value = {"inserted_museums": 3}
+        persistence_service = PersistenceService(**mock_repositories, staging_repository=staging_repository)
+
+        assert persistence_service.merge_staged_museums() == {"inserted_museums": 3}
+
+
+class TestPersistenceServiceUnitOfWork:
+    """Counts the flushes of countries and cities, against an in-memory SQLite database.
+
+    SQLite inserts the rows of a flush one by one, PostgreSQL sends the rows of a table in one
+    statement (see benchmarks/persistence_round_trips.py).
+    """
+
+    @pytest.fixture
+    def session(self):
+        """Create a session on a database with the country and city tables, recording its flushes."""
+        from sqlalchemy import create_engine, event
+        from sqlalchemy.orm import Session
+        from museum_attendance_common.model.base import Base
+
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine, tables=[Country.__table__, City.__table__])
+        session = Session(engine, autoflush=False)
+        session.flushes = []
+        event.listen(session, "after_flush", lambda session, flush_context: session.flushes.append(len(session.new)))
+        yield session
+        session.close()
+        engine.dispose()
+
+    @staticmethod
+    def make_persistence_service(session, flush_size):
+        """Create a PersistenceService writing countries and cities in the session."""
+        from museum_attendance_common.repository import CountryRepository, CityRepository
+        return PersistenceService(
+            session=session,
+            museum_repository=Mock(),
+            country_repository=CountryRepository(session),
+            museum_attributes_repository=Mock(),
+            city_repository=CityRepository(session),
+            flush_size=flush_size
+        )
+
+    @staticmethod
+    def make_museums():
+        """Create 20 museums in 10 cities of 4 countries."""
+        return [
+            MuseumDTO(
+                name=f"Museum {index}",
+                visitor_count=1_000_000,
+                city=f"City {index % 10}",
+                wikipedia_city_details_page_title=f"City {index % 10}",
+                wikipedia_city_details=CityDTO(name=f"City {index % 10}", country=f"Country {index % 10 % 4}", population=100_000),
+                country=f"Country {index % 10 % 4}",
+                wikipedia_museum_details_page_title=f"Museum {index}",
+                wikipedia_museum_attributes={}
+            )
+            for index in range(20)
+        ]
+
+    def persist(self, session, flush_size):
+        """Persist the countries and cities of the museums as a batch, returning the entities inserted per flush."""
+        persistence_service = self.make_persistence_service(session, flush_size)
+        museums = self.make_museums()
+        persistence_service.preload(museums)
+        cities = []
+        for museum_dto in museums:
+            country, _, _ = persistence_service.persist_country(museum_dto.get_country())
+            city, _, _ = persistence_service.persist_city(museum_dto, country)
+            cities.append(city)
+        persistence_service.flush()
+        assert all(city.id is not None and city.country_id is not None for city in cities)
+        return [inserted_count for inserted_count in session.flushes if inserted_count]
+
+    def test_flush_each_entity(self, session):
+        """Test that without batching every new country and city is flushed on its own."""
+        assert self.persist(session, flush_size=1) == [1] * 14
+
+    def test_flush_batches_pending_entities(self, session):
+        """Test that with batching the new countries and cities are flushed together and linked by id."""
+        flushes = self.persist(session, flush_size=50)
+
+        assert flushes == [14]
+        assert session.query(City).count() == 10
+        assert {city.country.name for city in session.query(City)} == {"Country 0", "Country 1", "Country 2", "Country 3"}
+
+    def test_rollback_forgets_discarded_entities(self, session):
+        """Test that the countries and cities discarded by a rollback are inserted again by the next batch."""
+        persistence_service = self.make_persistence_service(session, flush_size=50)
+        museums = self.make_museums()
+        for _ in range(2):
+            persistence_service.preload(museums)
+            for museum_dto in museums:
+                country, _, _ = persistence_service.persist_country(museum_dto.get_country())
+                persistence_service.persist_city(museum_dto, country)
+            persistence_service.flush()
+            session.rollback()
+
+        assert [inserted_count for inserted_count in session.flushes if inserted_count] == [14, 14]
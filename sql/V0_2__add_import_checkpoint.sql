@@ -0,0 +1,10 @@
+-- Per-page completion records so an interrupted import can resume where it stopped
+CREATE TABLE import_checkpoint (
+    id SERIAL PRIMARY KEY,
+    import_log_id INT NOT NULL REFERENCES import_log(id) ON DELETE CASCADE,
+    page_type VARCHAR(20) NOT NULL,
+    page_key TEXT NOT NULL,
+    payload JSONB,
+    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(import_log_id, page_type, page_key)
+);
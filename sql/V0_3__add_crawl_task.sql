@@ -0,0 +1,19 @@
+-- Work queue of the pages to crawl for an import job, claimed by the fetcher replicas with FOR UPDATE SKIP LOCKED
+CREATE TABLE crawl_task (
+    id SERIAL PRIMARY KEY,
+    import_log_id INT NOT NULL REFERENCES import_log(id) ON DELETE CASCADE,
+    page_type VARCHAR(20) NOT NULL,
+    page_key TEXT NOT NULL,
+    payload JSONB,
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+    attempts INT NOT NULL DEFAULT 0,
+    claimed_by VARCHAR(255),
+    claimed_at TIMESTAMP,
+    completed_at TIMESTAMP,
+    result JSONB,
+    error_message TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(import_log_id, page_type, page_key)
+);
+
+CREATE INDEX idx_crawl_task_import_log_status ON crawl_task(import_log_id, status);
@@ -0,0 +1,24 @@
+-- Append-only visitor counts of every import job, museum.number_of_visitors only keeps the latest one.
+-- Partitioned by the year of the import so a time range only scans its years, and BRIN-indexed on time:
+-- rows are appended in time order, so the index stays a few pages per partition.
+CREATE TABLE museum_visitor_history (
+    museum_id INT NOT NULL REFERENCES museum(id),
+    import_log_id INT NOT NULL REFERENCES import_log(id) ON DELETE CASCADE,
+    number_of_visitors INT NOT NULL,
+    recorded_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (museum_id, recorded_at, import_log_id)
+) PARTITION BY RANGE (recorded_at);
+
+CREATE INDEX idx_museum_visitor_history_recorded_at ON museum_visitor_history USING BRIN (recorded_at);
+
+-- The partitions of the coming years, the fetcher creates the partition of a later year before writing to it
+DO $$
+BEGIN
+    FOR year IN 2024..2030 LOOP
+        EXECUTE format(
+            'CREATE TABLE museum_visitor_history_%s PARTITION OF museum_visitor_history FOR VALUES FROM (%L) TO (%L)',
+            year, make_date(year, 1, 1), make_date(year + 1, 1, 1)
+        );
+    END LOOP;
+END
+$$;
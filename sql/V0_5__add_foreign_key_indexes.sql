@@ -0,0 +1,10 @@
+-- Foreign keys are not indexed by Postgres: without these, joining a country to its cities or a city to its
+-- museums, and checking the references when a city or country is deleted, scan the whole referencing table.
+-- museum_attributes(museum_id) needs none, UNIQUE(museum_id, attribute_key) starts with it.
+CREATE INDEX idx_city_country_id ON city(country_id);
+CREATE INDEX idx_museum_city_id ON museum(city_id);
+
+-- The UNIQUE constraints on the names already come with an index, these duplicates only slow down writes
+DROP INDEX idx_museum_name;
+DROP INDEX idx_city_name;
+DROP INDEX idx_country_name;
@@ -0,0 +1,14 @@
+-- The attributes of a museum as one JSONB object, kept in sync with its museum_attributes rows by the
+-- repositories in the same transaction, so museums are filtered on their attributes by one GIN-indexed
+-- query (@> containment, ? key) instead of joining and pivoting the attribute rows
+ALTER TABLE museum ADD COLUMN attributes JSONB NOT NULL DEFAULT '{}';
+
+UPDATE museum SET attributes = synced.attributes
+FROM (
+    SELECT museum_id, jsonb_object_agg(attribute_key, attribute_value) AS attributes
+    FROM museum_attributes
+    GROUP BY museum_id
+) AS synced
+WHERE museum.id = synced.museum_id;
+
+CREATE INDEX idx_museum_attributes_gin ON museum USING GIN (attributes);
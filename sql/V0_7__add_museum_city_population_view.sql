@@ -0,0 +1,17 @@
+-- The dataset of the regression notebook, pre-joined: museums having a visitor count with the population
+-- of their city and the name of its country. The fetcher refreshes it CONCURRENTLY when an import job
+-- succeeds, readers are never blocked, which needs the unique index.
+CREATE MATERIALIZED VIEW museum_city_population AS
+SELECT
+    museum.id AS museum_id,
+    museum.name AS museum_name,
+    museum.number_of_visitors AS visitor_count,
+    city.name AS city_name,
+    city.population AS city_population,
+    country.name AS country_name
+FROM museum
+JOIN city ON city.id = museum.city_id
+JOIN country ON country.id = city.country_id
+WHERE museum.number_of_visitors IS NOT NULL AND city.population IS NOT NULL;
+
+CREATE UNIQUE INDEX idx_museum_city_population_museum_id ON museum_city_population(museum_id);
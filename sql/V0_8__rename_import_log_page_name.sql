@@ -0,0 +1,6 @@
+-- The import jobs crawl several list pages since MASTER_PAGE_TITLES, their result records them as
+-- "page_names" (a list). Jobs recorded before keep the name of their single page under "page_name",
+-- moved here so readers of import_log.result only deal with one key.
+UPDATE import_log
+SET result = (result - 'page_name') || jsonb_build_object('page_names', jsonb_build_array(result -> 'page_name'))
+WHERE result ? 'page_name' AND NOT result ? 'page_names';